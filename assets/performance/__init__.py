@@ -24,6 +24,8 @@ class CodeType(enum.StrEnum):
 class Measurement(enum.StrEnum):
     time = "time"
     size = "size"
+    memory = "memory"
+    io = "io"
 
 
 PACKAGE_PATHS: dict[Importer, dict[CodeType, pathlib.Path]] = {
@@ -41,10 +43,9 @@ PACKAGE_PATHS: dict[Importer, dict[CodeType, pathlib.Path]] = {
     },
 }
 
+# Each run writes its import log to a numbered file in one of these directories.
 LOG_PATHS: dict[Importer, dict[CodeType, pathlib.Path]] = {
     # This is a dictionary comprehension.
-    importer: {
-        code_type: STATS / f"{importer}.{code_type}.log" for code_type in CodeType
-    }
+    importer: {code_type: STATS / f"{importer}.{code_type}" for code_type in CodeType}
     for importer in Importer
 }
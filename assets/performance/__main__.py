@@ -13,18 +13,22 @@ sys.path.insert(0, str(assets))
 
 
 if __name__ == "__main__":
+    from performance.bench import bench
     from performance.clean import clean
     from performance.collect import collect
     from performance.compile import compile_
     from performance.generate import generate
     from performance.plot import plot
     from performance.run import run
+    from performance.threads import threads
 
     group = click.Group()
+    group.add_command(bench)
     group.add_command(clean)
     group.add_command(collect)
     group.add_command(compile_)
     group.add_command(generate)
     group.add_command(plot)
     group.add_command(run)
+    group.add_command(threads)
     group()
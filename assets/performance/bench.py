@@ -0,0 +1,293 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import pathlib
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+import click
+
+from sqliteimport.accessor import SCHEMA_VERSION
+from sqliteimport.accessor import Accessor
+from sqliteimport.accessor import compress
+from sqliteimport.accessor import decompress
+from sqliteimport.compat import marshal
+from sqliteimport.util import get_magic_number
+
+from . import REPO_ROOT
+from . import STATS
+
+BENCH_DIRECTORY = STATS / "bench"
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+
+# Each synthetic package contains this many modules.
+# A dist-info METADATA file and a resource file are added to every package.
+MODULES_PER_PACKAGE = 50
+
+SOURCE = b"\n".join(b"x%d = %d" % (i, i) for i in range(50)) + b"\n"
+
+
+@click.command(name="bench")
+@click.option(
+    "--rows",
+    "row_counts",
+    type=int,
+    multiple=True,
+    default=DEFAULT_ROWS,
+    show_default=True,
+    help="The number of rows in a synthetic database. May be given multiple times.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=2),
+    default=1_000,
+    show_default=True,
+    help="The number of times each operation is timed.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    help="If given, the JSON results will be written to the given location.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="A JSON results file, written by a previous run, to compare against.",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.10,
+    show_default=True,
+    help=(
+        "The maximum allowed median slowdown, relative to the `--baseline`."
+        " 0.10 means that a 10% slowdown is tolerated."
+    ),
+)
+def bench(
+    row_counts: tuple[int, ...],
+    repeat: int,
+    output: pathlib.Path | None,
+    baseline: pathlib.Path | None,
+    threshold: float,
+) -> None:
+    """
+    Benchmark Accessor and finder hot paths against synthetic databases.
+
+    Databases are generated once and are reused by subsequent runs.
+    Run `clean` to remove them.
+    """
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for row_count in sorted(set(row_counts)):
+        database = get_synthetic_database(row_count)
+        click.echo(f"Benchmarking {database.name}")
+        with sqlite3.connect(database) as connection:
+            results[str(row_count)] = run_benchmarks(connection, row_count, repeat)
+
+    report = {
+        "environment": get_environment(),
+        "repeat": repeat,
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(rendered)
+    else:
+        click.echo(rendered)
+
+    if baseline:
+        regressions = compare(json.loads(baseline.read_text()), report, threshold)
+        for regression in regressions:
+            click.echo(regression, err=True)
+        if regressions:
+            raise SystemExit(1)
+
+
+def get_synthetic_database(row_count: int) -> pathlib.Path:
+    """Get a path to a synthetic database with approximately *row_count* rows.
+
+    The source code and bytecode tables both contain *row_count* modules.
+    """
+
+    path = BENCH_DIRECTORY / f"synthetic-{row_count}-v{SCHEMA_VERSION}.sqlite3"
+    if path.is_file():
+        return path
+
+    click.echo(f"Generating {path.name}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_suffix(".partial")
+    partial_path.unlink(missing_ok=True)
+    with sqlite3.connect(partial_path) as connection:
+        accessor = Accessor(connection)
+        accessor.initialize_database()
+        magic_number = get_magic_number()
+        accessor.create_bytecode_table(magic_number)
+
+        # Every row shares the same contents; only the lookup structure matters.
+        # Identical contents are stored once, so each row references a blob.
+        def insert_blob(table: str, contents: bytes) -> int | None:
+            return connection.execute(
+                f"INSERT INTO {table} (digest, contents) VALUES (?, ?);",
+                (hashlib.sha256(contents).digest(), compress(contents)),
+            ).lastrowid
+
+        source = insert_blob("blobs", SOURCE)
+        bytecode = insert_blob(
+            "blobs", marshal.dumps(compile(SOURCE, "<bench>", "exec"), allow_code=True)
+        )
+        resource = insert_blob("resources", SOURCE)
+        metadata = insert_blob(
+            "resources", b"Metadata-Version: 2.1\nName: bench\nVersion: 1.0\n"
+        )
+        Row = tuple[str, str, bool, int | None, int | None]
+        rows: list[Row] = []
+        bytecode_rows: list[tuple[str, str, bool, int | None]] = []
+        for fullname, path_, is_package in iter_synthetic_modules(row_count):
+            rows.append((fullname, path_, is_package, source, None))
+            bytecode_rows.append((fullname, path_, is_package, bytecode))
+            if is_package:
+                rows.append(("", f"{fullname}/resource.txt", False, None, resource))
+                rows.append(
+                    ("", f"{fullname}-1.0.dist-info/METADATA", False, None, metadata)
+                )
+        connection.executemany(
+            """
+            INSERT INTO code_files (fullname, path, is_package, blob_id, resource_id)
+            VALUES (?, ?, ?, ?, ?);
+            """,
+            rows,
+        )
+        connection.executemany(
+            f"""
+            INSERT INTO {accessor.get_bytecode_table_name(magic_number)}_files
+                (fullname, path, is_package, blob_id)
+            VALUES (?, ?, ?, ?);
+            """,
+            bytecode_rows,
+        )
+        accessor.mark_magic_number(magic_number)
+        connection.commit()
+    connection.close()
+    partial_path.rename(path)
+
+    return path
+
+
+def iter_synthetic_modules(row_count: int) -> typing.Iterator[tuple[str, str, bool]]:
+    """Generate *row_count* fullnames, paths, and package flags."""
+
+    for index in range(row_count):
+        package, module = divmod(index, MODULES_PER_PACKAGE)
+        if module == 0:
+            yield f"pkg{package}", f"pkg{package}/__init__.py", True
+        else:
+            yield f"pkg{package}.mod{module}", f"pkg{package}/mod{module}.py", False
+
+
+def run_benchmarks(
+    connection: sqlite3.Connection, row_count: int, repeat: int
+) -> dict[str, dict[str, float]]:
+    accessor = Accessor(connection)
+    last_package = f"pkg{(row_count - 1) // MODULES_PER_PACKAGE}"
+    last_module = f"{last_package}.mod1"
+    compressed_source = compress(SOURCE)
+    raw_bytecode = marshal.dumps(compile(SOURCE, "<bench>", "exec"), allow_code=True)
+
+    operations: dict[str, typing.Callable[[], object]] = {
+        "find_spec_hit": lambda: accessor.find_spec(last_module),
+        "find_spec_miss": lambda: accessor.find_spec("missing.module"),
+        "get_file_path": lambda: accessor.get_file(path=f"{last_package}/resource.txt"),
+        "get_file_fullname": lambda: accessor.get_file(fullname=last_module),
+        "list_directory": lambda: accessor.list_directory(last_package),
+        "find_distributions_one": lambda: list(
+            accessor.find_distributions(last_package)
+        ),
+        "decompress": lambda: decompress(compressed_source),
+        "marshal_loads": lambda: marshal.loads(raw_bytecode, allow_code=True),
+    }
+    # Scanning every distribution is linear in the number of packages;
+    # it is only timed for smaller databases to keep run times reasonable.
+    if row_count <= 100_000:
+        operations["find_distributions_all"] = lambda: list(
+            accessor.find_distributions(None)
+        )
+
+    return {name: measure(operation, repeat) for name, operation in operations.items()}
+
+
+def measure(operation: typing.Callable[[], object], repeat: int) -> dict[str, float]:
+    """Time *operation* *repeat* times and summarize the samples in nanoseconds."""
+
+    # Warm up the sqlite page cache and any lazily-initialized state.
+    operation()
+
+    samples: list[int] = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        operation()
+        samples.append(time.perf_counter_ns() - start)
+
+    percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "min_ns": min(samples),
+        "mean_ns": statistics.fmean(samples),
+        "p50_ns": statistics.median(samples),
+        "p90_ns": percentiles[89],
+        "p99_ns": percentiles[98],
+        "max_ns": max(samples),
+    }
+
+
+def get_environment() -> dict[str, str]:
+    """Describe the environment so that results can be compared across commits."""
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+
+    return {
+        "commit": commit,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "python": sys.version,
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def compare(
+    baseline: dict[str, typing.Any], current: dict[str, typing.Any], threshold: float
+) -> list[str]:
+    """Compare median timings and describe every regression beyond *threshold*."""
+
+    regressions: list[str] = []
+    for row_count, operations in current["results"].items():
+        for name, summary in operations.items():
+            try:
+                previous = baseline["results"][row_count][name]["p50_ns"]
+            except KeyError:
+                continue
+            change = summary["p50_ns"] / previous - 1
+            if change > threshold:
+                regressions.append(
+                    f"{name} ({row_count} rows): median is {change:.1%} slower"
+                    f" ({previous:.0f}ns -> {summary['p50_ns']:.0f}ns)"
+                )
+
+    return regressions
@@ -4,7 +4,9 @@
 
 import itertools
 import json
+import math
 import pathlib
+import statistics
 import typing
 
 import click
@@ -15,47 +17,287 @@ from . import STATS
 from . import CodeType
 from . import Importer
 from . import Measurement
+from . import tree
 
 
 @click.command()
-def collect() -> None:
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help=(
+        "A `stats.json` file from a previous collection to compare against."
+        " The comparison is shown and is included in the new `stats.json` file."
+    ),
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help=(
+        "Show this many modules whose self import time under sqliteimport"
+        " exceeds the fastest other importer by the largest margin."
+    ),
+)
+def collect(baseline: pathlib.Path | None, top: int) -> None:
     """
     Collect import and sizing stats and write them to a JSON file.
+
+    The full tree of imports is also exported for each importer and code type,
+    both as "folded stacks" files (which flamegraph tools can render)
+    and as a single speedscope file (which can be opened at speedscope.app).
     """
 
-    stats = {
+    trees = parse_import_trees()
+    stats: dict[str, typing.Any] = {
         Measurement.time: parse_import_log(),
         Measurement.size: get_size_stats(),
+        **parse_resource_usage(),
+        "tree": trees,
+        "module_diff": {
+            code_type: tree.diff_modules(trees[code_type]) for code_type in CodeType
+        },
     }
+    export_trees(trees)
+    for code_type in CodeType:
+        show_module_regressions(code_type, stats["module_diff"][code_type], top)
+    if baseline:
+        stats["comparison"] = compare(json.loads(baseline.read_text()), stats)
+        for code_type, importers in stats["comparison"].items():
+            for importer, comparison in importers.items():
+                change = comparison["change"]
+                click.echo(
+                    f"{importer} / {code_type}: "
+                    f"{comparison['baseline_median_us']}µs -> "
+                    f"{comparison['median_us']}µs "
+                    f"({'n/a' if change is None else f'{change:+.1%}'}"
+                    f"{', significant' if comparison['significant'] else ''})"
+                )
+
     output_path = STATS / "stats.json"
     output_path.parent.mkdir(exist_ok=True)
     output_path.write_text(json.dumps(stats, indent=2, sort_keys=True))
 
 
-def parse_import_log() -> dict[str, dict[str, dict[str, int]]]:
-    """Parse an import log to extract per-module cumulative import times (in µs)."""
+def parse_import_log() -> dict[str, dict[str, dict[str, typing.Any]]]:
+    """Parse import logs to extract per-module cumulative import times (in µs).
+
+    Every run's log is treated as one sample.
+    The total cumulative import time of the top-level modules in each sample
+    is summarized by its median, 95th percentile, and a confidence interval.
+    """
 
-    stats: dict[str, dict[str, dict[str, int]]] = {}
+    stats: dict[str, dict[str, dict[str, typing.Any]]] = {}
     for importer, code_type in itertools.product(Importer, CodeType):
-        stats.setdefault(code_type, {})[importer] = {"-cumulative_us": 0}
-        file = LOG_PATHS[importer][code_type]
-        if not file.is_file():
-            click.echo(f"{file} not found")
+        samples: list[int] = []
+        modules: dict[str, list[int]] = {}
+        stats.setdefault(code_type, {})[importer] = {
+            "-cumulative_us": summarize(samples),
+            "modules": modules,
+        }
+        directory = LOG_PATHS[importer][code_type]
+        files = sorted(directory.glob("*.log"))
+        if not files:
+            click.echo(f"{directory} contains no logs")
             continue
 
-        content = file.read_text()
+        for file in files:
+            sample = 0
+            for _, cumulative_us, module in split_columns(file.read_text()):
+                if module.startswith(" "):
+                    # The module is an indented submodule.
+                    # Only top-level modules are recorded here.
+                    continue
+                modules.setdefault(module, []).append(cumulative_us)
+                sample += cumulative_us
+            samples.append(sample)
+
+        stats[code_type][importer]["-cumulative_us"] = summarize(samples)
+
+    return stats
+
+
+# System calls are grouped by purpose, because their names vary by platform.
+SYSCALL_GROUPS: dict[str, set[str]] = {
+    "stat_calls": {"stat", "lstat", "fstat", "newfstatat", "statx", "fstatat64"},
+    "open_calls": {"open", "openat", "openat2"},
+    "read_calls": {"read", "pread64", "readv", "preadv"},
+}
+
+
+def parse_resource_usage() -> dict[Measurement, dict[str, dict[str, typing.Any]]]:
+    """Parse resource usage files written alongside each import log.
+
+    Memory stats include the peak RSS, page faults,
+    and the `tracemalloc` peak (if it was recorded).
+    I/O stats include block input operations and,
+    if system calls were traced, the number of stat, open, and read system calls.
+    """
+
+    stats: dict[Measurement, dict[str, dict[str, typing.Any]]] = {
+        Measurement.memory: {},
+        Measurement.io: {},
+    }
+    for importer, code_type in itertools.product(Importer, CodeType):
+        memory: dict[str, list[int]] = {}
+        io: dict[str, list[int]] = {}
+        for file in sorted(LOG_PATHS[importer][code_type].glob("*.json")):
+            usage = json.loads(file.read_text())
+            for key in ("max_rss", "minor_faults", "major_faults", "tracemalloc_peak"):
+                if key in usage:
+                    memory.setdefault(key, []).append(usage[key])
+            if "block_inputs" in usage:
+                io.setdefault("block_inputs", []).append(usage["block_inputs"])
+            if "syscalls" in usage:
+                total = 0
+                for group, names in SYSCALL_GROUPS.items():
+                    count = sum(usage["syscalls"].get(name, 0) for name in names)
+                    io.setdefault(group, []).append(count)
+                    total += count
+                io.setdefault("file_syscalls", []).append(total)
 
-        for _, cumulative_us, module in split_columns(content):
-            if module.startswith(" "):
-                # The module is an indented submodule.
-                # Only top-level modules are recorded here.
-                continue
-            stats[code_type][importer][module] = cumulative_us
-            stats[code_type][importer]["-cumulative_us"] += cumulative_us
+        stats[Measurement.memory].setdefault(code_type, {})[importer] = {
+            key: summarize(samples) for key, samples in memory.items()
+        }
+        stats[Measurement.io].setdefault(code_type, {})[importer] = {
+            key: summarize(samples) for key, samples in io.items()
+        }
 
     return stats
 
 
+def summarize(samples: list[int]) -> dict[str, typing.Any]:
+    """Summarize samples with a median, 95th percentile, and confidence interval.
+
+    The 95% confidence interval of the median is distribution-free;
+    it is bounded by order statistics chosen using a normal approximation
+    of the binomial distribution.
+    """
+
+    if not samples:
+        return {"samples": [], "median": 0, "p95": 0, "ci_low": 0, "ci_high": 0}
+
+    ordered = sorted(samples)
+    count = len(ordered)
+    p95 = ordered[-1]
+    if count > 1:
+        p95 = statistics.quantiles(ordered, n=20, method="inclusive")[18]
+    margin = 1.96 * math.sqrt(count) / 2
+    low_index = max(0, math.floor(count / 2 - margin) - 1)
+    high_index = min(count - 1, math.ceil(count / 2 + margin))
+
+    return {
+        "samples": samples,
+        "median": statistics.median(ordered),
+        "p95": p95,
+        "ci_low": ordered[low_index],
+        "ci_high": ordered[high_index],
+    }
+
+
+def compare(
+    baseline: dict[str, typing.Any], current: dict[str, typing.Any]
+) -> dict[str, dict[str, dict[str, typing.Any]]]:
+    """Compare the median cumulative import times against a baseline.
+
+    A change is considered significant if the confidence intervals do not overlap.
+    The relative change is None if the baseline median is zero.
+    """
+
+    comparison: dict[str, dict[str, dict[str, typing.Any]]] = {}
+    for importer, code_type in itertools.product(Importer, CodeType):
+        try:
+            old = baseline[Measurement.time][code_type][importer]["-cumulative_us"]
+            new = current[Measurement.time][code_type][importer]["-cumulative_us"]
+        except KeyError:
+            continue
+        # Baselines collected before repeated runs were supported only have one value.
+        if isinstance(old, int):
+            old = summarize([old])
+        if not (old["samples"] and new["samples"]):
+            continue
+
+        change = new["median"] / old["median"] - 1 if old["median"] else None
+        comparison.setdefault(code_type, {})[importer] = {
+            "baseline_median_us": old["median"],
+            "median_us": new["median"],
+            "change": change,
+            "significant": (
+                new["ci_low"] > old["ci_high"] or new["ci_high"] < old["ci_low"]
+            ),
+        }
+
+    return comparison
+
+
+def parse_import_trees() -> dict[str, dict[str, list[tree.Node]]]:
+    """Parse import logs into trees of imports, including all nested imports.
+
+    The trees of every run are merged using the median timings of each module.
+    """
+
+    trees: dict[str, dict[str, list[tree.Node]]] = {}
+    for importer, code_type in itertools.product(Importer, CodeType):
+        files = sorted(LOG_PATHS[importer][code_type].glob("*.log"))
+        samples = [tree.parse_tree(split_columns(file.read_text())) for file in files]
+        trees.setdefault(code_type, {})[importer] = tree.merge_trees(samples)
+
+    return trees
+
+
+def export_trees(trees: dict[str, dict[str, list[tree.Node]]]) -> None:
+    """Export the trees of imports in flamegraph and speedscope formats."""
+
+    STATS.mkdir(parents=True, exist_ok=True)
+    frames: list[str] = []
+    profiles: list[tree.Node] = []
+    for importer, code_type in itertools.product(Importer, CodeType):
+        imports = trees[code_type][importer]
+        if not imports:
+            continue
+        folded_path = STATS / f"{importer}.{code_type}.folded"
+        folded_path.write_text("\n".join(tree.iter_folded_stacks(imports)) + "\n")
+        name = f"{importer} / {code_type}"
+        profiles.append(tree.to_speedscope_profile(imports, name, frames))
+
+    speedscope = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "sqliteimport performance testing",
+        "name": "Import times",
+        "shared": {"frames": [{"name": frame} for frame in frames]},
+        "profiles": profiles,
+    }
+    (STATS / "imports.speedscope.json").write_text(json.dumps(speedscope))
+
+
+def show_module_regressions(
+    code_type: CodeType, modules: dict[str, dict[str, tree.Node]], top: int
+) -> None:
+    """Show the modules that regressed the most under sqliteimport."""
+
+    regressions: list[tuple[float, str, str]] = []
+    for module, importers in modules.items():
+        if Importer.sqliteimport not in importers:
+            continue
+        others = [
+            (timing["self_us"], importer)
+            for importer, timing in importers.items()
+            if importer != Importer.sqliteimport
+        ]
+        if not others:
+            continue
+        fastest_us, fastest_importer = min(others)
+        difference = importers[Importer.sqliteimport]["self_us"] - fastest_us
+        if difference > 0:
+            regressions.append((difference, module, fastest_importer))
+
+    if not (top and regressions):
+        return
+    click.echo(f"Largest sqliteimport self time regressions ({code_type}):")
+    for difference, module, importer in sorted(regressions, reverse=True)[:top]:
+        click.echo(f"    {module}: +{difference:.0f}µs compared to {importer}")
+
+
 def split_columns(text: str) -> typing.Iterator[tuple[int, int, str]]:
     for line in text.splitlines():
         prefix, _, remainder = line.partition(": ")
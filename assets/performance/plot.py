@@ -45,6 +45,10 @@ def plot(
         config = get_time_stats(code_type)
     elif measurement == Measurement.size:
         config = get_size_stats(code_type)
+    elif measurement == Measurement.memory:
+        config = get_memory_stats(code_type)
+    elif measurement == Measurement.io:
+        config = get_io_stats(code_type)
     else:
         typing.assert_never(measurement)
     generate_plot(config)
@@ -61,13 +65,15 @@ class Config:
     values: list[float]
     y_label: str
     title: str
+    # The distances below and above each value, used to draw error bars.
+    errors: tuple[list[float], list[float]] | None = None
 
 
 def generate_plot(config: Config) -> None:
     bar_colors = ["tab:red", "tab:blue", "tab:orange"]
 
     fig, ax = plt.subplots()
-    ax.bar(config.names, config.values, color=bar_colors)
+    ax.bar(config.names, config.values, color=bar_colors, yerr=config.errors, capsize=6)
     ax.set_ylabel(config.y_label)
     ax.set_title(config.title)
 
@@ -77,13 +83,11 @@ def get_time_stats(code_type: CodeType):
     data = json.loads(stats_file.read_text())
 
     code_type_phrase = "source code" if code_type == CodeType.source else "bytecode"
-    return Config(
-        names=[str(importer) for importer in Importer],
-        values=[
-            data[Measurement.time][code_type][importer]["-cumulative_us"] / 1_000  # ms
-            for importer in Importer
-        ],
-        y_label="Milliseconds",
+    return get_summary_config(
+        [data[Measurement.time][code_type][importer] for importer in Importer],
+        key="-cumulative_us",
+        scale=1_000,  # Convert microseconds to milliseconds.
+        y_label="Milliseconds (median, with 95% confidence interval)",
         title=f"{platform.system()} {code_type_phrase} import times",
     )
 
@@ -101,3 +105,59 @@ def get_size_stats(code_type: CodeType):
         y_label="Megabytes",
         title=f"{platform.system()} total {code_type_phrase} sizes",
     )
+
+
+def get_memory_stats(code_type: CodeType):
+    stats_file = STATS / "stats.json"
+    data = json.loads(stats_file.read_text())
+
+    code_type_phrase = "source code" if code_type == CodeType.source else "bytecode"
+    return get_summary_config(
+        [data[Measurement.memory][code_type][importer] for importer in Importer],
+        key="max_rss",
+        scale=1_024 * 1_024,
+        y_label="Megabytes (median peak RSS, with 95% confidence interval)",
+        title=f"{platform.system()} {code_type_phrase} peak memory usage",
+    )
+
+
+def get_io_stats(code_type: CodeType):
+    stats_file = STATS / "stats.json"
+    data = json.loads(stats_file.read_text())
+
+    code_type_phrase = "source code" if code_type == CodeType.source else "bytecode"
+    return get_summary_config(
+        [data[Measurement.io][code_type][importer] for importer in Importer],
+        key="file_syscalls",
+        scale=1,
+        y_label="stat, open, and read system calls (median)",
+        title=f"{platform.system()} {code_type_phrase} file system calls",
+    )
+
+
+def get_summary_config(
+    summaries: list[dict[str, typing.Any]],
+    *,
+    key: str,
+    scale: float,
+    y_label: str,
+    title: str,
+) -> Config:
+    """Create a plot configuration for a summarized measurement.
+
+    Importers that have no recorded samples are plotted as zero.
+    """
+
+    empty = {"median": 0, "ci_low": 0, "ci_high": 0}
+    values = [summary.get(key, empty) for summary in summaries]
+    medians = [value["median"] / scale for value in values]
+    return Config(
+        names=[str(importer) for importer in Importer],
+        values=medians,
+        y_label=y_label,
+        title=title,
+        errors=(
+            [m - v["ci_low"] / scale for m, v in zip(medians, values)],
+            [v["ci_high"] / scale - m for m, v in zip(medians, values)],
+        ),
+    )
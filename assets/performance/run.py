@@ -2,9 +2,14 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+import json
 import os
 import pathlib
+import shutil
 import subprocess
+import sys
+import tempfile
+import typing
 
 import click
 
@@ -28,22 +33,75 @@ from . import Importer
     required=True,
     help=f"The code type to use. Valid code types are: {', '.join(CodeType)}.",
 )
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of times to run PYTHON_FILE and record an import log.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help=(
+        "The number of times to run PYTHON_FILE before recording import logs."
+        " This can help to warm the operating system's file cache."
+    ),
+)
+@click.option(
+    "--tracemalloc",
+    "trace_memory",
+    is_flag=True,
+    help=(
+        "Record the peak memory allocated by Python, as reported by `tracemalloc`."
+        " Tracing memory allocations significantly slows imports."
+    ),
+)
+@click.option(
+    "--trace-syscalls",
+    is_flag=True,
+    help=(
+        "Count the system calls made by each run using `strace` (Linux only)."
+        " Tracing system calls significantly slows imports."
+    ),
+)
 @click.argument(
     "target",
     type=pathlib.Path,
     metavar="PYTHON_FILE",
 )
-def run(importer: Importer, code_type: CodeType, target: pathlib.Path) -> None:
+def run(
+    importer: Importer,
+    code_type: CodeType,
+    repeat: int,
+    warmup: int,
+    trace_memory: bool,
+    trace_syscalls: bool,
+    target: pathlib.Path,
+) -> None:
     """
     Run the given PYTHON_FILE, backed by the given importer and code type.
 
+    Each recorded run writes a separate import log and a resource usage file,
+    so `collect` can summarize the variation between runs.
+    Resource usage (like peak RSS and page faults) is only recorded on POSIX systems.
+
     NOTE: If the filesystem importer is used and bytecode has already been compiled,
     there is no technical way to force source-only importing.
     Therefore, it is up to the caller to ensure that bytecode is unavailable
     when attempting to test the filesystem importer with source code only.
     """
 
+    log_directory = LOG_PATHS[importer][code_type]
+    if log_directory.is_dir():
+        shutil.rmtree(log_directory)
+    log_directory.mkdir(parents=True)
+
     command = ["python", "-vv", str(target)]
+    if trace_memory:
+        command = ["python", "-vv", "-c", TRACEMALLOC_WRAPPER, str(target)]
     python_paths = [str(PACKAGE_PATHS[importer][code_type])]
     # Specifically for sqliteimport, add the `site_customizer` to the Python path.
     # This allows sqliteimport to be loaded automatically and transparently
@@ -57,10 +115,102 @@ def run(importer: Importer, code_type: CodeType, target: pathlib.Path) -> None:
         "PYTHONPROFILEIMPORTTIME": "1",
         "PYTHONPATH": os.pathsep.join(python_paths),
     }
-    process = subprocess.run(command, env=environment, capture_output=True)
-    if process.returncode:
-        print(process.returncode)
-    if process.stdout:
-        print(process.stdout.decode("utf-8", errors="replace"))
+    if trace_memory:
+        environment["PYTHONTRACEMALLOC"] = "1"
+
+    for index in range(-warmup, repeat):
+        # Discard the output of warmup runs.
+        log_path = log_directory / (f"{index:04}.log" if index >= 0 else "warmup.log")
+        strace_path = log_path.with_suffix(".strace")
+        tracemalloc_path = log_path.with_suffix(".tracemalloc")
+        run_command = command
+        if trace_memory:
+            run_command = [*command, str(tracemalloc_path)]
+        if trace_syscalls:
+            run_command = ["strace", "-f", "-c", "-o", str(strace_path), *run_command]
+
+        with log_path.open("wb") as stderr, tempfile.TemporaryFile() as stdout:
+            process = subprocess.Popen(
+                run_command, env=environment, stdout=stdout, stderr=stderr
+            )
+            usage = wait(process)
+            stdout.seek(0)
+            output = stdout.read()
+
+        if process.returncode:
+            print(process.returncode)
+        if index < 0:
+            for path in (log_path, strace_path, tracemalloc_path):
+                path.unlink(missing_ok=True)
+            continue
+        if output and index == repeat - 1:
+            print(output.decode("utf-8", errors="replace"))
+
+        if trace_syscalls:
+            usage["syscalls"] = parse_strace_summary(strace_path.read_text())
+            strace_path.unlink()
+        if trace_memory:
+            usage["tracemalloc_peak"] = int(tracemalloc_path.read_text())
+            tracemalloc_path.unlink()
+        log_path.with_suffix(".json").write_text(json.dumps(usage, indent=2))
+
+
+# Run the target file and write the peak traced memory to a file afterward.
+TRACEMALLOC_WRAPPER = """
+import runpy, sys, tracemalloc
+target, output = sys.argv[1:]
+sys.argv = [target]
+try:
+    runpy.run_path(target, run_name="__main__")
+finally:
+    with open(output, "w") as file:
+        file.write(str(tracemalloc.get_traced_memory()[1]))
+"""
+
+
+def wait(process: subprocess.Popen[bytes]) -> dict[str, typing.Any]:
+    """Wait for *process* to exit and return its resource usage, if available."""
+
+    if not hasattr(os, "wait4"):
+        # Windows does not support `os.wait4()`.
+        process.wait()
+        return {}
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # `ru_maxrss` is measured in bytes on macOS, but in kilobytes on Linux.
+    rss_scale = 1 if sys.platform == "darwin" else 1_024
+    return {
+        "max_rss": rusage.ru_maxrss * rss_scale,
+        "minor_faults": rusage.ru_minflt,
+        "major_faults": rusage.ru_majflt,
+        "block_inputs": rusage.ru_inblock,
+    }
+
+
+def parse_strace_summary(text: str) -> dict[str, int]:
+    """Parse the system call counts in an `strace -c` summary table.
+
+    The table looks like this:
+
+    ..  code-block:: text
+
+        % time     seconds  usecs/call     calls    errors syscall
+        ------ ----------- ----------- --------- --------- ----------------
+         30.00    0.000030           1        20           read
+         25.00    0.000025           2        12         3 openat
+    """
+
+    calls: dict[str, int] = {}
+    for line in text.splitlines():
+        columns = line.split()
+        if len(columns) not in {5, 6} or columns[-1] == "total":
+            continue
+        try:
+            float(columns[0])
+            calls[columns[-1]] = int(columns[3])
+        except ValueError:
+            continue
 
-    LOG_PATHS[importer][code_type].write_bytes(process.stderr)
+    return calls
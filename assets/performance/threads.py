@@ -0,0 +1,140 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib
+import json
+import pathlib
+import statistics
+import sys
+import sysconfig
+import threading
+import time
+
+import click
+
+from sqliteimport.importer import SqliteFinder
+
+from .bench import MODULES_PER_PACKAGE
+from .bench import get_environment
+from .bench import get_synthetic_database
+
+DEFAULT_THREADS = (1, 2, 4, 8, 16)
+
+
+@click.command(name="threads")
+@click.option(
+    "--threads",
+    "thread_counts",
+    type=click.IntRange(min=1),
+    multiple=True,
+    default=DEFAULT_THREADS,
+    show_default=True,
+    help="The number of importing threads. May be given multiple times.",
+)
+@click.option(
+    "--packages",
+    type=click.IntRange(min=1),
+    default=64,
+    show_default=True,
+    help="The number of packages that are imported in each run.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="The number of times each thread count is timed.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    help="If given, the JSON results will be written to the given location.",
+)
+def threads(
+    thread_counts: tuple[int, ...],
+    packages: int,
+    repeat: int,
+    output: pathlib.Path | None,
+) -> None:
+    """
+    Measure import throughput as the number of importing threads increases.
+
+    Each thread imports a disjoint set of packages from one synthetic database.
+    Throughput only scales with the number of threads on free-threaded builds.
+    """
+
+    database = get_synthetic_database(packages * MODULES_PER_PACKAGE)
+    results: dict[str, dict[str, float]] = {}
+    baseline: float | None = None
+    for thread_count in sorted(set(thread_counts)):
+        samples = [run(database, packages, thread_count) for _ in range(repeat)]
+        modules_per_second = packages * MODULES_PER_PACKAGE / statistics.median(samples)
+        baseline = baseline or modules_per_second
+        results[str(thread_count)] = {
+            "modules_per_second": modules_per_second,
+            "speedup": modules_per_second / baseline,
+        }
+        click.echo(
+            f"{thread_count:>3} threads: {modules_per_second:>10,.0f} modules/s"
+            f" ({modules_per_second / baseline:.2f}x)"
+        )
+
+    report = {
+        "environment": get_environment(),
+        "free_threading": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "packages": packages,
+        "repeat": repeat,
+        "results": results,
+    }
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+def run(database: pathlib.Path, packages: int, thread_count: int) -> float:
+    """Import every module in *packages* packages using *thread_count* threads.
+
+    The number of seconds that it took to import every module is returned.
+    """
+
+    finder = SqliteFinder(database)
+    sys.meta_path.insert(0, finder)
+    barrier = threading.Barrier(thread_count + 1)
+    errors: list[Exception] = []
+
+    def import_packages(number: int) -> None:
+        barrier.wait()
+        try:
+            # Packages are assigned round-robin, so each thread has its own trees.
+            for package in range(number, packages, thread_count):
+                importlib.import_module(f"pkg{package}")
+                for module in range(1, MODULES_PER_PACKAGE):
+                    importlib.import_module(f"pkg{package}.mod{module}")
+        except Exception as error:
+            errors.append(error)
+
+    workers = [
+        threading.Thread(target=import_packages, args=(number,))
+        for number in range(thread_count)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        duration = time.perf_counter() - start
+    finally:
+        sys.meta_path.remove(finder)
+        finder.connection.close()
+        # Synthetic packages are named "pkg0", "pkg1", and so on.
+        for name in list(sys.modules):
+            package = name.partition(".")[0]
+            if package.startswith("pkg") and package[3:].isdigit():
+                del sys.modules[name]
+
+    if errors:
+        raise errors[0]
+    return duration
@@ -0,0 +1,145 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import statistics
+import typing
+
+# A node represents one imported module and the modules it imported, like this:
+#
+#     {"name": "a.b", "self_us": 10, "cumulative_us": 15, "children": [...]}
+#
+Node = dict[str, typing.Any]
+
+
+def parse_tree(rows: typing.Iterable[tuple[int, int, str]]) -> list[Node]:
+    """Build a tree of imports from `PYTHONPROFILEIMPORTTIME` rows.
+
+    Python writes each module after the modules that it imported,
+    and indents nested imports by two spaces per level, like this:
+
+    ..  code-block:: text
+
+        import time:       100 |        100 |     a.b
+        import time:        50 |        150 |   a
+        import time:        10 |        160 | c
+    """
+
+    # Nodes are collected by depth until their parent module is found.
+    pending: dict[int, list[Node]] = {}
+    for self_us, cumulative_us, module in rows:
+        name = module.lstrip(" ")
+        depth = (len(module) - len(name)) // 2
+        node: Node = {
+            "name": name,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+
+    return pending.get(0, [])
+
+
+def merge_trees(trees: list[list[Node]]) -> list[Node]:
+    """Merge the trees of several runs using the median of each node's timings.
+
+    Nodes are matched by their chain of ancestors.
+    Nodes that are missing from some runs are merged using the runs they appear in.
+    """
+
+    samples: dict[tuple[str, ...], tuple[list[int], list[int]]] = {}
+    for tree in trees:
+        for path, node in walk(tree):
+            self_samples, cumulative_samples = samples.setdefault(path, ([], []))
+            self_samples.append(node["self_us"])
+            cumulative_samples.append(node["cumulative_us"])
+
+    roots: list[Node] = []
+    nodes: dict[tuple[str, ...], Node] = {}
+    for path, (self_samples, cumulative_samples) in samples.items():
+        node = {
+            "name": path[-1],
+            "self_us": statistics.median(self_samples),
+            "cumulative_us": statistics.median(cumulative_samples),
+            "children": [],
+        }
+        nodes[path] = node
+        siblings = nodes[path[:-1]]["children"] if len(path) > 1 else roots
+        siblings.append(node)
+
+    return roots
+
+
+def walk(
+    tree: list[Node], parents: tuple[str, ...] = ()
+) -> typing.Iterator[tuple[tuple[str, ...], Node]]:
+    """Yield each node in *tree*, parents first, with its chain of ancestors."""
+
+    for node in tree:
+        path = (*parents, node["name"])
+        yield path, node
+        yield from walk(node["children"], path)
+
+
+def iter_folded_stacks(tree: list[Node]) -> typing.Iterator[str]:
+    """Yield lines in the "folded stacks" format used by flamegraph tools.
+
+    Each line contains a semicolon-separated chain of modules
+    followed by the module's self time in microseconds.
+    """
+
+    for path, node in walk(tree):
+        yield f"{';'.join(path)} {round(node['self_us'])}"
+
+
+def to_speedscope_profile(tree: list[Node], name: str, frames: list[str]) -> Node:
+    """Convert a tree to a speedscope "evented" profile.
+
+    Each module's imports are laid out one after another, starting with the module.
+    *frames* is a list of module names that is shared by all profiles in a file;
+    new module names are appended to it.
+    """
+
+    frame_indexes = {frame: index for index, frame in enumerate(frames)}
+    events: list[Node] = []
+
+    def add_events(nodes: list[Node], start: float) -> float:
+        for node in nodes:
+            if node["name"] not in frame_indexes:
+                frame_indexes[node["name"]] = len(frames)
+                frames.append(node["name"])
+            frame = frame_indexes[node["name"]]
+            events.append({"type": "O", "frame": frame, "at": start})
+            children_end = add_events(node["children"], start)
+            # Median timings may not add up exactly, but frames must nest properly.
+            start = max(start + node["cumulative_us"], children_end)
+            events.append({"type": "C", "frame": frame, "at": start})
+        return start
+
+    end = add_events(tree, 0)
+    return {
+        "type": "evented",
+        "name": name,
+        "unit": "microseconds",
+        "startValue": 0,
+        "endValue": end,
+        "events": events,
+    }
+
+
+def diff_modules(trees: dict[str, list[Node]]) -> dict[str, dict[str, Node]]:
+    """Tabulate each module's self and cumulative import times by importer.
+
+    Modules that an importer did not import are omitted for that importer.
+    """
+
+    modules: dict[str, dict[str, Node]] = {}
+    for importer, tree in trees.items():
+        for _, node in walk(tree):
+            modules.setdefault(node["name"], {})[importer] = {
+                "self_us": node["self_us"],
+                "cumulative_us": node["cumulative_us"],
+            }
+
+    return modules
@@ -12,7 +12,7 @@ python assets/performance generate -r custom-requirements.txt
 
 Write-Host
 Write-Host "filesystem / source"
-python assets/performance run --importer filesystem --code-type source importsy.py
+python assets/performance run --importer filesystem --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 # Zip -- source only
@@ -23,7 +23,7 @@ Write-Host "zipimport / source"
 $env:FILE_PREFIX="build\perfstats"
 $env:OUTPUT_PATH="${env:FILE_PREFIX}\source.zip"
 Compress-Archive -CompressionLevel Optimal -Path "build\perftest\*" -DestinationPath "${env:OUTPUT_PATH}"
-python assets/performance run --importer zipimport --code-type source importsy.py
+python assets/performance run --importer zipimport --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 
@@ -35,7 +35,7 @@ Write-Host "sqliteimport / source"
 $env:FILE_PREFIX="build\perfstats"
 $env:OUTPUT_PATH="${env:FILE_PREFIX}\source.sqlite3"
 sqliteimport bundle "build\perftest" "${env:OUTPUT_PATH}" | Out-Null
-python assets/performance run --importer sqliteimport --code-type source importsy.py
+python assets/performance run --importer sqliteimport --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 # Compile the source to bytecode
@@ -52,7 +52,7 @@ python assets/performance compile --importer sqliteimport | Out-Null
 
 Write-Host
 Write-Host "filesystem / bytecode"
-python assets/performance run --importer filesystem --code-type bytecode importsy.py
+python assets/performance run --importer filesystem --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Zip -- bytecode
@@ -67,7 +67,7 @@ Write-Host "zipimport / bytecode"
 $env:FILE_PREFIX="build\perfstats"
 $env:OUTPUT_PATH="${env:FILE_PREFIX}\bytecode.zip"
 Compress-Archive -CompressionLevel Optimal -Path "build\perftest\*" -DestinationPath "${env:OUTPUT_PATH}"
-python assets/performance run --importer zipimport --code-type bytecode importsy.py
+python assets/performance run --importer zipimport --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Sqlite -- bytecode
@@ -75,7 +75,7 @@ python assets/performance run --importer zipimport --code-type bytecode importsy
 
 Write-Host
 Write-Host "sqliteimport / bytecode"
-python assets/performance run --importer sqliteimport --code-type bytecode importsy.py
+python assets/performance run --importer sqliteimport --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Capture the file sizes
@@ -16,7 +16,7 @@ python assets/performance generate -r custom-requirements.txt
 
 echo
 echo filesystem / source
-python assets/performance run --importer filesystem --code-type source importsy.py
+python assets/performance run --importer filesystem --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 # Zip -- source only
@@ -29,7 +29,7 @@ export PYTHONPATH="${FILE_PREFIX}/source.zip"
 cd "build/perftest"
 zip -qr9 "../../${PYTHONPATH}" .
 cd "../.."
-python assets/performance run --importer zipimport --code-type source importsy.py
+python assets/performance run --importer zipimport --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 # Sqlite -- source only
@@ -40,7 +40,7 @@ export FILE_PREFIX="build/perfstats"
 echo "sqliteimport / source"
 export PYTHONPATH="${FILE_PREFIX}/source.sqlite3"
 sqliteimport bundle "build/perftest" "${PYTHONPATH}" 1>/dev/null
-python assets/performance run --importer sqliteimport --code-type source importsy.py
+python assets/performance run --importer sqliteimport --code-type source --warmup 2 --repeat 10 importsy.py
 
 
 # Compile the source to bytecode
@@ -57,7 +57,7 @@ python assets/performance compile --importer sqliteimport 1>/dev/null
 
 echo
 echo "filesystem / bytecode"
-python assets/performance run --importer filesystem --code-type bytecode importsy.py
+python assets/performance run --importer filesystem --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Zip -- bytecode
@@ -70,7 +70,7 @@ export PYTHONPATH="${FILE_PREFIX}/bytecode.zip"
 cd "build/perftest"
 zip -qr9 "../../${PYTHONPATH}" . --exclude '*/__pycache__/*'
 cd "../.."
-python assets/performance run --importer zipimport --code-type bytecode importsy.py
+python assets/performance run --importer zipimport --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Sqlite -- bytecode
@@ -78,7 +78,7 @@ python assets/performance run --importer zipimport --code-type bytecode importsy
 
 echo
 echo "sqliteimport / bytecode"
-python assets/performance run --importer sqliteimport --code-type bytecode importsy.py
+python assets/performance run --importer sqliteimport --code-type bytecode --warmup 2 --repeat 10 importsy.py
 
 
 # Collect stats
@@ -89,3 +89,5 @@ python assets/performance plot --code-type source   --measurement time --output
 python assets/performance plot --code-type bytecode --measurement time --output build/perfstats/linux-bytecode-time.png
 python assets/performance plot --code-type source   --measurement size --output build/perfstats/linux-source-size.png
 python assets/performance plot --code-type bytecode --measurement size --output build/perfstats/linux-bytecode-size.png
+python assets/performance plot --code-type source   --measurement memory --output build/perfstats/linux-source-memory.png
+python assets/performance plot --code-type bytecode --measurement memory --output build/perfstats/linux-bytecode-memory.png
@@ -2,17 +2,27 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
-import sys
-
+from .importer import install_path_hook
 from .importer import load
+from .importer import load_environment
+from .importer import register_loader
+from .instrumentation import disable_stats
+from .instrumentation import enable_stats
+from .instrumentation import get_stats
+from .instrumentation import reset_stats
 
-__all__ = ("load",)
+__all__ = (
+    "disable_stats",
+    "enable_stats",
+    "get_stats",
+    "load",
+    "reset_stats",
+)
 
 
-# Load `.sqlite3` files on the Python path.
-for path in sys.path:
-    if path.endswith(".sqlite3"):
-        try:
-            load(path)
-        except FileNotFoundError:
-            pass
+# Loaders are registered with `importlib.abc` if it is already imported.
+register_loader()
+# `.sqlite3` files on the Python path are searched in order, like directories.
+install_path_hook()
+# Databases can also be loaded without adding them to the Python path.
+load_environment()
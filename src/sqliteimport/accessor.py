@@ -4,45 +4,109 @@
 
 from __future__ import annotations
 
-import pathlib
+import io
+import os
 import sqlite3
+import sys
+import threading
+import time
 import types
-import typing
 
+from . import instrumentation
 from .compat import compression
+from .compat import get_lzma
 from .compat import marshal
+from .errors import AttachLimitError
 from .errors import FileNotFoundInDatabaseError
 from .util import get_magic_number
+from .util import get_module_name
 from .util import get_python_identifier
+from .util import is_extension_module
+from .util import is_loadable_extension_module
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import pathlib
+    import typing
+
+# Resources that are larger than this are stored in independently-compressed chunks,
+# so they can be bundled and read without loading the entire file into memory.
+CHUNK_SIZE = 256 * 1024
+
+# The version of the schema of new databases.
+# Version 2 clusters the rows of file tables by module name.
+SCHEMA_VERSION = 2
+
+# The number of decoded source files that each accessor keeps.
+# Tracebacks and debuggers request the source of the same few modules repeatedly.
+SOURCE_CACHE_SIZE = 32
 
 
 class Accessor:
-    def __init__(self, connection: sqlite3.Connection) -> None:
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        schema: str = "main",
+        lock: threading.RLock | None = None,
+    ) -> None:
         self.connection = connection
+        # The schema is the name of the database that queries are run against.
+        # It is "main" unless the database is attached to another connection.
+        self.schema = schema
+        # Connections cannot be used by several threads at once,
+        # so every accessor that shares a connection shares its lock.
+        # The lock is only held while querying, not while decompressing.
+        self.lock = lock if lock is not None else threading.RLock()
+        # The accessor for a sidecar database of stripped source code, once attached.
+        self.source_accessor: Accessor | None = None
+        self.source_accessor_checked = False
+        # The accessor for a database of rarely used files, once attached.
+        self.cold_accessor: Accessor | None = None
+        self.cold_accessor_checked = False
+        # Recently used source code, by module name, in order of use.
+        self.source_cache: dict[str, str] = {}
+        tables = self.get_tables()
+        # Databases store identical contents once if they have a blobs table.
+        self.has_blobs = "blobs" in tables
+        # Resource contents are stored apart from code if there is a resources table.
+        self.has_resources = "resources" in tables
+        self.has_chunks = "resource_chunks" in tables
+        self.schema_version = self.get_schema_version()
         self.find_spec_table = "code"
-        if (
-            "magic_numbers" in self.get_tables()
-            and get_magic_number() in self.get_magic_numbers()
-        ):
+        if "magic_numbers" in tables and get_magic_number() in self.get_magic_numbers():
             self.find_spec_table = self.get_bytecode_table_name(get_magic_number())
 
     def get_tables(self) -> list[str]:
-        """List all the tables in the database."""
+        """List all the tables and views in the database."""
 
-        query = """
+        query = f"""
             SELECT
                 name
-            FROM sqlite_master
-            WHERE type='table'
+            FROM {self.schema}.sqlite_master
+            WHERE type IN ('table', 'view')
             ;
         """
         return [row[0] for row in self.connection.execute(query).fetchall()]
 
+    def get_schema_version(self) -> int:
+        """Get the version of the database schema.
+
+        Databases created before the schema was versioned are version 1.
+        """
+
+        if "sqliteimport" not in self.get_tables():
+            # The database has not been initialized yet.
+            return SCHEMA_VERSION
+        version = self.get_metadata_value("version")
+        if version is None or not version.isdigit():
+            return 1
+        return int(version)
+
     def initialize_database(self) -> None:
         """Create database tables and insert basic information about the database."""
 
         self.connection.executescript(
-            """
+            f"""
             CREATE TABLE sqliteimport (
                 field TEXT,
                 value TEXT
@@ -50,47 +114,235 @@ class Accessor:
 
             INSERT INTO sqliteimport (field, value)
             VALUES
-                ('version', 'beta'),
+                ('version', '{SCHEMA_VERSION}'),
                 ('creation_date', strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
             ;
 
-            CREATE TABLE code (
-                fullname text,
-                path text,
-                is_package boolean,
-                contents text
-            );
-
-            CREATE INDEX fullname_index ON code (fullname);
-
             CREATE TABLE magic_numbers (
                 magic_number INTEGER,
                 python_identifier TEXT
             );
             """
         )
+        self.schema_version = SCHEMA_VERSION
+        self.create_content_tables()
+        self.create_code_table()
+
+    def create_content_tables(self) -> None:
+        """Create the tables that file contents are stored in."""
+
+        self.connection.executescript(
+            """
+            CREATE TABLE blobs (
+                id INTEGER PRIMARY KEY,
+                digest BLOB UNIQUE NOT NULL,
+                contents BLOB NOT NULL
+            );
+
+            -- Non-code files, like data files and package metadata, can be large.
+            -- They are stored in a separate table so that the pages in the blobs table
+            -- only contain the contents of modules.
+            CREATE TABLE resources (
+                id INTEGER PRIMARY KEY,
+                digest BLOB UNIQUE NOT NULL,
+                -- Large resources are stored in chunks, so their contents are NULL.
+                contents BLOB,
+                size INTEGER,
+                chunk_size INTEGER
+            );
+
+            CREATE TABLE resource_chunks (
+                resource_id INTEGER REFERENCES resources (id),
+                chunk INTEGER,
+                contents BLOB NOT NULL,
+                PRIMARY KEY (resource_id, chunk)
+            );
+            """
+        )
+        self.has_blobs = True
+        self.has_resources = True
+        self.has_chunks = True
+
+    def create_code_table(self) -> None:
+        """Create the ``code_files`` table, and the ``code`` view of its contents."""
+
+        self.connection.executescript(
+            """
+            -- Rows are clustered by their primary key,
+            -- so each module lookup is a single B-tree search.
+            CREATE TABLE code_files (
+                fullname TEXT NOT NULL,
+                path TEXT NOT NULL,
+                is_package INTEGER NOT NULL,
+                blob_id INTEGER REFERENCES blobs (id),
+                resource_id INTEGER REFERENCES resources (id),
+                PRIMARY KEY (fullname, path)
+            ) WITHOUT ROWID;
+
+            CREATE VIEW code AS
+            SELECT
+                code_files.fullname,
+                code_files.path,
+                code_files.is_package,
+                coalesce(blobs.contents, resources.contents) AS contents
+            FROM code_files
+            LEFT JOIN blobs ON blobs.id = code_files.blob_id
+            LEFT JOIN resources ON resources.id = code_files.resource_id
+            ;
+            """
+        )
 
     @staticmethod
-    def get_database_path(database: sqlite3.Connection) -> str:
+    def get_database_path(database: sqlite3.Connection, schema: str = "main") -> str:
         """Get the path to the database, as reported by sqlite itself.
 
         sqlite returns an empty string if the database is not associated with a file.
         """
 
         path: str
-        _, _, path = database.execute("PRAGMA database_list;").fetchone()
-        return path
+        for _, name, path in database.execute("PRAGMA database_list;").fetchall():
+            if name == schema:
+                return path
+        return ""
+
+    def attach(self, database: str | os.PathLike[str], schema: str) -> Accessor:
+        """Attach another database to this connection, and return its accessor."""
+
+        with self.lock:
+            self.check_attach_limit(database)
+            self.connection.execute(f"ATTACH DATABASE ? AS {schema};", (str(database),))
+            return Accessor(self.connection, schema, self.lock)
+
+    def check_attach_limit(self, database: str | os.PathLike[str]) -> None:
+        """Raise an error if no more databases can be attached to this connection.
+
+        Layers, merges, rebuilds, and the databases that cold modules
+        and stripped source code were moved to all share the connection's limit,
+        which is 10 databases by default.
+        """
+
+        if sys.version_info < (3, 11):
+            # `getlimit()` was added in Python 3.11; sqlite raises an error instead.
+            return
+        limit = self.connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        (attached,) = self.connection.execute(
+            """
+            SELECT count(*)
+            FROM pragma_database_list
+            WHERE name NOT IN ('main', 'temp')
+            ;
+            """
+        ).fetchone()
+        if attached >= limit:
+            raise AttachLimitError(
+                f"{database} cannot be attached, because {attached} databases"
+                f" are already attached, and sqlite allows {limit}"
+                " (SQLITE_LIMIT_ATTACHED)."
+            )
+
+    def create_module_index(self, layers: typing.Sequence[Accessor]) -> None:
+        """Index which layer each module can be found in.
+
+        If a module is found in several layers, the earliest layer takes precedence.
+
+        The index is stored in an in-memory database that every connection
+        in the process can attach, including connections in subinterpreters.
+        It is named after the layers, so loading the same layers again
+        reuses the index instead of rebuilding it.
+        The connection must have been opened with ``uri=True``.
+        """
+
+        paths = [self.get_database_path(self.connection, a.schema) for a in layers]
+        self.check_attach_limit("The module index")
+        try:
+            self.connection.execute(
+                "ATTACH DATABASE ? AS module_index;",
+                (f"file:/{get_module_index_name(paths)}?vfs=memdb",),
+            )
+        except sqlite3.OperationalError:
+            # sqlite 3.36 and higher can share in-memory databases.
+            self.connection.execute("ATTACH DATABASE ':memory:' AS module_index;")
+        if self.has_module_index():
+            return
+
+        self.connection.execute("BEGIN;")
+        try:
+            self.connection.execute(
+                """
+                CREATE TABLE module_index.module_index (
+                    fullname TEXT PRIMARY KEY,
+                    layer INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+        except sqlite3.OperationalError:
+            # Another connection may have created the index first.
+            self.connection.rollback()
+            if self.has_module_index():
+                return
+            raise
+        for layer, accessor in enumerate(layers):
+            # Source code may have been stripped, leaving only bytecode.
+            for table in {"code", accessor.find_spec_table}:
+                self.connection.execute(
+                    f"""
+                    INSERT OR IGNORE INTO module_index.module_index (fullname, layer)
+                    SELECT DISTINCT
+                        fullname,
+                        ?
+                    FROM {accessor.schema}.{table}
+                    WHERE fullname != ''
+                    ;
+                    """,
+                    (layer,),
+                )
+        self.connection.commit()
+
+    def has_module_index(self) -> bool:
+        """Determine whether the attached module index has been created."""
+
+        row: tuple[int] = self.connection.execute(
+            """
+            SELECT
+                count(*)
+            FROM module_index.sqlite_master
+            WHERE type = 'table' AND name = 'module_index'
+            ;
+            """
+        ).fetchone()
+        return row[0] > 0
+
+    def find_layer(self, fullname: str) -> int | None:
+        """Find which layer a module is in, using the module index."""
+
+        with self.lock:
+            row: tuple[int] | None = self.connection.execute(
+                """
+                SELECT
+                    layer
+                FROM module_index.module_index
+                WHERE fullname = ?
+                ;
+                """,
+                (fullname,),
+            ).fetchone()
+        stats = instrumentation.active
+        if stats:
+            stats.record_lookup("module_index", row is not None)
+        if row is None:
+            return None
+        return row[0]
 
     def get_magic_numbers(self) -> dict[int, str]:
         """Get the magic numbers of the already-compiled bytecodes in the database."""
 
         magic_numbers = self.connection.execute(
-            """
+            f"""
             SELECT
                 magic_number,
                 python_identifier
             FROM
-                magic_numbers
+                {self.schema}.magic_numbers
             ;
             """
         ).fetchall()
@@ -103,17 +355,12 @@ class Accessor:
         is_package = True
         contents = b""
 
-        self.connection.execute(
-            """
-            INSERT INTO code (fullname, path, is_package, contents)
-            VALUES (?, ?, ?, ?);
-            """,
-            (
-                fullname.replace("/", ".").replace("\\", "."),
-                str(pathlib.PurePosixPath(directory)),
-                is_package,
-                compress(contents),
-            ),
+        self.insert_file(
+            "code",
+            fullname.replace("/", ".").replace("\\", "."),
+            directory.as_posix(),
+            is_package,
+            contents,
         )
 
     def add_file(self, directory: pathlib.Path, file: pathlib.Path) -> None:
@@ -121,7 +368,6 @@ class Accessor:
 
         fullname = ""
         is_package = False
-        contents = (directory / file).read_bytes()
 
         if file.name == "__init__.py":
             is_package = True
@@ -130,18 +376,128 @@ class Accessor:
         elif file.suffix == ".py":
             # "x/y/z.py" -> "x/y/z"
             fullname = str(file.with_suffix(""))
+        elif is_extension_module(file.name):
+            # "x/y/z.cpython-313-x86_64-linux-gnu.so" -> "x/y/z"
+            module = file.parent / file.name.partition(".")[0]
+            if all(part.isidentifier() for part in module.parts):
+                fullname = str(module)
+
+        path = file.as_posix()
+        size = (directory / file).stat().st_size
+        if not fullname and self.should_chunk(path, size):
+            self.insert_chunked_resource(
+                path, lambda: (directory / file).open("rb"), size
+            )
+            return
+
+        self.insert_file(
+            "code",
+            fullname.replace("/", ".").replace("\\", "."),
+            path,
+            is_package,
+            (directory / file).read_bytes(),
+        )
+
+    def should_chunk(self, path: str, size: int) -> bool:
+        """Determine whether a resource should be stored in chunks.
+
+        Package metadata is never chunked, because it is always read in full.
+        """
+
+        return self.has_chunks and size > CHUNK_SIZE and ".dist-info/" not in path
+
+    def insert_chunked_resource(
+        self, path: str, open_: typing.Callable[[], typing.BinaryIO], size: int
+    ) -> None:
+        """Insert a large resource, in chunks, into the ``code`` table.
+
+        *open_* is called to open the resource for reading in binary mode.
+        It is called twice: first to hash the contents, and again to store them,
+        so that the resource is never loaded into memory all at once.
+        """
+
+        import hashlib
 
+        digest = hashlib.sha256()
+        with open_() as file:
+            while chunk := file.read(CHUNK_SIZE):
+                digest.update(chunk)
+
+        row = self.connection.execute(
+            "SELECT id FROM resources WHERE digest = ?;", (digest.digest(),)
+        ).fetchone()
+        if row is None:
+            resource_id = self.connection.execute(
+                """
+                INSERT INTO resources (digest, contents, size, chunk_size)
+                VALUES (?, NULL, ?, ?);
+                """,
+                (digest.digest(), size, CHUNK_SIZE),
+            ).lastrowid
+            with open_() as file:
+                index = 0
+                while chunk := file.read(CHUNK_SIZE):
+                    self.connection.execute(
+                        """
+                        INSERT INTO resource_chunks (resource_id, chunk, contents)
+                        VALUES (?, ?, ?);
+                        """,
+                        (resource_id, index, compress(chunk)),
+                    )
+                    index += 1
+        else:
+            resource_id = row[0]
         self.connection.execute(
             """
-            INSERT INTO code (fullname, path, is_package, contents)
+            INSERT INTO code_files (fullname, path, is_package, resource_id)
+            VALUES ('', ?, FALSE, ?);
+            """,
+            (path, resource_id),
+        )
+
+    def insert_file(
+        self, table: str, fullname: str, path: str, is_package: bool, contents: bytes
+    ) -> None:
+        """Insert a row into the ``code`` table or a bytecode table.
+
+        If the database has a blobs table, identical contents are compressed
+        and stored only once, and rows reference the contents by their hash.
+        """
+
+        if not self.has_blobs:
+            self.connection.execute(
+                f"""
+                INSERT INTO {table} (fullname, path, is_package, contents)
+                VALUES (?, ?, ?, ?);
+                """,
+                (fullname, path, is_package, compress_legacy(contents)),
+            )
+            return
+
+        # Files that are not modules are resources, and are stored separately.
+        blob_table, blob_column = "blobs", "blob_id"
+        if self.has_resources and table == "code" and not fullname:
+            blob_table, blob_column = "resources", "resource_id"
+
+        import hashlib
+
+        digest = hashlib.sha256(contents).digest()
+        row = self.connection.execute(
+            f"SELECT id FROM {blob_table} WHERE digest = ?;", (digest,)
+        ).fetchone()
+        if row is None:
+            blob_id = self.connection.execute(
+                f"INSERT INTO {blob_table} (digest, contents) VALUES (?, ?);",
+                (digest, compress(contents)),
+            ).lastrowid
+        else:
+            blob_id = row[0]
+        self.connection.execute(
+            f"""
+            INSERT INTO {table}_files (fullname, path, is_package, {blob_column})
             VALUES (?, ?, ?, ?);
             """,
-            (
-                fullname.replace("/", ".").replace("\\", "."),
-                str(pathlib.PurePosixPath(file)),
-                is_package,
-                compress(contents),
-            ),
+            (fullname, path, is_package, blob_id),
         )
 
     @staticmethod
@@ -154,6 +510,48 @@ class Accessor:
         """Create a compiled bytecode table."""
 
         table_name = self.get_bytecode_table_name(magic_number)
+        if self.schema_version >= 2:
+            files_table = f"""
+                CREATE TABLE {table_name}_files
+                (
+                    fullname TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    is_package INTEGER NOT NULL,
+                    blob_id INTEGER NOT NULL REFERENCES blobs (id),
+                    PRIMARY KEY (fullname, path)
+                ) WITHOUT ROWID;
+            """
+        else:
+            files_table = f"""
+                CREATE TABLE {table_name}_files
+                (
+                    fullname TEXT,
+                    path TEXT,
+                    is_package BOOLEAN,
+                    blob_id INTEGER REFERENCES blobs (id)
+                );
+
+                CREATE INDEX {table_name}_fullname_index
+                    ON {table_name}_files (fullname);
+            """
+        if self.has_blobs:
+            self.connection.executescript(
+                f"""
+                {files_table}
+
+                CREATE VIEW {table_name} AS
+                SELECT
+                    {table_name}_files.fullname,
+                    {table_name}_files.path,
+                    {table_name}_files.is_package,
+                    blobs.contents
+                FROM {table_name}_files
+                JOIN blobs ON blobs.id = {table_name}_files.blob_id
+                ;
+                """
+            )
+            return
+
         self.connection.executescript(
             f"""
             CREATE TABLE {table_name}
@@ -173,22 +571,16 @@ class Accessor:
     ) -> None:
         """Add compiled bytecode to the database for a given magic number."""
 
-        table_name = f"bytecode_{magic_number}"
-        self.connection.execute(
-            f"""
-            INSERT INTO {table_name} (fullname, path, is_package, contents)
-            VALUES (?, ?, ?, ?);
-            """,
-            (
-                fullname,
-                path,
-                is_package,
-                compress(code),
-            ),
-        )
+        table_name = self.get_bytecode_table_name(magic_number)
+        self.insert_file(table_name, fullname, path, is_package, code)
+
+    def mark_magic_number(
+        self, magic_number: int, python_identifier: str | None = None
+    ) -> None:
+        """Mark that bytecode has been fully compiled for a given magic number.
 
-    def mark_magic_number(self, magic_number: int) -> None:
-        """Mark that bytecode has been fully compiled for a given magic number."""
+        By default, the magic number is attributed to the current Python interpreter.
+        """
 
         self.connection.execute(
             """
@@ -198,167 +590,469 @@ class Accessor:
             """,
             {
                 "magic_number": magic_number,
-                "python_identifier": get_python_identifier(),
+                "python_identifier": python_identifier or get_python_identifier(),
             },
         )
 
     def find_spec(
         self, fullname: str
     ) -> tuple[str, bytes | types.CodeType, bool] | None:
-        find_spec_table = self.find_spec_table
-        result: tuple[str, bytes, bool] | None = self.connection.execute(
-            f"""
-            SELECT
-                path,
-                contents,
-                is_package
-            FROM {find_spec_table}
-            WHERE fullname = ?
-            ;
-            """,
-            (fullname,),
-        ).fetchone()
+        stats = instrumentation.active
+        start_ns = time.perf_counter_ns() if stats else 0
+        find_spec_table, result = self.find_spec_row(fullname)
+        if stats:
+            stats.record("sql", start_ns)
+        if result is None:
+            # Rarely used modules may have been moved to a cold database.
+            cold_accessor = self.get_cold_accessor()
+            if cold_accessor is not None:
+                return cold_accessor.find_spec(fullname)
+            return None
+        path, code, is_package = result
+        code = decompress(code)
 
-        if result is None and self.find_spec_table != "code":
-            # Nothing was found in the bytecode table.
-            # Try searching the source-only table.
-            find_spec_table = "code"
-            result = self.connection.execute(
-                """
+        # Source code
+        if find_spec_table == "code":
+            return path, code, is_package
+
+        # Byte code
+        if stats:
+            start_ns = time.perf_counter_ns()
+            bytecode = marshal.loads(code, allow_code=True)
+            stats.record("unmarshal", start_ns)
+            return path, bytecode, is_package
+        return path, marshal.loads(code, allow_code=True), is_package
+
+    def find_spec_row(
+        self, fullname: str
+    ) -> tuple[str, tuple[str, bytes, bool] | None]:
+        """Find the row of a module, and the table that it was found in.
+
+        The row's contents are still compressed,
+        so that the lock is only held while querying the database.
+        """
+
+        stats = instrumentation.active
+        find_spec_table = self.find_spec_table
+        with self.lock:
+            result: tuple[str, bytes, bool] | None = self.connection.execute(
+                f"""
                 SELECT
                     path,
                     contents,
                     is_package
-                FROM code
+                FROM {self.schema}.{find_spec_table}
                 WHERE fullname = ?
                 ;
                 """,
                 (fullname,),
             ).fetchone()
+            if stats:
+                stats.record_lookup(find_spec_table, result is not None)
 
-        if result is None:
-            return None
-        path, code, is_package = result
-        code = decompress(code)
+            if result is None and self.find_spec_table != "code":
+                # Nothing was found in the bytecode table.
+                # Try searching the source-only table.
+                find_spec_table = "code"
+                result = self.connection.execute(
+                    f"""
+                    SELECT
+                        path,
+                        contents,
+                        is_package
+                    FROM {self.schema}.code
+                    WHERE fullname = ?
+                    ;
+                    """,
+                    (fullname,),
+                ).fetchone()
+                if stats:
+                    stats.record_lookup(find_spec_table, result is not None)
 
-        # Source code
-        if find_spec_table == "code":
-            return path, code, is_package
+            if (
+                result is not None
+                and find_spec_table == "code"
+                and is_extension_module(result[0])
+            ):
+                # Extension modules may be bundled for several platforms and ABIs.
+                # Only return an extension module that this interpreter can load,
+                # or else the module's source code, if it is also bundled.
+                result = self.find_loadable_module(fullname)
+        return find_spec_table, result
 
-        # Byte code
-        return path, marshal.loads(code, allow_code=True), is_package
+    def find_loadable_module(self, fullname: str) -> tuple[str, bytes, bool] | None:
+        """Find a module that the current interpreter can load.
+
+        Extension modules that this interpreter can load take precedence
+        over source code, like they do in directories.
+        """
+
+        with self.lock:
+            rows: list[tuple[str, bytes, bool]] = self.connection.execute(
+                f"""
+                SELECT
+                    path,
+                    contents,
+                    is_package
+                FROM {self.schema}.code
+                WHERE fullname = ?
+                ;
+                """,
+                (fullname,),
+            ).fetchall()
+        for row in rows:
+            if is_loadable_extension_module(row[0]):
+                return row
+        for row in rows:
+            if not is_extension_module(row[0]):
+                return row
+        return None
 
-    @typing.overload
-    def get_file(self, *, path: str) -> bytes: ...
+    if TYPE_CHECKING:
 
-    @typing.overload
-    def get_file(self, *, fullname: str) -> bytes: ...
+        @typing.overload
+        def get_file(self, *, path: str) -> bytes: ...
+
+        @typing.overload
+        def get_file(self, *, fullname: str) -> bytes: ...
 
     def get_file(
         self, *, path: str | None = None, fullname: str | None = None
     ) -> bytes:
-        contents: bytes
-        if path:
-            cursor = self.connection.execute(
-                """
+        stats = instrumentation.active
+        if stats and path:
+            stats.record_resource(path)
+        column = "path" if path else "fullname"
+        with self.lock:
+            row: tuple[bytes] | None = self.connection.execute(
+                f"""
                 SELECT
                     contents
-                FROM code
-                WHERE path LIKE ?;
+                FROM {self.schema}.code
+                WHERE {column} LIKE ?;
                 """,
-                (path,),
-            )
-        else:  # fullname
-            cursor = self.connection.execute(
-                """
+                (path or fullname,),
+            ).fetchone()
+
+        if row is None:
+            cold_accessor = self.get_cold_accessor()
+            if cold_accessor is not None and path:
+                return cold_accessor.get_file(path=path)
+            if cold_accessor is not None and fullname:
+                return cold_accessor.get_file(fullname=fullname)
+            filename = str(path or fullname)
+            with self.lock:
+                database_path = self.get_database_path(self.connection, self.schema)
+            raise FileNotFoundInDatabaseError(filename, database_path)
+
+        (contents,) = row
+        if contents is None and path:
+            # The file is a large resource that is stored in chunks.
+            with self.open_file(path) as file:
+                return file.read()
+
+        return decompress(contents)
+
+    def get_data(self, path: str) -> bytes:
+        """Get the contents of the file at exactly *path*.
+
+        Unlike `get_file()`, *path* is not a pattern,
+        so the file is found using the primary key of the ``code_files`` table.
+        """
+
+        stats = instrumentation.active
+        if stats:
+            stats.record_resource(path)
+        with self.lock:
+            row: tuple[bytes | None] | None = self.connection.execute(
+                f"""
                 SELECT
                     contents
-                FROM code
-                WHERE fullname LIKE ?;
+                FROM {self.schema}.code
+                WHERE
+                    fullname IN ('', ?)
+                    AND path = ?
+                ;
                 """,
-                (fullname,),
-            )
+                (get_module_name(path), path),
+            ).fetchone()
 
-        try:
-            contents = cursor.fetchone()[0]
-        except TypeError:
-            filename = str(path or fullname)
-            database_path = self.get_database_path(self.connection)
-            raise FileNotFoundInDatabaseError(filename, database_path)
+        if row is None:
+            cold_accessor = self.get_cold_accessor()
+            if cold_accessor is not None:
+                return cold_accessor.get_data(path)
+            with self.lock:
+                database_path = self.get_database_path(self.connection, self.schema)
+            raise FileNotFoundInDatabaseError(path, database_path)
 
+        (contents,) = row
+        if contents is None:
+            # The file is a large resource that is stored in chunks.
+            with self.open_file(path) as file:
+                return file.read()
         return decompress(contents)
 
-    def find_distributions(self, name: str | None) -> typing.Generator[str]:
-        if name is not None:
-            path_pattern = f"{name}-%.dist-info/METADATA"
-        else:
-            path_pattern = "%.dist-info/METADATA"
+    def get_source(self, fullname: str) -> str:
+        """Get the decoded source code of a module.
 
-        sql = """
-            SELECT
-                path
-            FROM code
-            WHERE
-                path LIKE $path_pattern
-            ;
+        Recently used source code is cached.
         """
 
-        cursor = self.connection.execute(
-            sql,
-            {"path_pattern": path_pattern},
-        )
-        rows = cursor.fetchall()
-        if rows is None:
-            return
+        with self.lock:
+            source = self.source_cache.pop(fullname, None)
+            if source is not None:
+                self.source_cache[fullname] = source
+                return source
 
-        path: str
-        for (path,) in rows:
-            module, _, _ = path.partition("-")
-            if module.isidentifier():
-                yield module
+        import tokenize
 
-    def list_directory(self, path_like: str) -> list[str]:
-        """List the contents of a directory."""
+        raw_source = self.get_raw_source(fullname)
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(raw_source).readline)
+        source = raw_source.decode(encoding)
+        with self.lock:
+            self.source_cache[fullname] = source
+            if len(self.source_cache) > SOURCE_CACHE_SIZE:
+                # Evict the least recently used source code.
+                del self.source_cache[next(iter(self.source_cache))]
+        return source
 
-        base_name = str(pathlib.PurePosixPath(path_like)).replace("/", ".")
-        sql = """
-            SELECT
-                path
-            FROM code
-            WHERE
-                path LIKE $package_like
-                AND path NOT LIKE $subpackage_like
+    def get_raw_source(self, fullname: str) -> bytes:
+        """Get the undecoded source code of a module.
 
-            UNION
+        The source code may have been moved to a sidecar database,
+        or the module may have been moved to a cold database.
+        """
 
-            SELECT
-                DISTINCT substr(
+        raw_source = self.find_raw_source(fullname)
+        if raw_source is None:
+            source_accessor = self.get_source_accessor()
+            if source_accessor is not None:
+                raw_source = source_accessor.find_raw_source(fullname)
+        if raw_source is not None:
+            return raw_source
+
+        cold_accessor = self.get_cold_accessor()
+        if cold_accessor is not None:
+            return cold_accessor.get_raw_source(fullname)
+        with self.lock:
+            database_path = self.get_database_path(self.connection, self.schema)
+        raise FileNotFoundInDatabaseError(fullname, database_path)
+
+    def find_raw_source(self, fullname: str) -> bytes | None:
+        """Find the undecoded source code of a module in this database only.
+
+        Rows are clustered by module name, so this is a single B-tree search.
+        """
+
+        with self.lock:
+            rows: list[tuple[str, bytes]] = self.connection.execute(
+                f"""
+                SELECT
                     path,
-                    0,
+                    contents
+                FROM {self.schema}.code
+                WHERE fullname = ?
+                ;
+                """,
+                (fullname,),
+            ).fetchall()
+        for path, contents in rows:
+            # Extension modules may be bundled alongside a module's source code.
+            if not is_extension_module(path):
+                return decompress(contents)
+        return None
+
+    def open_file(self, path: str) -> typing.BinaryIO:
+        """Open a file for reading in binary mode.
+
+        Large resources that are stored in chunks are streamed,
+        so only the chunks that are read are decompressed.
+        """
+
+        if not self.has_chunks:
+            return io.BytesIO(self.get_file(path=path))
+
+        stats = instrumentation.active
+        if stats:
+            stats.record_resource(path)
+
+        row: tuple[bytes | None, int | None, int | None, int | None] | None
+        with self.lock:
+            row = self.connection.execute(
+                f"""
+                SELECT
+                    coalesce(blobs.contents, resources.contents),
+                    resources.id,
+                    resources.size,
+                    resources.chunk_size
+                FROM {self.schema}.code_files AS code_files
+                LEFT JOIN {self.schema}.blobs AS blobs
+                    ON blobs.id = code_files.blob_id
+                LEFT JOIN {self.schema}.resources AS resources
+                    ON resources.id = code_files.resource_id
+                WHERE code_files.path LIKE ?
+                ;
+                """,
+                (path,),
+            ).fetchone()
+        if row is None:
+            cold_accessor = self.get_cold_accessor()
+            if cold_accessor is not None:
+                return cold_accessor.open_file(path)
+            with self.lock:
+                database_path = self.get_database_path(self.connection, self.schema)
+            raise FileNotFoundInDatabaseError(path, database_path)
+
+        contents, resource_id, size, chunk_size = row
+        if contents is not None:
+            return io.BytesIO(decompress(contents))
+        assert resource_id is not None and size is not None and chunk_size is not None
+        return io.BufferedReader(ChunkReader(self, resource_id, size, chunk_size))
+
+    def get_chunk(self, resource_id: int, chunk: int) -> bytes:
+        """Get one decompressed chunk of a large resource."""
+
+        with self.lock:
+            row: tuple[bytes] = self.connection.execute(
+                f"""
+                SELECT
+                    contents
+                FROM {self.schema}.resource_chunks
+                WHERE resource_id = ? AND chunk = ?
+                ;
+                """,
+                (resource_id, chunk),
+            ).fetchone()
+        return decompress(row[0])
+
+    def find_distributions(self, name: str | None) -> typing.Generator[str]:
+        if name is not None:
+            path_pattern = f"{name}-%.dist-info/METADATA"
+        else:
+            path_pattern = "%.dist-info/METADATA"
+
+        sql = f"""
+            SELECT
+                path
+            FROM {self.schema}.code
+            WHERE
+                path LIKE $path_pattern
+            ;
+        """
+
+        with self.lock:
+            rows = self.connection.execute(
+                sql,
+                {"path_pattern": path_pattern},
+            ).fetchall()
+
+        path: str
+        for (path,) in rows:
+            module, _, _ = path.partition("-")
+            if module.isidentifier():
+                yield module
+
+    def list_directory(self, path_like: str) -> list[str]:
+        """List the contents of a directory."""
+
+        import pathlib
+
+        base_name = str(pathlib.PurePosixPath(path_like)).replace("/", ".")
+        sql = f"""
+            SELECT
+                path
+            FROM {self.schema}.code
+            WHERE
+                path LIKE $package_like
+                AND path NOT LIKE $subpackage_like
+
+            UNION
+
+            SELECT
+                DISTINCT substr(
+                    path,
+                    0,
                     length($package) + instr(substr(path, length($package) + 1), '/')
                 )
-            FROM code
+            FROM {self.schema}.code
             WHERE
                 path LIKE $subpackage_like
             ;
         """
 
-        results = self.connection.execute(
-            sql,
-            {
-                "package": f"{base_name}/",
-                "package_like": f"{base_name}/%",
-                "subpackage_like": f"{base_name}/%/%",
-            },
-        ).fetchall()
+        with self.lock:
+            results = self.connection.execute(
+                sql,
+                {
+                    "package": f"{base_name}/",
+                    "package_like": f"{base_name}/%",
+                    "subpackage_like": f"{base_name}/%/%",
+                },
+            ).fetchall()
         parsed_results: list[str] = []
         for result in results:
             if result[0].endswith("/__init__.py"):
                 parsed_results.append(result[0].rpartition("/")[0])
             else:
                 parsed_results.append(result[0])
+
+        cold_accessor = self.get_cold_accessor()
+        if cold_accessor is not None:
+            parsed_results.extend(cold_accessor.list_directory(path_like))
+            return list(dict.fromkeys(parsed_results))
         return parsed_results
 
+    def list_modules(self, package: str) -> dict[str, bool]:
+        """List the modules directly inside a package, and whether they are packages.
+
+        Top-level modules are listed if *package* is an empty string.
+        Importable directories, such as namespaces, are listed as packages.
+
+        Submodules are found with a single range scan of the module name index.
+        """
+
+        if package:
+            # "/" sorts immediately after ".", so the range covers every submodule.
+            condition = "fullname > $package || '.' AND fullname < $package || '/'"
+            start = len(package) + 2
+        else:
+            condition = "fullname != ''"
+            start = 1
+        # Source code may have been stripped, leaving only bytecode.
+        # File contents are not needed, so the tables are not joined to them.
+        suffix = "_files" if self.has_blobs else ""
+        selects = [
+            f"SELECT fullname, is_package FROM {self.schema}.{table}{suffix}"
+            f" WHERE {condition}"
+            for table in sorted({"code", self.find_spec_table})
+        ]
+        sql = f"""
+            SELECT
+                substr(fullname, $start) AS name,
+                max(is_package)
+            FROM ({" UNION ALL ".join(selects)})
+            WHERE
+                instr(substr(fullname, $start), '.') = 0
+            GROUP BY
+                name
+            ORDER BY
+                name
+            ;
+        """
+
+        with self.lock:
+            rows: list[tuple[str, int]] = self.connection.execute(
+                sql,
+                {"package": package, "start": start},
+            ).fetchall()
+        modules = {name: bool(is_package) for name, is_package in rows}
+
+        cold_accessor = self.get_cold_accessor()
+        if cold_accessor is not None:
+            for name, is_package in cold_accessor.list_modules(package).items():
+                modules.setdefault(name, is_package)
+        return modules
+
     def iter_source_code(self) -> typing.Generator[tuple[str, str, bool, bytes]]:
         cursor = self.connection.cursor()
         iterable = cursor.execute(
@@ -396,6 +1090,266 @@ class Accessor:
             contents = row[0]
             yield decompress(contents)
 
+    def get_bytecode_tables(self) -> list[str]:
+        """List all bytecode tables in the database, including incomplete tables."""
+
+        return [
+            table
+            for table in self.get_tables()
+            if table.removeprefix("bytecode_").isdigit()
+        ]
+
+    def register_size_function(self) -> None:
+        """Register a ``decompressed_size()`` SQL function.
+
+        This allows uncompressed sizes to be calculated by streaming aggregate queries.
+        """
+
+        self.connection.create_function(
+            "decompressed_size",
+            1,
+            # Large resources are stored in chunks, so their contents are NULL.
+            lambda contents: 0 if contents is None else len(decompress(contents)),
+            deterministic=True,
+        )
+
+    def get_size_stats(self) -> list[tuple[str, str, int, int, int]]:
+        """Get the number of rows and total stored and uncompressed sizes.
+
+        Sizes are grouped by table and category.
+        Rows in the ``code`` table are categorized as "source", "extension",
+        "directory", or "resource";
+        all rows in bytecode tables are categorized as "bytecode".
+
+        ``register_size_function()`` must be called first.
+        """
+
+        queries = [
+            """
+            SELECT
+                'code',
+                CASE
+                    WHEN path LIKE '%.py' THEN 'source'
+                    WHEN path LIKE '%.so' OR path LIKE '%.pyd' THEN 'extension'
+                    WHEN fullname != '' THEN 'directory'
+                    ELSE 'resource'
+                END AS category,
+                count(*),
+                coalesce(sum(length(contents)), 0),
+                coalesce(sum(decompressed_size(contents)), 0)
+            FROM code
+            GROUP BY category
+            """
+        ]
+        for table in self.get_bytecode_tables():
+            queries.append(
+                f"""
+                SELECT
+                    '{table}',
+                    'bytecode',
+                    count(*),
+                    coalesce(sum(length(contents)), 0),
+                    coalesce(sum(decompressed_size(contents)), 0)
+                FROM {table}
+                """
+            )
+        if self.has_chunks:
+            # Chunked resources are counted as rows in the code table,
+            # but their contents are only stored in chunks.
+            queries.append(
+                """
+                SELECT
+                    'resource_chunks',
+                    'resource',
+                    0,
+                    coalesce(sum(length(contents)), 0),
+                    coalesce(sum(decompressed_size(contents)), 0)
+                FROM resource_chunks
+                """
+            )
+
+        sql = " UNION ALL ".join(queries)
+        return self.connection.execute(sql).fetchall()
+
+    def get_codec_stats(self) -> list[tuple[str, int, int, int]]:
+        """Get the number of rows and sizes, grouped by codec.
+
+        ``register_size_function()`` must be called first.
+        """
+
+        if self.has_blobs:
+            tables = ["blobs"]
+            if self.has_resources:
+                tables.append("resources")
+            if self.has_chunks:
+                tables.append("resource_chunks")
+        else:
+            tables = ["code", *self.get_bytecode_tables()]
+
+        queries = [
+            f"""
+            SELECT
+                substr(contents, 1, 1) AS codec,
+                count(*),
+                coalesce(sum(length(contents)), 0),
+                coalesce(sum(decompressed_size(contents)), 0)
+            FROM {table}
+            WHERE contents IS NOT NULL
+            GROUP BY codec
+            """
+            for table in tables
+        ]
+        sql = " UNION ALL ".join(queries)
+        return [
+            (get_codec_name(codec), rows, stored, uncompressed)
+            for codec, rows, stored, uncompressed in self.connection.execute(sql)
+        ]
+
+    def get_blob_stats(self, table: str) -> tuple[int, int, int]:
+        """Get the number of unique blobs and their stored and uncompressed sizes.
+
+        *table* is either the ``blobs`` or ``resources`` table.
+        ``register_size_function()`` must be called first.
+        """
+
+        row: tuple[int, int, int] = self.connection.execute(
+            f"""
+            SELECT
+                count(*),
+                coalesce(sum(length(contents)), 0),
+                coalesce(sum(decompressed_size(contents)), 0)
+            FROM {table}
+            ;
+            """
+        ).fetchone()
+        return row
+
+    def get_largest_rows(self, limit: int) -> list[tuple[str, str, int, int]]:
+        """Get the largest rows, by stored size, across all tables.
+
+        Each row contains the table name, the path,
+        and the stored and uncompressed sizes.
+        Uncompressed sizes are only calculated for the rows that are returned.
+
+        ``register_size_function()`` must be called first.
+        """
+
+        queries = ["SELECT 'code' AS name, path, contents FROM code"]
+        for table in self.get_bytecode_tables():
+            queries.append(f"SELECT '{table}', path, contents FROM {table}")
+
+        sql = f"""
+            SELECT
+                name,
+                path,
+                length(contents),
+                decompressed_size(contents)
+            FROM (
+                SELECT
+                    name,
+                    path,
+                    contents
+                FROM ({" UNION ALL ".join(queries)})
+                ORDER BY length(contents) DESC
+                LIMIT $limit
+            )
+            ;
+        """
+        return self.connection.execute(sql, {"limit": limit}).fetchall()
+
+    def get_distribution_size_stats(self) -> list[tuple[str, str, int, int, int]]:
+        """Get the number of rows and sizes, grouped by distribution and category.
+
+        Files are attributed to distributions using their ``.dist-info/RECORD`` files.
+        Files that are not listed in any RECORD file are attributed to an empty name.
+
+        ``register_size_function()`` must be called first.
+        """
+
+        self.connection.executescript(
+            """
+            DROP TABLE IF EXISTS temp.distribution_files;
+            CREATE TEMPORARY TABLE distribution_files (
+                path TEXT PRIMARY KEY,
+                distribution TEXT
+            );
+            """
+        )
+        for record_path, record in self.iter_package_records():
+            distribution = record_path.partition("-")[0]
+            self.connection.executemany(
+                """
+                INSERT OR IGNORE INTO temp.distribution_files (path, distribution)
+                VALUES (?, ?);
+                """,
+                ((path, distribution) for path in record),
+            )
+
+        queries = [
+            """
+            SELECT
+                coalesce(distribution, '') AS distribution,
+                CASE
+                    WHEN code.path LIKE '%.py' THEN 'source'
+                    WHEN code.path LIKE '%.so' OR code.path LIKE '%.pyd'
+                        THEN 'extension'
+                    WHEN code.fullname != '' THEN 'directory'
+                    ELSE 'resource'
+                END AS category,
+                count(*),
+                coalesce(sum(length(contents)), 0),
+                coalesce(sum(decompressed_size(contents)), 0)
+            FROM code
+            LEFT JOIN temp.distribution_files ON code.path = distribution_files.path
+            GROUP BY distribution, category
+            """
+        ]
+        for table in self.get_bytecode_tables():
+            queries.append(
+                f"""
+                SELECT
+                    coalesce(distribution, '') AS distribution,
+                    'bytecode',
+                    count(*),
+                    coalesce(sum(length(contents)), 0),
+                    coalesce(sum(decompressed_size(contents)), 0)
+                FROM {table}
+                LEFT JOIN temp.distribution_files
+                    ON {table}.path = distribution_files.path
+                GROUP BY distribution
+                """
+            )
+
+        sql = " UNION ALL ".join(queries)
+        try:
+            return self.connection.execute(sql).fetchall()
+        finally:
+            self.connection.execute("DROP TABLE temp.distribution_files;")
+
+    def iter_package_records(self) -> typing.Generator[tuple[str, list[str]]]:
+        """Find all RECORD files in `.dist-info/` directories.
+
+        The path to each RECORD file is returned with a list of the recorded paths.
+        """
+
+        import csv
+
+        cursor = self.connection.cursor()
+        iterable = cursor.execute(
+            """
+            SELECT
+                path,
+                contents
+            FROM code
+            WHERE path LIKE '%.dist-info/RECORD'
+            ;
+            """
+        )
+        for path, contents in iterable:
+            lines = decompress(contents).decode("utf-8", errors="replace")
+            records = csv.reader(lines.splitlines())
+            yield path, [record[0] for record in records if record]
+
     def get_database_metadata(self) -> list[tuple[str, str]]:
         """Get all rows from the ``sqliteimport`` table."""
 
@@ -408,20 +1362,867 @@ class Accessor:
         """
         return self.connection.execute(sql).fetchall()
 
+    def get_metadata_value(self, field: str) -> str | None:
+        """Get a value from the ``sqliteimport`` table.
+
+        None is returned if the field is not present.
+        """
+
+        row: tuple[str] | None = self.connection.execute(
+            f"""
+            SELECT
+                value
+            FROM {self.schema}.sqliteimport
+            WHERE field = ?
+            ;
+            """,
+            (field,),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def get_source_sidecar(self) -> str | None:
+        """Get the name of the database that stripped source code was moved to.
+
+        None is returned if the source code has not been stripped.
+        """
+
+        return self.get_metadata_value("source_sidecar")
+
+    def get_cold_database(self) -> str | None:
+        """Get the name of the database that rarely used files were moved to.
+
+        None is returned if the database has not been split.
+        """
+
+        return self.get_metadata_value("cold_database")
+
+    def attach_sibling(self, name: str | None, schema: str) -> Accessor | None:
+        """Attach a database that is in the same directory as this database.
+
+        None is returned if *name* is None, if this database is not a file,
+        or if the sibling database is not present.
+        """
+
+        database_path = self.get_database_path(self.connection, self.schema)
+        # Deserialized databases report a name that is not a file, like "x",
+        # which must not be resolved against the working directory.
+        if name is None or not os.path.isfile(database_path):
+            return None
+        path = os.path.join(os.path.dirname(database_path), name)
+        if not os.path.isfile(path):
+            return None
+        return self.attach(path, schema)
+
+    def get_source_accessor(self) -> Accessor | None:
+        """Get an accessor for the database that stripped source code was moved to.
+
+        The database is only attached the first time that it is needed,
+        and it must be in the same directory as this database.
+        None is returned if the source code was not stripped,
+        or if the database of source code is not present.
+        """
+
+        if not self.source_accessor_checked:
+            with self.lock:
+                # Another thread may have attached the database while waiting.
+                if not self.source_accessor_checked:
+                    self.source_accessor = self.attach_sibling(
+                        self.get_source_sidecar(), f"{self.schema}_source"
+                    )
+                    self.source_accessor_checked = True
+        return self.source_accessor
+
+    def get_cold_accessor(self) -> Accessor | None:
+        """Get an accessor for the database that rarely used files were moved to.
+
+        The database is only attached the first time that a file is not found,
+        and it must be in the same directory as this database.
+        None is returned if the database was not split,
+        or if the cold database is not present.
+        """
+
+        if not self.cold_accessor_checked:
+            with self.lock:
+                # Another thread may have attached the database while waiting.
+                if not self.cold_accessor_checked:
+                    self.cold_accessor = self.attach_sibling(
+                        self.get_cold_database(), f"{self.schema}_cold"
+                    )
+                    self.cold_accessor_checked = True
+        return self.cold_accessor
+
+    def strip_source(self, sidecar: pathlib.Path) -> int:
+        """Move the source code of modules to an attached *sidecar* database.
+
+        The number of moved files is returned.
+        ``register_digest_function()`` must be called first.
+        """
+
+        destination = self.attach(sidecar, "sidecar")
+        self.connection.execute(
+            f"""
+            INSERT OR IGNORE INTO {destination.schema}.blobs (digest, contents)
+            SELECT
+                content_digest(contents),
+                contents
+            FROM {self.schema}.code
+            WHERE fullname != '' AND path LIKE '%.py'
+            ;
+            """
+        )
+        cursor = self.connection.execute(
+            f"""
+            INSERT INTO {destination.schema}.code_files
+                (fullname, path, is_package, blob_id)
+            SELECT
+                code.fullname,
+                code.path,
+                code.is_package,
+                blobs.id
+            FROM {self.schema}.code AS code
+            JOIN {destination.schema}.blobs AS blobs
+                ON blobs.digest = content_digest(code.contents)
+            WHERE code.fullname != '' AND code.path LIKE '%.py'
+            ;
+            """
+        )
+        moved = cursor.rowcount
+
+        table = "code_files" if self.has_blobs else "code"
+        self.connection.execute(
+            f"""
+            DELETE FROM {self.schema}.{table}
+            WHERE fullname != '' AND path LIKE '%.py'
+            ;
+            """
+        )
+        if self.has_blobs:
+            self.delete_unreferenced_contents()
+        self.connection.execute(
+            f"""
+            INSERT INTO {self.schema}.sqliteimport (field, value)
+            VALUES ('source_sidecar', ?)
+            ;
+            """,
+            (sidecar.name,),
+        )
+
+        # Databases cannot be detached in the middle of a transaction.
+        self.connection.commit()
+        destination.detach()
+        return moved
+
+    def delete_unreferenced_contents(self) -> None:
+        """Delete the contents that are no longer referenced by any rows."""
+
+        references = [
+            f"""
+            SELECT blob_id
+            FROM {self.schema}.{table}_files
+            WHERE blob_id IS NOT NULL
+            """
+            for table in ["code", *self.get_bytecode_tables()]
+        ]
+        self.connection.execute(
+            f"""
+            DELETE FROM {self.schema}.blobs
+            WHERE id NOT IN ({" UNION ".join(references)})
+            ;
+            """
+        )
+        if not self.has_resources:
+            return
+
+        for table in ("resource_chunks", "resources"):
+            column = "resource_id" if table == "resource_chunks" else "id"
+            self.connection.execute(
+                f"""
+                DELETE FROM {self.schema}.{table}
+                WHERE {column} NOT IN (
+                    SELECT resource_id
+                    FROM {self.schema}.code_files
+                    WHERE resource_id IS NOT NULL
+                )
+                ;
+                """
+            )
+
+    def iter_paths(self) -> typing.Generator[tuple[str, str]]:
+        """Yield the fullname and path of every file, including bytecode."""
+
+        queries = [
+            f"SELECT fullname, path FROM {self.schema}.{table}"
+            for table in ["code", *self.get_bytecode_tables()]
+        ]
+        cursor = self.connection.cursor()
+        yield from cursor.execute(f"{' UNION '.join(queries)};")
+
+    def split(self, cold: pathlib.Path, paths: typing.Iterable[str]) -> int:
+        """Move the files at *paths* to a *cold* database.
+
+        The cold database must already be initialized,
+        and must have a bytecode table for each magic number in this database.
+        The number of moved paths is returned.
+        """
+
+        destination = self.attach(cold, "cold")
+        self.connection.execute(
+            """
+            CREATE TEMP TABLE cold_paths (
+                path TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+            """
+        )
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO temp.cold_paths (path) VALUES (?);",
+            ((path,) for path in paths),
+        )
+        self.copy_files(destination, "cold_paths")
+
+        for table in ["code", *self.get_bytecode_tables()]:
+            self.connection.execute(
+                f"""
+                DELETE FROM {self.schema}.{table}_files
+                WHERE path IN (SELECT path FROM temp.cold_paths)
+                ;
+                """
+            )
+        self.delete_unreferenced_contents()
+        self.connection.execute(
+            f"""
+            INSERT INTO {self.schema}.sqliteimport (field, value)
+            VALUES ('cold_database', ?)
+            ;
+            """,
+            (cold.name,),
+        )
+        moved: int = self.connection.execute(
+            "SELECT count(*) FROM temp.cold_paths;"
+        ).fetchone()[0]
+        self.connection.execute("DROP TABLE temp.cold_paths;")
+
+        # Databases cannot be detached in the middle of a transaction.
+        self.connection.commit()
+        destination.detach()
+        return moved
+
+    def copy_files(self, destination: Accessor, selection: str | None = None) -> None:
+        """Copy files to an attached *destination* database.
+
+        If *selection* is given, only the paths in that temporary table are copied.
+        The destination must have a bytecode table for each bytecode table here.
+
+        Contents are copied as-is, and are matched using their digests.
+        Rows are inserted in order of their module names,
+        so the modules in a package -- and their contents -- share database pages.
+        Bytecode contents are inserted before source code contents.
+        """
+
+        join = ""
+        if selection is not None:
+            join = f"""
+                JOIN temp.{selection} AS selection
+                    ON selection.path = files.path
+            """
+
+        bytecode_tables = self.get_bytecode_tables()
+        for table in [*bytecode_tables, "code"]:
+            self.connection.execute(
+                f"""
+                INSERT OR IGNORE INTO {destination.schema}.blobs (digest, contents)
+                SELECT
+                    blobs.digest,
+                    blobs.contents
+                FROM {self.schema}.{table}_files AS files
+                {join}
+                JOIN {self.schema}.blobs AS blobs
+                    ON blobs.id = files.blob_id
+                ORDER BY files.fullname, files.path
+                ;
+                """
+            )
+        self.connection.execute(
+            f"""
+            INSERT OR IGNORE INTO {destination.schema}.resources
+                (digest, contents, size, chunk_size)
+            SELECT
+                resources.digest,
+                resources.contents,
+                resources.size,
+                resources.chunk_size
+            FROM {self.schema}.code_files AS files
+            {join}
+            JOIN {self.schema}.resources AS resources
+                ON resources.id = files.resource_id
+            ORDER BY files.path
+            ;
+            """
+        )
+        self.connection.execute(
+            f"""
+            INSERT OR IGNORE INTO {destination.schema}.resource_chunks
+                (resource_id, chunk, contents)
+            SELECT
+                destination_resources.id,
+                chunks.chunk,
+                chunks.contents
+            FROM {destination.schema}.resources AS destination_resources
+            JOIN {self.schema}.resources AS resources
+                ON resources.digest = destination_resources.digest
+            JOIN {self.schema}.resource_chunks AS chunks
+                ON chunks.resource_id = resources.id
+            ORDER BY destination_resources.id, chunks.chunk
+            ;
+            """
+        )
+        self.connection.execute(
+            f"""
+            INSERT INTO {destination.schema}.code_files
+                (fullname, path, is_package, blob_id, resource_id)
+            SELECT
+                files.fullname,
+                files.path,
+                files.is_package,
+                destination_blobs.id,
+                destination_resources.id
+            FROM {self.schema}.code_files AS files
+            {join}
+            LEFT JOIN {self.schema}.blobs AS blobs
+                ON blobs.id = files.blob_id
+            LEFT JOIN {destination.schema}.blobs AS destination_blobs
+                ON destination_blobs.digest = blobs.digest
+            LEFT JOIN {self.schema}.resources AS resources
+                ON resources.id = files.resource_id
+            LEFT JOIN {destination.schema}.resources AS destination_resources
+                ON destination_resources.digest = resources.digest
+            ORDER BY files.fullname, files.path
+            ;
+            """
+        )
+        for table in bytecode_tables:
+            self.connection.execute(
+                f"""
+                INSERT INTO {destination.schema}.{table}_files
+                    (fullname, path, is_package, blob_id)
+                SELECT
+                    files.fullname,
+                    files.path,
+                    files.is_package,
+                    destination_blobs.id
+                FROM {self.schema}.{table}_files AS files
+                {join}
+                JOIN {self.schema}.blobs AS blobs
+                    ON blobs.id = files.blob_id
+                JOIN {destination.schema}.blobs AS destination_blobs
+                    ON destination_blobs.digest = blobs.digest
+                ORDER BY files.fullname, files.path
+                ;
+                """
+            )
+
+    def copy_legacy_files(self, destination: Accessor) -> None:
+        """Copy files from a database that has no resources table.
+
+        The contents of every row are read from the ``code`` table or view,
+        and from the bytecode tables or views, so identical contents are stored once.
+        ``register_digest_function()`` must be called first.
+        """
+
+        for blob_table, condition in (
+            ("blobs", "fullname != ''"),
+            ("resources", "fullname = ''"),
+        ):
+            self.connection.execute(
+                f"""
+                INSERT OR IGNORE INTO {destination.schema}.{blob_table}
+                    (digest, contents)
+                SELECT
+                    content_digest(contents),
+                    contents
+                FROM {self.schema}.code
+                WHERE {condition}
+                ORDER BY fullname, path
+                ;
+                """
+            )
+        self.connection.execute(
+            f"""
+            INSERT INTO {destination.schema}.code_files
+                (fullname, path, is_package, blob_id, resource_id)
+            SELECT
+                code.fullname,
+                code.path,
+                code.is_package,
+                blobs.id,
+                resources.id
+            FROM {self.schema}.code AS code
+            LEFT JOIN {destination.schema}.blobs AS blobs
+                ON code.fullname != ''
+                AND blobs.digest = content_digest(code.contents)
+            LEFT JOIN {destination.schema}.resources AS resources
+                ON code.fullname = ''
+                AND resources.digest = content_digest(code.contents)
+            ;
+            """
+        )
+        for table in self.get_bytecode_tables():
+            self.connection.execute(
+                f"""
+                INSERT OR IGNORE INTO {destination.schema}.blobs (digest, contents)
+                SELECT
+                    content_digest(contents),
+                    contents
+                FROM {self.schema}.{table}
+                ORDER BY fullname, path
+                ;
+                """
+            )
+            self.connection.execute(
+                f"""
+                INSERT INTO {destination.schema}.{table}_files
+                    (fullname, path, is_package, blob_id)
+                SELECT
+                    source.fullname,
+                    source.path,
+                    source.is_package,
+                    blobs.id
+                FROM {self.schema}.{table} AS source
+                JOIN {destination.schema}.blobs AS blobs
+                    ON blobs.digest = content_digest(source.contents)
+                ;
+                """
+            )
+
+    def get_blob_sizes(self) -> list[int]:
+        """Get the stored size of every row in the blobs table."""
+
+        return [
+            row[0]
+            for row in self.connection.execute(
+                f"SELECT length(contents) FROM {self.schema}.blobs;"
+            )
+        ]
+
+    def detach(self) -> None:
+        """Detach this accessor's database from the connection."""
+
+        self.connection.execute(f"DETACH DATABASE {self.schema};")
+
+    def register_digest_function(self) -> None:
+        """Register a ``content_digest()`` SQL function.
+
+        This allows contents to be compared and stored in the blobs table.
+        """
+
+        import hashlib
+
+        self.connection.create_function(
+            "content_digest",
+            1,
+            lambda contents: hashlib.sha256(decompress(contents)).digest(),
+            deterministic=True,
+        )
+
+    def create_merge_index(self) -> None:
+        """Create a temporary table that tracks which source each file is merged from.
+
+        ``register_digest_function()`` is called first.
+        """
+
+        self.register_digest_function()
+        self.connection.execute(
+            """
+            CREATE TEMP TABLE merged_files (
+                path TEXT PRIMARY KEY,
+                source INTEGER NOT NULL,
+                digest BLOB NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def merge_code(self, source: Accessor, number: int) -> tuple[int, int, int]:
+        """Merge files from an attached *source* database into this database.
+
+        Files whose paths have already been merged from another source are skipped.
+        The number of merged, duplicate, and conflicting files is returned;
+        duplicate files have identical contents, and conflicting files do not.
+        """
+
+        overlapping, duplicates = self.connection.execute(
+            f"""
+            SELECT
+                count(*),
+                coalesce(sum(merged_files.digest = content_digest(source.contents)), 0)
+            FROM {source.schema}.code AS source
+            JOIN temp.merged_files AS merged_files
+                ON merged_files.path = source.path
+            WHERE source.contents IS NOT NULL
+            ;
+            """
+        ).fetchone()
+        self.connection.execute(
+            f"""
+            INSERT OR IGNORE INTO temp.merged_files (path, source, digest)
+            SELECT
+                path,
+                ?,
+                content_digest(contents)
+            FROM {source.schema}.code
+            WHERE contents IS NOT NULL
+            ;
+            """,
+            (number,),
+        )
+        for blob_table, condition in (
+            ("blobs", "source.fullname != ''"),
+            ("resources", "source.fullname = ''"),
+        ):
+            self.connection.execute(
+                f"""
+                INSERT OR IGNORE INTO {self.schema}.{blob_table} (digest, contents)
+                SELECT
+                    merged_files.digest,
+                    source.contents
+                FROM {source.schema}.code AS source
+                JOIN temp.merged_files AS merged_files
+                    ON merged_files.path = source.path
+                    AND merged_files.source = ?
+                WHERE {condition}
+                ;
+                """,
+                (number,),
+            )
+        cursor = self.connection.execute(
+            f"""
+            INSERT INTO {self.schema}.code_files
+                (fullname, path, is_package, blob_id, resource_id)
+            SELECT
+                source.fullname,
+                source.path,
+                source.is_package,
+                blobs.id,
+                resources.id
+            FROM {source.schema}.code AS source
+            JOIN temp.merged_files AS merged_files
+                ON merged_files.path = source.path
+                AND merged_files.source = ?
+            LEFT JOIN {self.schema}.blobs AS blobs
+                ON source.fullname != ''
+                AND blobs.digest = merged_files.digest
+            LEFT JOIN {self.schema}.resources AS resources
+                ON source.fullname = ''
+                AND resources.digest = merged_files.digest
+            ;
+            """,
+            (number,),
+        )
+        files = cursor.rowcount
+        conflicts = overlapping - duplicates
+
+        if source.has_chunks:
+            for path, digest in source.iter_chunked_resources():
+                previous = self.connection.execute(
+                    "SELECT digest FROM temp.merged_files WHERE path = ?;", (path,)
+                ).fetchone()
+                if previous is not None:
+                    duplicates += previous[0] == digest
+                    conflicts += previous[0] != digest
+                    continue
+                self.connection.execute(
+                    """
+                    INSERT INTO temp.merged_files (path, source, digest)
+                    VALUES (?, ?, ?);
+                    """,
+                    (path, number, digest),
+                )
+                self.merge_chunked_resource(source, path, digest)
+                files += 1
+
+        return files, duplicates, conflicts
+
+    def iter_chunked_resources(self) -> typing.Generator[tuple[str, bytes]]:
+        """Yield the path and digest of every resource that is stored in chunks."""
+
+        cursor = self.connection.cursor()
+        yield from cursor.execute(
+            f"""
+            SELECT
+                code_files.path,
+                resources.digest
+            FROM {self.schema}.code_files AS code_files
+            JOIN {self.schema}.resources AS resources
+                ON resources.id = code_files.resource_id
+            WHERE resources.contents IS NULL
+            ;
+            """
+        )
+
+    def merge_chunked_resource(
+        self, source: Accessor, path: str, digest: bytes
+    ) -> None:
+        """Merge a resource that is stored in chunks from an attached database.
+
+        The compressed chunks are copied as-is, unless the contents already exist.
+        """
+
+        row = self.connection.execute(
+            f"SELECT id FROM {self.schema}.resources WHERE digest = ?;", (digest,)
+        ).fetchone()
+        if row is None:
+            resource_id = self.connection.execute(
+                f"""
+                INSERT INTO {self.schema}.resources
+                    (digest, contents, size, chunk_size)
+                SELECT
+                    digest,
+                    NULL,
+                    size,
+                    chunk_size
+                FROM {source.schema}.resources
+                WHERE digest = ?
+                ;
+                """,
+                (digest,),
+            ).lastrowid
+            self.connection.execute(
+                f"""
+                INSERT INTO {self.schema}.resource_chunks
+                    (resource_id, chunk, contents)
+                SELECT
+                    ?,
+                    chunks.chunk,
+                    chunks.contents
+                FROM {source.schema}.resource_chunks AS chunks
+                JOIN {source.schema}.resources AS resources
+                    ON resources.id = chunks.resource_id
+                WHERE resources.digest = ?
+                ;
+                """,
+                (resource_id, digest),
+            )
+        else:
+            resource_id = row[0]
+        self.connection.execute(
+            f"""
+            INSERT INTO {self.schema}.code_files
+                (fullname, path, is_package, resource_id)
+            VALUES ('', ?, FALSE, ?);
+            """,
+            (path, resource_id),
+        )
+
+    def merge_bytecode(self, source: Accessor, number: int, magic_number: int) -> None:
+        """Merge bytecode from an attached *source* database into this database.
+
+        Only bytecode for files that were merged from the same source is merged,
+        so bytecode always matches the source code that it was compiled from.
+        """
+
+        table_name = self.get_bytecode_table_name(magic_number)
+        if table_name not in self.get_tables():
+            self.create_bytecode_table(magic_number)
+        self.connection.execute(
+            f"""
+            INSERT OR IGNORE INTO {self.schema}.blobs (digest, contents)
+            SELECT
+                content_digest(source.contents),
+                source.contents
+            FROM {source.schema}.{table_name} AS source
+            JOIN temp.merged_files AS merged_files
+                ON merged_files.path = source.path
+                AND merged_files.source = ?
+            ;
+            """,
+            (number,),
+        )
+        self.connection.execute(
+            f"""
+            INSERT INTO {self.schema}.{table_name}_files
+                (fullname, path, is_package, blob_id)
+            SELECT
+                source.fullname,
+                source.path,
+                source.is_package,
+                blobs.id
+            FROM {source.schema}.{table_name} AS source
+            JOIN temp.merged_files AS merged_files
+                ON merged_files.path = source.path
+                AND merged_files.source = ?
+            JOIN {self.schema}.blobs AS blobs
+                ON blobs.digest = content_digest(source.contents)
+            ;
+            """,
+            (number,),
+        )
+
+
+class ChunkReader(io.RawIOBase):
+    """A seekable stream of a large resource that is stored in chunks.
+
+    Only the most-recently read chunk is kept in memory.
+    """
+
+    def __init__(
+        self, accessor: Accessor, resource_id: int, size: int, chunk_size: int
+    ) -> None:
+        super().__init__()
+        self.accessor = accessor
+        self.resource_id = resource_id
+        self.size = size
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.chunk_index = -1
+        self.chunk = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if position < 0:
+            raise ValueError(f"negative seek position {position}")
+        self.position = position
+        return position
+
+    def readinto(self, buffer: typing.Any) -> int:
+        if self.position >= self.size:
+            return 0
+
+        index, offset = divmod(self.position, self.chunk_size)
+        if index != self.chunk_index:
+            self.chunk = self.accessor.get_chunk(self.resource_id, index)
+            self.chunk_index = index
+
+        view = memoryview(buffer).cast("B")
+        data = self.chunk[offset : offset + len(view)]
+        view[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+# The codec that compressed each row's contents is recorded in its first byte.
+# Rows without a codec byte were compressed using raw LZMA2 streams,
+# which always begin with 0x00, 0x01, or 0x80 and higher,
+# so the codec bytes below can never be mistaken for the start of an LZMA2 stream.
+CODEC_RAW = 0x10
+CODEC_FAST = 0x11
+CODEC_STRONG = 0x12
+CODEC_NAMES = {
+    CODEC_RAW: "raw",
+    CODEC_FAST: "fast",
+    CODEC_STRONG: "strong",
+}
+
+# Contents smaller than this are stored uncompressed,
+# because compression would save little space and would slow reads.
+RAW_SIZE = 64
+# Contents must shrink by at least this much to be stored compressed,
+# so that already-compressed data like images and archives is stored uncompressed.
+MINIMUM_SAVINGS = 0.1
+# Strong compression is only tried for contents at least this large.
+STRONG_SIZE = 16 * 1024
+
+# This is `lzma.FILTER_LZMA2`; `lzma` is only imported if it is needed.
+FILTER_LZMA2 = 0x21
+LZMA_FILTERS = [{"id": FILTER_LZMA2, "preset": 0}]
+STRONG_LZMA_FILTERS = [{"id": FILTER_LZMA2, "preset": 6}]
+
+
+def get_module_index_name(paths: typing.Sequence[str]) -> str:
+    """Name the module index of the databases at *paths*.
+
+    The name changes if any of the databases are modified.
+    """
+
+    import hashlib
+
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return f"sqliteimport-{digest.hexdigest()}"
+
+
+def get_codec_name(contents: bytes) -> str:
+    """Get the name of the codec used to compress the given contents."""
+
+    return CODEC_NAMES.get(contents[0], "lzma") if contents else "lzma"
+
 
 def compress(data: bytes) -> bytes:
-    compressed: bytes = compression.lzma.compress(
-        data,
-        format=compression.lzma.FORMAT_RAW,
-        filters=[{"id": compression.lzma.FILTER_LZMA2, "preset": 0}],
+    """Compress *data* using the codec that suits it best.
+
+    Tiny and incompressible data is stored uncompressed.
+    Otherwise, zlib is used because it is fast to decompress,
+    unless LZMA compresses large data significantly better.
+    """
+
+    if len(data) < RAW_SIZE:
+        return bytes((CODEC_RAW,)) + data
+
+    compressed: bytes = compression.zlib.compress(data, 9)
+    if len(compressed) > len(data) * (1 - MINIMUM_SAVINGS):
+        return bytes((CODEC_RAW,)) + data
+    codec = CODEC_FAST
+
+    if len(data) >= STRONG_SIZE:
+        lzma = get_lzma()
+        strong = lzma.compress(
+            data, format=lzma.FORMAT_RAW, filters=STRONG_LZMA_FILTERS
+        )
+        if len(strong) <= len(compressed) * (1 - MINIMUM_SAVINGS):
+            compressed, codec = strong, CODEC_STRONG
+
+    return bytes((codec,)) + compressed
+
+
+def compress_legacy(data: bytes) -> bytes:
+    """Compress *data* using raw LZMA2, without recording the codec.
+
+    This is used for databases created before codecs were recorded,
+    so that the databases remain readable by older versions of sqliteimport.
+    """
+
+    lzma = get_lzma()
+    compressed: bytes = lzma.compress(
+        data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS
     )
     return compressed
 
 
 def decompress(data: bytes) -> bytes:
-    decompressed: bytes = compression.lzma.decompress(
-        data,
-        format=compression.lzma.FORMAT_RAW,
-        filters=[{"id": compression.lzma.FILTER_LZMA2, "preset": 0}],
-    )
+    stats = instrumentation.active
+    start_ns = time.perf_counter_ns() if stats else 0
+    codec = data[0] if data else None
+    decompressed: bytes
+    if codec == CODEC_RAW:
+        decompressed = data[1:]
+    elif codec == CODEC_FAST:
+        decompressed = compression.zlib.decompress(memoryview(data)[1:])
+    elif codec == CODEC_STRONG:
+        lzma = get_lzma()
+        decompressed = lzma.decompress(
+            memoryview(data)[1:], format=lzma.FORMAT_RAW, filters=STRONG_LZMA_FILTERS
+        )
+    else:
+        lzma = get_lzma()
+        decompressed = lzma.decompress(
+            data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS
+        )
+    if stats:
+        stats.record("decompress", start_ns)
+        stats.record_decompression(len(data), len(decompressed))
     return decompressed
@@ -0,0 +1,102 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import typing
+
+from .accessor import Accessor
+
+
+def analyze(accessor: Accessor, top: int) -> dict[str, typing.Any]:
+    """Analyze the stored and uncompressed sizes of the rows in a database.
+
+    All sizes are calculated by sqlite using streaming aggregate queries,
+    so large databases are never loaded into memory all at once.
+    """
+
+    accessor.register_size_function()
+
+    page_size = accessor.connection.execute("PRAGMA page_size;").fetchone()[0]
+    page_count = accessor.connection.execute("PRAGMA page_count;").fetchone()[0]
+
+    tables: list[dict[str, typing.Any]] = []
+    categories: dict[str, dict[str, typing.Any]] = {}
+    for table, category, rows, stored, uncompressed in accessor.get_size_stats():
+        tables.append(
+            {
+                "table": table,
+                "category": category,
+                **summarize(rows, stored, uncompressed),
+            }
+        )
+        totals = categories.setdefault(category, summarize(0, 0, 0))
+        categories[category] = summarize(
+            totals["rows"] + rows,
+            totals["stored_bytes"] + stored,
+            totals["uncompressed_bytes"] + uncompressed,
+        )
+
+    distributions: dict[str, dict[str, typing.Any]] = {}
+    for (
+        name,
+        category,
+        rows,
+        stored,
+        uncompressed,
+    ) in accessor.get_distribution_size_stats():
+        distribution = distributions.setdefault(
+            name, {"distribution": name, **summarize(0, 0, 0), "categories": {}}
+        )
+        distribution["categories"][category] = summarize(rows, stored, uncompressed)
+        distribution.update(
+            summarize(
+                distribution["rows"] + rows,
+                distribution["stored_bytes"] + stored,
+                distribution["uncompressed_bytes"] + uncompressed,
+            )
+        )
+
+    # Identical contents are stored once, so the sizes of the tables and categories
+    # may add up to more than the sizes of the unique blobs that are stored.
+    blobs: dict[str, dict[str, typing.Any]] | None = None
+    if accessor.has_blobs:
+        blob_tables = ["blobs", "resources"] if accessor.has_resources else ["blobs"]
+        blobs = {
+            table: summarize(*accessor.get_blob_stats(table)) for table in blob_tables
+        }
+
+    codecs: dict[str, dict[str, typing.Any]] = {}
+    for codec, rows, stored, uncompressed in accessor.get_codec_stats():
+        totals = codecs.setdefault(codec, summarize(0, 0, 0))
+        codecs[codec] = summarize(
+            totals["rows"] + rows,
+            totals["stored_bytes"] + stored,
+            totals["uncompressed_bytes"] + uncompressed,
+        )
+
+    return {
+        "database_bytes": page_size * page_count,
+        "tables": tables,
+        "categories": categories,
+        "blobs": blobs,
+        "codecs": codecs,
+        "distributions": sorted(
+            distributions.values(), key=lambda d: d["stored_bytes"], reverse=True
+        ),
+        "largest_rows": [
+            {"table": table, "path": path, **summarize(1, stored, uncompressed)}
+            for table, path, stored, uncompressed in accessor.get_largest_rows(top)
+        ],
+    }
+
+
+def summarize(rows: int, stored: int, uncompressed: int) -> dict[str, typing.Any]:
+    return {
+        "rows": rows,
+        "stored_bytes": stored,
+        "uncompressed_bytes": uncompressed,
+        # The compression ratio is undefined when nothing is stored.
+        "compression_ratio": (uncompressed / stored) if stored else None,
+    }
@@ -14,8 +14,6 @@ def bundle(directory: pathlib.Path, accessor: Accessor) -> None:
     files = []
     for path in paths:
         rel_path = path.relative_to(directory)
-        if rel_path.suffix in {".so"}:
-            continue
         if rel_path.name == "__pycache__":
             continue
         if str(rel_path) == "bin":
@@ -0,0 +1,85 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+
+# Streamed files are copied into the cache in blocks of this size.
+COPY_SIZE = 256 * 1024
+
+
+def get_cache_directory() -> pathlib.Path:
+    """Get the directory where files are extracted from databases.
+
+    The ``SQLITEIMPORT_CACHE_DIR`` environment variable overrides the default,
+    which is a ``sqliteimport`` directory in the platform's user cache directory.
+    """
+
+    if os.environ.get("SQLITEIMPORT_CACHE_DIR"):
+        return pathlib.Path(os.environ["SQLITEIMPORT_CACHE_DIR"])
+
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/AppData/Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return pathlib.Path(base) / "sqliteimport"
+
+
+def materialize(contents: bytes | typing.BinaryIO, filename: str) -> pathlib.Path:
+    """Extract *contents* to a file named *filename* in the cache directory.
+
+    Files are stored in directories named after a hash of the filename and contents,
+    so files are extracted once and are then reused by every process.
+    Extraction writes to a staging directory that is then atomically renamed,
+    so concurrent processes never see partially-written files.
+
+    *contents* may be a binary file, which is streamed into the staging directory
+    and hashed as it is written, so large files are not read into memory.
+    """
+
+    digest = hashlib.sha256(filename.encode("utf-8") + b"\0")
+    root = get_cache_directory()
+    if isinstance(contents, bytes):
+        digest.update(contents)
+        path = root / digest.hexdigest() / filename
+        if path.is_file():
+            return path
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = pathlib.Path(tempfile.mkdtemp(prefix=".staging-", dir=root))
+    try:
+        if isinstance(contents, bytes):
+            (staging / filename).write_bytes(contents)
+        else:
+            with open(staging / filename, "wb") as file:
+                while chunk := contents.read(COPY_SIZE):
+                    digest.update(chunk)
+                    file.write(chunk)
+        directory = root / digest.hexdigest()
+        path = directory / filename
+        if path.is_file():
+            return path
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another process may have extracted the same file first.
+            if not path.is_file():
+                raise
+    finally:
+        # The staging directory only remains if the rename failed, or was not needed.
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return path
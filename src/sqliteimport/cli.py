@@ -3,15 +3,23 @@
 # SPDX-License-Identifier: MIT
 
 import itertools
+import json
 import pathlib
 import sqlite3
 import sys
 import textwrap
+import typing
 
+from . import analyzer
 from . import bundler
 from . import compiler
 from . import injector
+from . import merger
+from . import optimizer
+from . import splitter
+from .accessor import SCHEMA_VERSION
 from .accessor import Accessor
+from .errors import CompileError
 from .util import get_magic_number
 
 try:
@@ -64,7 +72,20 @@ def bundle(directory: pathlib.Path, database: pathlib.Path) -> None:
 @click.argument(
     "database", type=click.Path(dir_okay=False, file_okay=True, path_type=pathlib.Path)
 )
-def compile_(database: pathlib.Path) -> None:
+@click.option(
+    "--python",
+    "pythons",
+    multiple=True,
+    help=(
+        """
+        A Python interpreter to compile the source code with,
+        instead of the interpreter running sqliteimport.
+        This option can be used multiple times;
+        the interpreters compile the source code concurrently.
+        """
+    ),
+)
+def compile_(database: pathlib.Path, pythons: tuple[str, ...]) -> None:
     """Compile the source code in an existing database into bytecode.
 
     This results in a significant performance improvement.
@@ -78,10 +99,23 @@ def compile_(database: pathlib.Path) -> None:
 
     Therefore, this command should be run on all Python versions that are supported
     by the application importing from the database.
+    The `--python` option compiles the source code for several interpreters at once:
+
+    \b
+        sqliteimport compile packages.sqlite3 --python python3.12 --python python3.13
     """
 
     with sqlite3.connect(database) as connection:
         accessor = Accessor(connection)
+        if accessor.get_source_sidecar() is not None:
+            click.echo("The source code in the database has been stripped.")
+            sys.exit(1)
+        if accessor.get_cold_database() is not None:
+            click.echo("The database has been split.")
+            sys.exit(1)
+        if pythons:
+            compile_in_workers(accessor, pythons)
+            return
         existing_magic_numbers = accessor.get_magic_numbers()
         if get_magic_number() in existing_magic_numbers:
             identifier = existing_magic_numbers[get_magic_number()]
@@ -96,67 +130,251 @@ def compile_(database: pathlib.Path) -> None:
         connection.commit()
 
 
+def compile_in_workers(accessor: Accessor, pythons: tuple[str, ...]) -> None:
+    """Compile bytecode using other Python interpreters, and show the results."""
+
+    try:
+        compiled = compiler.compile_bytecode_in_workers(accessor, pythons)
+    except CompileError as error:
+        click.echo(str(error))
+        sys.exit(1)
+    accessor.connection.commit()
+
+    if not compiled:
+        click.echo("The source code has already been compiled for every interpreter.")
+        return
+    click.echo("The source code was compiled for these interpreters:")
+    for magic_number, python_identifier in compiled.items():
+        click.echo(f"* {python_identifier} (magic number {magic_number})")
+
+
 @group.command(name="describe", no_args_is_help=True)
 @click.argument(
     "database", type=click.Path(dir_okay=False, file_okay=True, path_type=pathlib.Path)
 )
-def describe(database: pathlib.Path) -> None:
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    help=(
+        """
+        Show stored and uncompressed sizes and compression ratios
+        by table, by category (source, bytecode, and resources), and by distribution,
+        as well as the largest rows in the database.
+        """
+    ),
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="The number of largest rows to show when `--stats` is used.",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    help="Show the information as JSON.",
+)
+def describe(database: pathlib.Path, show_stats: bool, top: int, as_json: bool) -> None:
     """Show information about the given database."""
 
-    table = prettytable.PrettyTable()
-    table.set_style(prettytable.TableStyle.DEFAULT)
-
     with sqlite3.connect(database) as connection:
         accessor = Accessor(connection)
 
         database_metadata = accessor.get_database_metadata()
+        magic_numbers = accessor.get_magic_numbers()
+        packages = get_package_versions(accessor)
+        stats = analyzer.analyze(accessor, top) if show_stats else None
+
+    if as_json:
+        document: dict[str, typing.Any] = {
+            "metadata": dict(database_metadata),
+            "magic_numbers": {str(k): v for k, v in magic_numbers.items()},
+            "packages": [{"name": n, "version": v} for n, v in packages],
+        }
+        if stats is not None:
+            document["stats"] = stats
+        click.echo(json.dumps(document, indent=2))
+        return
+
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+
+    table.align = "l"
+    table.field_names = ("Field", "Value")
+    table.add_rows(database_metadata)  # type: ignore[arg-type]
+    print("Database info:")
+    print()
+    print(textwrap.indent(str(table), "    "))
+
+    print()
+    if magic_numbers:
+        table.clear()
+        table.field_names = ("Magic Number", "Python interpreter")
+        table.add_rows(list(magic_numbers.items()))  # type: ignore[arg-type]
         table.align = "l"
-        table.field_names = ("Field", "Value")
-        table.add_rows(database_metadata)  # type: ignore[arg-type]
-        print("Database info:")
+        print("The source code has been pre-compiled to bytecode.")
+        print()
+        print("The bytecode magic numbers are shown below,")
+        print("along with the Python interpreter used for compilation:")
         print()
         print(textwrap.indent(str(table), "    "))
-
-        magic_numbers = accessor.get_magic_numbers()
+    else:
+        print("The source code has not been pre-compiled to bytecode.")
+
+    print()
+    if packages:
+        table.clear()
+        table.field_names = ("Package", "Version")
+        table.add_rows(packages)
+        table.align = "l"
+        print("The following packages are installed in the database:")
         print()
-        if magic_numbers:
-            table.clear()
-            table.field_names = ("Magic Number", "Python interpreter")
-            table.add_rows(list(magic_numbers.items()))  # type: ignore[arg-type]
-            table.align = "l"
-            print("The source code has been pre-compiled to bytecode.")
-            print()
-            print("The bytecode magic numbers are shown below,")
-            print("along with the Python interpreter used for compilation:")
-            print()
-            print(textwrap.indent(str(table), "    "))
-        else:
-            print("The source code has not been pre-compiled to bytecode.")
-
-        lines: list[list[str]] = []
-        for metadata_raw in accessor.iter_package_metadata():
-            metadata = metadata_raw.decode("utf-8", errors="ignore")
-            name = ""
-            version = ""
-            for line in itertools.takewhile(lambda s: bool(s), metadata.splitlines()):
-                if line.startswith("Name: "):
-                    name = line[len("Name: ") :].strip()
-                elif line.startswith("Version: "):
-                    version = line[len("Version: ") :].strip()
-            if name and version:
-                lines.append([name, version])
+        print(textwrap.indent(str(table), "    "))
+    else:
+        print("No installed packages were found.")
+
+    if stats is not None:
+        show_size_stats(stats)
+
+
+def get_package_versions(accessor: Accessor) -> list[list[str]]:
+    """Get the names and versions of packages installed in the database."""
+
+    lines: list[list[str]] = []
+    for metadata_raw in accessor.iter_package_metadata():
+        metadata = metadata_raw.decode("utf-8", errors="ignore")
+        name = ""
+        version = ""
+        for line in itertools.takewhile(lambda s: bool(s), metadata.splitlines()):
+            if line.startswith("Name: "):
+                name = line[len("Name: ") :].strip()
+            elif line.startswith("Version: "):
+                version = line[len("Version: ") :].strip()
+        if name and version:
+            lines.append([name, version])
+    return lines
 
+
+def show_size_stats(stats: dict[str, typing.Any]) -> None:
+    """Show the size stats generated by the analyzer."""
+
+    def format_ratio(ratio: float | None) -> str:
+        return "-" if ratio is None else f"{ratio:.2f}x"
+
+    size_fields = ("Rows", "Stored bytes", "Uncompressed bytes", "Ratio")
+
+    def format_sizes(sizes: dict[str, typing.Any]) -> list[typing.Any]:
+        return [
+            sizes["rows"],
+            sizes["stored_bytes"],
+            sizes["uncompressed_bytes"],
+            format_ratio(sizes["compression_ratio"]),
+        ]
+
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+
+    print()
+    print(f"The database file is {stats['database_bytes']} bytes.")
+    if stats["blobs"] is not None:
+        print("Identical contents are stored once.")
+        for blob_table, sizes in stats["blobs"].items():
+            print(
+                f"The {blob_table} table contains {sizes['rows']} unique blobs"
+                f" ({sizes['stored_bytes']} stored bytes)."
+            )
+
+    print()
+    table.field_names = ("Table", "Category", *size_fields)
+    for row in stats["tables"]:
+        table.add_row([row["table"], row["category"], *format_sizes(row)])
+    table.align = "r"
+    table.align["Table"] = table.align["Category"] = "l"
+    print("Sizes by table:")
+    print()
+    print(textwrap.indent(str(table), "    "))
+
+    print()
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+    table.field_names = ("Category", *size_fields)
+    for category, sizes in stats["categories"].items():
+        table.add_row([category, *format_sizes(sizes)])
+    table.align = "r"
+    table.align["Category"] = "l"
+    print("Sizes by category:")
+    print()
+    print(textwrap.indent(str(table), "    "))
+
+    print()
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+    table.field_names = ("Codec", *size_fields)
+    for codec, sizes in stats["codecs"].items():
+        table.add_row([codec, *format_sizes(sizes)])
+    table.align = "r"
+    table.align["Codec"] = "l"
+    print("Sizes by codec:")
+    print()
+    print(textwrap.indent(str(table), "    "))
+
+    print()
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+    table.field_names = (
+        "Distribution",
+        "Source",
+        "Bytecode",
+        "Resources",
+        *size_fields,
+    )
+    for distribution in stats["distributions"]:
+        categories = distribution["categories"]
+        table.add_row(
+            [
+                distribution["distribution"] or "(unknown)",
+                *(
+                    categories.get(category, {"stored_bytes": 0})["stored_bytes"]
+                    for category in ("source", "bytecode", "resource")
+                ),
+                *format_sizes(distribution),
+            ]
+        )
+    table.align = "r"
+    table.align["Distribution"] = "l"
+    print("Sizes by distribution (source, bytecode, and resources are stored bytes):")
+    print()
+    print(textwrap.indent(str(table), "    "))
+
+    if stats["largest_rows"]:
         print()
-        if lines:
-            table.clear()
-            table.field_names = ("Package", "Version")
-            table.add_rows(lines)
-            table.align = "l"
-            print("The following packages are installed in the database:")
-            print()
-            print(textwrap.indent(str(table), "    "))
-        else:
-            print("No installed packages were found.")
+        table = prettytable.PrettyTable()
+        table.set_style(prettytable.TableStyle.DEFAULT)
+        table.field_names = (
+            "Table",
+            "Path",
+            "Stored bytes",
+            "Uncompressed bytes",
+            "Ratio",
+        )
+        for row in stats["largest_rows"]:
+            table.add_row(
+                [
+                    row["table"],
+                    row["path"],
+                    row["stored_bytes"],
+                    row["uncompressed_bytes"],
+                    format_ratio(row["compression_ratio"]),
+                ]
+            )
+        table.align = "r"
+        table.align["Table"] = table.align["Path"] = "l"
+        print("The largest rows in the database:")
+        print()
+        print(textwrap.indent(str(table), "    "))
 
 
 DEFAULT_MARKER = "sqliteimport-inject-here"
@@ -261,3 +479,324 @@ def inject(
     code = target_file.read_text()
     rendered_target = injector.inject_prologue(prologue, code, marker)
     output_file.write_text(rendered_target)
+
+
+@group.command(name="merge", no_args_is_help=True)
+@click.argument(
+    "sources",
+    nargs=-1,
+    required=True,
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+)
+@click.argument(
+    "database", type=click.Path(dir_okay=False, file_okay=False, path_type=pathlib.Path)
+)
+@click.option(
+    "--precedence",
+    type=click.Choice(["first", "last"]),
+    default="first",
+    show_default=True,
+    help=(
+        """
+        Which source database takes precedence
+        when a file has different contents in several databases.
+        """
+    ),
+)
+def merge(
+    sources: tuple[pathlib.Path, ...], database: pathlib.Path, precedence: str
+) -> None:
+    """Merge several databases into a new database.
+
+    Files that are found in several databases are only stored once.
+    For example:
+
+    \b
+        sqliteimport merge app.sqlite3 dependencies.sqlite3 merged.sqlite3
+
+    Bytecode is merged for every Python interpreter
+    that all the source databases have been compiled for.
+    """
+
+    if precedence == "last":
+        sources = sources[::-1]
+
+    for source in sources:
+        with sqlite3.connect(source) as connection:
+            source_accessor = Accessor(connection)
+            stripped = source_accessor.get_source_sidecar() is not None
+            split = source_accessor.get_cold_database() is not None
+        connection.close()
+        if stripped:
+            click.echo(f"The source code in {source} has been stripped.")
+            sys.exit(1)
+        if split:
+            click.echo(f"{source} has been split.")
+            sys.exit(1)
+
+    with sqlite3.connect(database) as connection:
+        accessor = Accessor(connection)
+        accessor.initialize_database()
+
+        counts = merger.merge(sources, accessor)
+        connection.commit()
+
+    click.echo(
+        f"Merged {counts['files']} files from {len(sources)} databases"
+        f" ({counts['duplicates']} duplicates, {counts['conflicts']} conflicts)."
+    )
+
+
+@group.command(name="strip-source", no_args_is_help=True)
+@click.argument(
+    "database",
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+)
+@click.option(
+    "--sidecar",
+    type=click.Path(dir_okay=False, file_okay=False, path_type=pathlib.Path),
+    help=(
+        """
+        The database to move the source code to.
+        It must be in the same directory as the database.
+        By default, ".source" is added to the name of the database,
+        like "packages.source.sqlite3".
+        """
+    ),
+)
+def strip_source(database: pathlib.Path, sidecar: pathlib.Path | None) -> None:
+    """Move source code out of a compiled database, leaving only bytecode.
+
+    The source code is moved to a "sidecar" database.
+    If the sidecar database is present in the same directory as the database,
+    it is used to show source code in tracebacks.
+    Otherwise, the database can be distributed alone.
+
+    The source code must first be compiled for every Python interpreter
+    that will import from the database.
+    """
+
+    if sidecar is None:
+        sidecar = database.with_suffix(f".source{database.suffix}")
+    if sidecar.parent.resolve() != database.parent.resolve():
+        click.echo("The sidecar must be in the same directory as the database.")
+        sys.exit(1)
+
+    with sqlite3.connect(database) as connection:
+        accessor = Accessor(connection)
+        if accessor.get_source_sidecar() is not None:
+            click.echo("The source code in the database has already been stripped.")
+            sys.exit(1)
+        if not accessor.get_magic_numbers():
+            click.echo("The source code in the database has not been compiled.")
+            sys.exit(1)
+
+        moved = compiler.strip_source(accessor, sidecar)
+    connection.close()
+
+    click.echo(f"Moved the source code of {moved} modules to {sidecar}.")
+
+
+@group.command(name="split", no_args_is_help=True)
+@click.argument(
+    "database",
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+)
+@click.option(
+    "--cold-database",
+    type=click.Path(dir_okay=False, file_okay=False, path_type=pathlib.Path),
+    help=(
+        """
+        The database to move rarely used files to.
+        It must be in the same directory as the database.
+        By default, ".cold" is added to the name of the database,
+        like "packages.cold.sqlite3".
+        """
+    ),
+)
+@click.option(
+    "--pattern",
+    "patterns",
+    multiple=True,
+    help=(
+        """
+        A glob-style pattern of file paths to move to the cold database.
+        This option can be used multiple times.
+        By default, tests and type stubs are moved.
+        """
+    ),
+)
+@click.option(
+    "--trace",
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+    help=(
+        """
+        A JSON file of stats that were recorded while the application ran.
+        Modules that were not imported and resources that were not read
+        are moved to the cold database.
+        """
+    ),
+)
+def split(
+    database: pathlib.Path,
+    cold_database: pathlib.Path | None,
+    patterns: tuple[str, ...],
+    trace: pathlib.Path | None,
+) -> None:
+    """Move rarely used files into a separate "cold" database.
+
+    The cold database is only attached the first time that a module or file
+    cannot be found in the database, so imports read less data at startup.
+    Package metadata is never moved.
+
+    A trace can be recorded by enabling instrumentation
+    and writing the stats to a JSON file before the application exits:
+
+    \b
+        sqliteimport.enable_stats()
+        ...
+        json.dump(sqliteimport.get_stats(), file)
+    """
+
+    if cold_database is None:
+        cold_database = database.with_suffix(f".cold{database.suffix}")
+    if cold_database.parent.resolve() != database.parent.resolve():
+        click.echo("The cold database must be in the same directory as the database.")
+        sys.exit(1)
+
+    trace_data: splitter.Trace | None = None
+    if trace is not None:
+        stats = json.loads(trace.read_text())
+        trace_data = {
+            "modules": set(stats["modules"]),
+            "resources": set(stats["resources"]),
+        }
+
+    with sqlite3.connect(database) as connection:
+        accessor = Accessor(connection)
+        if accessor.get_cold_database() is not None:
+            click.echo("The database has already been split.")
+            sys.exit(1)
+        if not accessor.has_resources:
+            click.echo("The database must be migrated before it can be split.")
+            sys.exit(1)
+
+        moved = splitter.split(
+            accessor, cold_database, patterns or splitter.DEFAULT_PATTERNS, trace_data
+        )
+    connection.close()
+
+    click.echo(f"Moved {moved} files to {cold_database}.")
+
+
+@group.command(name="optimize", no_args_is_help=True)
+@click.argument(
+    "database",
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+)
+@click.option(
+    "--page-size",
+    type=click.Choice([str(size) for size in optimizer.PAGE_SIZES]),
+    help=(
+        """
+        The page size of the optimized database, in bytes.
+        By default, the page size is chosen based on the sizes of the rows.
+        """
+    ),
+)
+def optimize(database: pathlib.Path, page_size: str | None) -> None:
+    """Rebuild a database so that it is tuned for importing.
+
+    Rows are rebuilt in order of their module names,
+    so the modules in a package are stored near each other.
+    The page size is chosen to fit most rows in a single page,
+    and statistics are collected for sqlite's query planner.
+
+    The database should be optimized after it has been compiled,
+    since it will no longer be modified afterward.
+    """
+
+    with sqlite3.connect(database) as connection:
+        accessor = Accessor(connection)
+        if accessor.schema_version < SCHEMA_VERSION:
+            click.echo("The database must be migrated before it can be optimized.")
+            sys.exit(1)
+        before_page_size = connection.execute("PRAGMA page_size;").fetchone()[0]
+    connection.close()
+    before_size = database.stat().st_size
+    before_lookup = optimizer.benchmark_lookups(database)
+
+    output = database.with_name(f"{database.name}.optimizing")
+    output.unlink(missing_ok=True)
+    with sqlite3.connect(database) as connection:
+        after_page_size = optimizer.optimize(
+            Accessor(connection), output, int(page_size) if page_size else None
+        )
+    connection.close()
+    output.replace(database)
+    after_size = database.stat().st_size
+    after_lookup = optimizer.benchmark_lookups(database)
+
+    table = prettytable.PrettyTable()
+    table.set_style(prettytable.TableStyle.DEFAULT)
+    table.field_names = ("", "Before", "After")
+    table.add_rows(
+        [
+            ["File size (bytes)", before_size, after_size],
+            ["Page size (bytes)", before_page_size, after_page_size],
+            [
+                "Module lookup (µs)",
+                f"{before_lookup * 1_000_000:.1f}",
+                f"{after_lookup * 1_000_000:.1f}",
+            ],
+        ]
+    )
+    table.align = "r"
+    table.align[""] = "l"
+    print(textwrap.indent(str(table), "    "))
+
+
+@group.command(name="migrate", no_args_is_help=True)
+@click.argument(
+    "database",
+    type=click.Path(
+        exists=True, dir_okay=False, file_okay=True, path_type=pathlib.Path
+    ),
+)
+def migrate(database: pathlib.Path) -> None:
+    """Upgrade a database, in place, to the current schema version.
+
+    Databases created by older versions of sqliteimport can still be imported from,
+    but module lookups are faster after they are migrated.
+    Sidecar databases of stripped source code and cold databases
+    can be migrated separately.
+    """
+
+    with sqlite3.connect(database) as connection:
+        schema_version = Accessor(connection).schema_version
+    connection.close()
+    if schema_version >= SCHEMA_VERSION:
+        click.echo(f"The database already uses schema version {schema_version}.")
+        sys.exit(0)
+
+    output = database.with_name(f"{database.name}.migrating")
+    output.unlink(missing_ok=True)
+    with sqlite3.connect(database) as connection:
+        optimizer.migrate(Accessor(connection), output)
+    connection.close()
+    output.replace(database)
+
+    click.echo(
+        f"Migrated the database from schema version {schema_version}"
+        f" to schema version {SCHEMA_VERSION}."
+    )
@@ -2,17 +2,21 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+from __future__ import annotations
+
 import functools
 import marshal as marshal_
 import sys
 import types
-import typing
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
 
 __all__ = [
     "compression",
+    "get_lzma",
     "marshal",
-    "Traversable",
-    "TraversableResources",
 ]
 
 
@@ -26,7 +30,8 @@ if sys.version_info < (3, 13):
 
     @functools.wraps(marshal_.loads)
     def marshal_loads(value: bytes, **_: typing.Any) -> types.CodeType:
-        return typing.cast(types.CodeType, marshal_.loads(value))
+        code: types.CodeType = marshal_.loads(value)
+        return code
 
     marshal = types.SimpleNamespace()
     marshal.dumps = marshal_dumps
@@ -35,23 +40,28 @@ else:
     # No-op for Python 3.13 and higher.
     marshal = marshal_
 
-if sys.version_info >= (3, 11):
-    # Python 3.11 moved some abstract base classes.
-    from importlib.resources.abc import Traversable
-    from importlib.resources.abc import TraversableResources
-else:
-    from importlib.abc import Traversable
-    from importlib.abc import TraversableResources
-
-
 if sys.version_info < (3, 14):
     # Python 3.14 introduced the top-level `compression` module,
-    # which contains compression libraries like `lzma`.
+    # which contains compression libraries like `zlib`.
     # Mimic the Python 3.14 compression module namespace.
-    import lzma
+    import zlib
 
     compression = types.SimpleNamespace()
-    compression.lzma = lzma
+    compression.zlib = zlib
 else:
     # No-op for Python 3.14 and higher.
-    import compression.lzma
+    import compression.zlib
+
+
+def get_lzma() -> types.ModuleType:
+    """Import the `lzma` module.
+
+    Most contents are compressed using zlib,
+    so `lzma` is only imported when LZMA-compressed contents are found.
+    """
+
+    if sys.version_info < (3, 14):
+        import lzma
+    else:
+        from compression import lzma
+    return lzma
@@ -0,0 +1,60 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+# This program is run by other Python interpreters to compile source code.
+# It receives source code and returns bytecode as length-prefixed frames,
+# so it only uses the standard library; sqliteimport need not be installed.
+
+import marshal
+import struct
+import sys
+import typing
+
+# IGNORE: START
+# -------------
+# The lines here allow coherent type-checking of this file.
+# However, the lines are removed, and the contents of `util.py` are prepended,
+# when this program is rendered.
+from sqliteimport.util import get_magic_number
+from sqliteimport.util import get_python_identifier
+
+# -------------
+# IGNORE: END
+
+
+def read_frame(stream: typing.IO[bytes]) -> typing.Optional[bytes]:
+    header = stream.read(4)
+    if not header:
+        return None
+    (size,) = struct.unpack(">I", header)
+    return stream.read(size)
+
+
+def write_frame(stream: typing.IO[bytes], payload: bytes) -> None:
+    stream.write(struct.pack(">I", len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+
+def main() -> None:
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    write_frame(stdout, f"{get_magic_number()} {get_python_identifier()}".encode())
+
+    # Each request is a path frame followed by a source code frame.
+    # Each response is a status byte followed by bytecode or an error message.
+    while True:
+        path = read_frame(stdin)
+        source = read_frame(stdin)
+        if path is None or source is None:
+            break
+        try:
+            code = compile(source, path.decode(), mode="exec", dont_inherit=True)
+        except (SyntaxError, ValueError) as error:
+            write_frame(stdout, b"\x00" + str(error).encode())
+        else:
+            write_frame(stdout, b"\x01" + marshal.dumps(code))
+
+
+main()
@@ -2,8 +2,21 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+from __future__ import annotations
+
+import collections
+import importlib.resources
+import pathlib
+import queue
+import sqlite3
+import struct
+import subprocess
+import threading
+import typing
+
 from .accessor import Accessor
 from .compat import marshal
+from .errors import CompileError
 from .util import get_magic_number
 
 
@@ -22,3 +35,173 @@ def compile_bytecode(accessor: Accessor) -> None:
         accessor.add_bytecode(magic_number, fullname, path, is_package, bytecode)
 
     accessor.mark_magic_number(magic_number)
+
+
+def strip_source(accessor: Accessor, sidecar: pathlib.Path) -> int:
+    """Move the source code of modules to a new *sidecar* database.
+
+    Only bytecode remains in the database, which is then vacuumed to reclaim space.
+    The source code can still be used for tracebacks if the sidecar is present.
+    The number of moved files is returned.
+    """
+
+    with sqlite3.connect(sidecar) as connection:
+        Accessor(connection).initialize_database()
+        connection.commit()
+    connection.close()
+
+    accessor.register_digest_function()
+    moved = accessor.strip_source(sidecar)
+    accessor.connection.execute("VACUUM;")
+    return moved
+
+
+def compile_bytecode_in_workers(
+    accessor: Accessor, pythons: typing.Sequence[str]
+) -> dict[int, str]:
+    """Compile source code already in the database using other Python interpreters.
+
+    Each interpreter runs as a worker process, so all of them compile concurrently.
+    Source code is read and decompressed once, and is sent to every worker;
+    bytecode is written to the database as the workers return it.
+
+    Interpreters whose bytecode is already in the database are skipped.
+    The magic numbers and Python identifiers of the compiled bytecode are returned.
+    """
+
+    workers: list[Worker] = []
+    magic_numbers = set(accessor.get_magic_numbers())
+    try:
+        for python in pythons:
+            worker = Worker(python)
+            if worker.magic_number in magic_numbers:
+                worker.close()
+                worker.terminate()
+                continue
+            magic_numbers.add(worker.magic_number)
+            workers.append(worker)
+
+        for worker in workers:
+            accessor.create_bytecode_table(worker.magic_number)
+        for row in accessor.iter_source_code():
+            fullname, path, is_package, source = row
+            for worker in workers:
+                worker.send(fullname, path, is_package, source)
+                write_bytecode(accessor, worker, block=False)
+        for worker in workers:
+            worker.close()
+            write_bytecode(accessor, worker, block=True)
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+    for worker in workers:
+        accessor.mark_magic_number(worker.magic_number, worker.python_identifier)
+    return {worker.magic_number: worker.python_identifier for worker in workers}
+
+
+def write_bytecode(accessor: Accessor, worker: Worker, block: bool) -> None:
+    """Write the bytecode that *worker* has returned to the database.
+
+    If *block* is True, wait until the worker has returned all of its bytecode.
+    """
+
+    while worker.pending:
+        try:
+            status, payload = worker.results.get(block=block)
+        except queue.Empty:
+            return
+        fullname, path, is_package = worker.pending.popleft()
+        if status != 1:
+            message = payload.decode("utf-8", errors="replace")
+            raise CompileError(f"{worker.python} could not compile {path}: {message}")
+        accessor.add_bytecode(worker.magic_number, fullname, path, is_package, payload)
+
+
+class Worker:
+    """A Python interpreter that compiles source code in a separate process."""
+
+    def __init__(self, python: str) -> None:
+        self.python = python
+        try:
+            self.process = subprocess.Popen(
+                [python, "-c", get_worker_program()],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        except OSError as error:
+            raise CompileError(f"{python} could not be run: {error}") from error
+        assert self.process.stdin is not None and self.process.stdout is not None
+        self.stdin = self.process.stdin
+        self.stdout = self.process.stdout
+
+        header = read_frame(self.stdout)
+        if header is None:
+            self.terminate()
+            raise CompileError(f"{python} did not start a compiler worker.")
+        magic_number, _, self.python_identifier = header.decode().partition(" ")
+        self.magic_number = int(magic_number)
+
+        # Rows that have been sent, in order, and are waiting for bytecode.
+        self.pending: collections.deque[tuple[str, str, bool]] = collections.deque()
+        # Results are read by a thread, so the worker never blocks on a full pipe.
+        self.results: queue.Queue[tuple[int, bytes]] = queue.Queue()
+        self.thread = threading.Thread(target=self.read_results, daemon=True)
+        self.thread.start()
+
+    def send(self, fullname: str, path: str, is_package: bool, source: bytes) -> None:
+        self.pending.append((fullname, path, is_package))
+        try:
+            write_frame(self.stdin, path.encode())
+            write_frame(self.stdin, source)
+        except BrokenPipeError as error:
+            raise CompileError(f"{self.python} exited unexpectedly.") from error
+
+    def read_results(self) -> None:
+        while (frame := read_frame(self.stdout)) is not None:
+            self.results.put((frame[0], frame[1:]))
+        # The worker exited; unblock any remaining reads with an error.
+        self.results.put((0, b"the worker exited unexpectedly"))
+
+    def close(self) -> None:
+        """Signal that no more source code will be sent."""
+
+        self.stdin.close()
+
+    def terminate(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        if hasattr(self, "thread"):
+            self.thread.join()
+        self.stdin.close()
+        self.stdout.close()
+
+
+def read_frame(stream: typing.IO[bytes]) -> bytes | None:
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    (size,) = struct.unpack(">I", header)
+    return stream.read(size)
+
+
+def write_frame(stream: typing.IO[bytes], payload: bytes) -> None:
+    stream.write(struct.pack(">I", len(payload)))
+    stream.write(payload)
+
+
+def get_worker_program() -> str:
+    """Render the worker program, which only depends on the standard library."""
+
+    files = importlib.resources.files("sqliteimport")
+    lines = files.joinpath("util.py").read_text().splitlines()
+    drop_lines = False
+    for line in files.joinpath("compiler-worker.py").read_text().splitlines():
+        if line.endswith("# IGNORE: START"):
+            drop_lines = True
+        elif line.endswith("# IGNORE: END"):
+            drop_lines = False
+        elif not drop_lines:
+            lines.append(line)
+    return "\n".join(lines)
@@ -12,3 +12,11 @@ class FileNotFoundInDatabaseError(SqliteImportError, FileNotFoundError):
         super().__init__(
             2, "File not found in database", filename, None, database_path or ":memory:"
         )
+
+
+class CompileError(SqliteImportError):
+    pass
+
+
+class AttachLimitError(SqliteImportError):
+    pass
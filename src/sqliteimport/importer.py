@@ -4,184 +4,591 @@
 
 from __future__ import annotations
 
-import importlib.abc
 import importlib.machinery
-import importlib.metadata
-import io
-import os.path
-import pathlib
+import itertools
+import os
 import sqlite3
 import sys
-import tokenize
+import time
 import types
-import typing
 
+from . import instrumentation
 from .accessor import Accessor
-from .compat import Traversable
-from .compat import TraversableResources
+from .util import is_extension_module
 
+# Importing sqliteimport and loading a database must be fast,
+# so modules that are slow to import, like `typing` and `importlib.metadata`,
+# are only imported for type checking, or when they are first needed.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import importlib.metadata
+    import typing
 
-class SqliteFinder(importlib.metadata.DistributionFinder):
-    def __init__(self, database: pathlib.Path | sqlite3.Connection) -> None:
-        if isinstance(database, pathlib.Path):
-            self.database = database
-            self.connection = sqlite3.connect(database)
-        else:  # isinstance(database, sqlite3.Connection)
-            self.database = pathlib.Path(Accessor.get_database_path(database))
+    from .metadata import SqliteDistribution
+    from .resources import SqliteTraversableResources
+
+# Database pages are read through a memory map, instead of being copied
+# into each connection's page cache, so every interpreter shares one copy.
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+class SqliteFinder:
+    """Find modules in a database.
+
+    The finder is also found by `importlib.metadata`,
+    which calls `find_distributions()` on every finder in ``sys.meta_path``.
+    """
+
+    def __init__(
+        self,
+        database: (
+            str
+            | os.PathLike[str]
+            | sqlite3.Connection
+            | typing.Sequence[str | os.PathLike[str]]
+        ),
+    ) -> None:
+        overlays: list[str] = []
+        if isinstance(database, sqlite3.Connection):
+            self.database = Accessor.get_database_path(database)
             self.connection = database
+        else:
+            if isinstance(database, (str, os.PathLike)):
+                self.database = os.fspath(database)
+            else:  # Layered databases
+                self.database, *overlays = [os.fspath(path) for path in database]
+            # Modules may be imported by any thread; accessors serialize queries.
+            # URIs allow the shared module index to be attached.
+            self.connection = sqlite3.connect(
+                get_database_uri(self.database), uri=True, check_same_thread=False
+            )
+            self.connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
         self.accessor = Accessor(self.connection)
 
+        # Layers are searched in order, so earlier layers override later layers.
+        self.layers: list[tuple[str, Accessor]] = [(self.database, self.accessor)]
+        for number, overlay in enumerate(overlays, 1):
+            accessor = self.accessor.attach(overlay, f"layer{number}")
+            self.layers.append((overlay, accessor))
+        if overlays:
+            self.accessor.create_module_index([layer[1] for layer in self.layers])
+        # The locations that module filenames and package paths are inside.
+        self.locations = {
+            database: self.get_location(database) for database, _ in self.layers
+        }
+
     def find_spec(
         self,
         fullname: str,
         path: typing.Sequence[str] | None,
         target: types.ModuleType | None = None,
     ) -> importlib.machinery.ModuleSpec | None:
-        result = self.accessor.find_spec(fullname)
+        stats = instrumentation.active
+        start_ns = time.perf_counter_ns() if stats else 0
+        if len(self.layers) == 1:
+            database, accessor = self.database, self.accessor
+        else:
+            # A single index lookup determines which layer contains the module.
+            layer = self.accessor.find_layer(fullname)
+            if layer is None:
+                return self.find_cold_spec(fullname, start_ns)
+            database, accessor = self.layers[layer]
+        result = accessor.find_spec(fullname)
         if result is None:
             return None
+        return self.build_spec(fullname, database, accessor, result, start_ns)
 
+    def find_cold_spec(
+        self, fullname: str, start_ns: int
+    ) -> importlib.machinery.ModuleSpec | None:
+        """Search the cold databases of each layer, in order.
+
+        Cold databases are not in the module index,
+        so they are only attached and searched if the index has no match.
+        """
+
+        for database, accessor in self.layers:
+            cold_accessor = accessor.get_cold_accessor()
+            if cold_accessor is None:
+                continue
+            result = cold_accessor.find_spec(fullname)
+            if result is not None:
+                return self.build_spec(fullname, database, accessor, result, start_ns)
+        return None
+
+    def build_spec(
+        self,
+        fullname: str,
+        database: str,
+        accessor: Accessor,
+        result: tuple[str, bytes | types.CodeType, bool],
+        start_ns: int,
+    ) -> importlib.machinery.ModuleSpec:
+        """Build a module spec from the result of a database lookup."""
+
+        stats = instrumentation.active
         path, source, is_package = result
+        if isinstance(source, bytes) and is_extension_module(path):
+            spec = self.get_extension_spec(fullname, path, source)
+            if stats:
+                stats.record_find(fullname, start_ns)
+            return spec
+
         if isinstance(source, types.CodeType):
             code = source
+        elif stats:
+            compile_start_ns = time.perf_counter_ns()
+            code = compile(source, filename=path, mode="exec", dont_inherit=True)
+            stats.record("compile", compile_start_ns)
         else:  # isinstance(source, bytes)
             code = compile(source, filename=path, mode="exec", dont_inherit=True)
-        spec = importlib.machinery.ModuleSpec(
+        location = self.locations[database]
+        if not loader_registered:
+            register_loader()
+        loader = SqliteLoader(fullname, location, path, is_package, code, accessor)
+        spec = SqliteModuleSpec(
             name=fullname,
-            loader=SqliteLoader(code, self.accessor),
-            origin=self.database.name,
+            # The loader implements `importlib.abc.InspectLoader` without inheriting.
+            loader=loader,  # type: ignore[arg-type]
+            origin=loader.get_filename(fullname),
             is_package=is_package,
         )
         spec.has_location = True
         if isinstance(source, types.CodeType):
-            spec.cached = self.database.name
+            # The bytecode is cached in the database, not beside a source file.
+            spec.cached = location
         else:
             spec.cached = None
+        if is_package:
+            # The path hook finds the package's submodules in the path entry,
+            # so `pkgutil` can list them.
+            spec.submodule_search_locations = [
+                os.path.join(location, *fullname.split("."))
+            ]
+
+        if stats:
+            stats.record_find(fullname, start_ns)
+        return spec
+
+    def get_location(self, database: str) -> str:
+        """Get the location of a database, which files in the database are inside.
+
+        Module filenames and package ``__path__`` entries are in the location,
+        as if the database were a directory.
+        """
+
+        # Deserialized databases report a name that is not a file, like "x".
+        if os.path.isfile(database):
+            return os.path.abspath(database)
+        # The database is not associated with a file,
+        # so the location must not collide with a directory,
+        # and must not be reused by another database.
+        return f"{MEMORY_LOCATION_PREFIX}{next(memory_location_numbers)}>"
+
+    def iter_modules(self, prefix: str = "") -> typing.Iterator[tuple[str, bool]]:
+        """List the top-level modules, for `pkgutil.iter_modules()`."""
+
+        for name, is_package in self.list_modules("").items():
+            yield prefix + name, is_package
+
+    def list_modules(self, package: str) -> dict[str, bool]:
+        """List the modules directly inside a package, in every layer.
+
+        If a module is found in several layers, the earliest layer takes precedence.
+        """
 
+        if len(self.layers) == 1:
+            return self.accessor.list_modules(package)
+        modules: dict[str, bool] = {}
+        for _, accessor in self.layers:
+            for name, is_package in accessor.list_modules(package).items():
+                modules.setdefault(name, is_package)
+        return dict(sorted(modules.items()))
+
+    @staticmethod
+    def get_extension_spec(
+        fullname: str, path: str, contents: bytes
+    ) -> importlib.machinery.ModuleSpec:
+        """Extract an extension module to the cache so that it can be loaded."""
+
+        from . import cache
+
+        filename = str(cache.materialize(contents, path.rpartition("/")[2]))
+        spec = importlib.machinery.ModuleSpec(
+            name=fullname,
+            loader=importlib.machinery.ExtensionFileLoader(fullname, filename),
+            origin=filename,
+        )
+        spec.has_location = True
         return spec
 
     def find_distributions(
         self,
         context: importlib.metadata.DistributionFinder.Context | None = None,
     ) -> typing.Generator[SqliteDistribution]:
+        import importlib.metadata
+
+        from .metadata import SqliteDistribution
+
         if context is None:
             context = importlib.metadata.DistributionFinder.Context()
 
-        for module in self.accessor.find_distributions(context.name):
-            yield SqliteDistribution(module, self.connection)
+        seen: set[str] = set()
+        for _, accessor in self.layers:
+            for module in accessor.find_distributions(context.name):
+                if module not in seen:
+                    seen.add(module)
+                    yield SqliteDistribution(module, accessor)
+
+
+class SqliteModuleSpec(importlib.machinery.ModuleSpec):
+    """A module spec whose ``cached`` attribute is never derived from its origin.
+
+    `importlib.machinery.ModuleSpec` derives a ``__pycache__`` path
+    from a ``.py`` origin, but modules in databases have no such path.
+    """
 
+    database_cached: str | None = None
 
-class SqliteLoader(importlib.abc.InspectLoader):
-    def __init__(self, code: types.CodeType, accessor: Accessor) -> None:
-        self.code = code
+    @property
+    def cached(self) -> str | None:
+        return self.database_cached
+
+    @cached.setter
+    def cached(self, cached: str | None) -> None:
+        self.database_cached = cached
+
+
+class SqlitePathEntryFinder:
+    """Find modules in a database on ``sys.path``, or in a package's ``__path__``.
+
+    `pkgutil.iter_modules()` and `pkgutil.walk_packages()` use this finder
+    to list submodules without probing the database for each name.
+
+    Path entry finders are cached in ``sys.path_importer_cache`` indefinitely,
+    so they refer to databases by location, and find their finder when used.
+    Package entries are searched using the finder in ``sys.meta_path``
+    that the package was imported from, if it is still there.
+    """
+
+    __slots__ = ("location", "package")
+
+    def __init__(self, location: str, package: str) -> None:
+        self.location = location
+        self.package = package
+
+    def get_finder(self) -> SqliteFinder | None:
+        if self.package:
+            for meta_path_finder in sys.meta_path:
+                if (
+                    isinstance(meta_path_finder, SqliteFinder)
+                    and self.location in meta_path_finder.locations.values()
+                ):
+                    return meta_path_finder
+        finder = path_finders.get(self.location)
+        if finder is None and os.path.isfile(self.location):
+            finder = get_path_finder(self.location)
+        return finder
+
+    def find_spec(
+        self,
+        fullname: str,
+        target: types.ModuleType | None = None,
+    ) -> importlib.machinery.ModuleSpec | None:
+        finder = self.get_finder()
+        if finder is None:
+            return None
+        return finder.find_spec(fullname, None, target)
+
+    def iter_modules(self, prefix: str = "") -> typing.Iterator[tuple[str, bool]]:
+        finder = self.get_finder()
+        if finder is None:
+            return
+        for name, is_package in finder.list_modules(self.package).items():
+            yield prefix + name, is_package
+
+
+class SqliteLoader:
+    """Load a module from a database.
+
+    A loader is kept for as long as its module, as ``module.__spec__.loader``,
+    so its code object is released once the module has been executed.
+    The loader implements ``importlib.abc.InspectLoader``,
+    ``importlib.abc.ExecutionLoader``, and ``importlib.abc.ResourceLoader``,
+    but does not inherit from them, because `importlib.abc` is slow to import.
+    It is registered as a virtual subclass once `importlib.abc` is imported;
+    see `register_loader()`.
+    """
+
+    __slots__ = ("name", "location", "path", "package", "code", "accessor")
+
+    def __init__(
+        self,
+        name: str,
+        location: str,
+        path: str,
+        is_package: bool,
+        code: types.CodeType,
+        accessor: Accessor,
+    ) -> None:
+        self.name = name
+        # The location of the database, and the path of the module inside it.
+        self.location = location
+        self.path = path
+        self.package = bool(is_package)
+        self.code: types.CodeType | None = code
         self.accessor = accessor
 
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> None:
+        """Use the default module creation semantics."""
+
     def exec_module(self, module: types.ModuleType) -> None:
-        exec(self.code, module.__dict__)
+        code = self.get_code(module.__name__)
+        self.code = None
+        stats = instrumentation.active
+        if stats:
+            start_ns = time.perf_counter_ns()
+            try:
+                exec(code, module.__dict__)
+            finally:
+                stats.record_exec(module.__name__, start_ns)
+            return
+        exec(code, module.__dict__)
+
+    def check_name(self, fullname: str) -> None:
+        """Ensure that *fullname* is the module that the loader was created for."""
+
+        if fullname != self.name:
+            raise ImportError(
+                f"The loader for {self.name} cannot handle {fullname}.", name=fullname
+            )
+
+    def is_package(self, fullname: str) -> bool:
+        self.check_name(fullname)
+        return self.package
+
+    def get_filename(self, fullname: str) -> str:
+        """Get the filename of the module, which is inside the database's location.
+
+        The filename is used as the module's ``__file__``.
+        """
+
+        self.check_name(fullname)
+        return os.path.join(self.location, *self.path.split("/"))
+
+    def get_data(self, path: str) -> bytes:
+        """Get the contents of a file in the database.
+
+        *path* may be inside the database's location, like the module's filename,
+        or relative to the database.
+        This allows `pkgutil.get_data()` to read files in packages.
+        """
+
+        prefix = self.location + os.sep
+        if path.startswith(prefix):
+            path = path[len(prefix) :]
+        return self.accessor.get_data(path.replace(os.sep, "/"))
+
+    def get_code(self, fullname: str) -> types.CodeType:
+        """Get the code object of a module.
+
+        After the module has been executed, the code object is found again.
+        """
+
+        if self.code is not None and fullname == self.name:
+            return self.code
+        result = self.accessor.find_spec(fullname)
+        if result is None:
+            raise ImportError(f"{fullname} was not found", name=fullname)
+        path, source, _ = result
+        if isinstance(source, types.CodeType):
+            return source
+        return compile(source, filename=path, mode="exec", dont_inherit=True)
 
     def get_resource_reader(self, fullname: str) -> SqliteTraversableResources:
+        from .resources import SqliteTraversableResources
+
         return SqliteTraversableResources(fullname, self.accessor)
 
     def get_source(self, fullname: str) -> str:
-        raw_content = self.accessor.get_file(fullname=fullname)
-        encoding, _ = tokenize.detect_encoding(io.BytesIO(raw_content).readline)
-        return raw_content.decode(encoding)
+        return self.accessor.get_source(fullname)
 
 
-def load(database: pathlib.Path | str | sqlite3.Connection) -> None:
-    if isinstance(database, (pathlib.Path, str)):
-        if not os.path.isfile(database):
-            raise FileNotFoundError(f"{database} must exist.")
-        database = pathlib.Path(database)
-    sys.meta_path.append(SqliteFinder(database))
+def register_loader() -> None:
+    """Register `SqliteLoader` as a virtual subclass of ``ExecutionLoader``.
 
+    `importlib.abc` is slow to import, so the loader is only registered
+    once something else has imported it. This is checked when sqliteimport
+    is imported, and when a module spec is built, so loaders of modules that
+    are imported after `importlib.abc` pass ``isinstance()`` checks.
+    """
 
-class SqliteDistribution(importlib.metadata.Distribution):
-    def __init__(self, name: str, connection: sqlite3.Connection) -> None:
-        self.__name = name
-        self.__connection = connection
-        self.__accessor = Accessor(connection)
+    global loader_registered
+    abc = sys.modules.get("importlib.abc")
+    if abc is not None:
+        abc.ExecutionLoader.register(SqliteLoader)
+        loader_registered = True
 
-    def locate_file(self, path: typing.Any) -> pathlib.Path:
-        raise NotImplementedError()
 
-    def read_text(self, filename: str) -> str:
-        raw_content = self.__accessor.get_file(path=f"{self.__name}-%/{filename}")
-        return raw_content.decode("utf-8")
+loader_registered = False
 
 
-class SqliteTraversableResources(TraversableResources):
-    def __init__(self, fullname: str, accessor: Accessor) -> None:
-        self.fullname = fullname
-        self.accessor = accessor
+def load(
+    database: (
+        str
+        | os.PathLike[str]
+        | sqlite3.Connection
+        | typing.Sequence[str | os.PathLike[str]]
+    ),
+) -> None:
+    """Load a database so that its packages can be imported.
 
-    def files(self) -> SqliteTraversable:
-        return SqliteTraversable(self.fullname, self.accessor)
+    If a list of databases is given, a single finder searches all of them.
+    Modules in earlier databases override modules in later databases.
+    """
+
+    if isinstance(database, sqlite3.Connection):
+        sys.meta_path.append(SqliteFinder(database))
+        return
 
+    paths = [database] if isinstance(database, (str, os.PathLike)) else database
+    if not paths:
+        raise ValueError("At least one database must be given.")
+    for path in paths:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{path} must exist.")
+    layers = [os.fspath(path) for path in paths]
+    if len(layers) == 1:
+        sys.meta_path.append(SqliteFinder(layers[0]))
+    else:
+        sys.meta_path.append(SqliteFinder(layers))
 
-class SqliteTraversable(Traversable):
-    def __init__(self, path: str, accessor: Accessor) -> None:
-        self._path = path
-        self._accessor = accessor
 
-    def iterdir(self) -> typing.Iterator[SqliteTraversable]:
-        for path in self._accessor.list_directory(self._path):
-            yield SqliteTraversable(path, self._accessor)
+def load_environment() -> None:
+    """Load the databases listed in the ``SQLITEIMPORT_DATABASES`` variable.
 
-    def joinpath(self, *descendants: str) -> SqliteTraversable:
-        return SqliteTraversable(
-            f"{self._path}/{'/'.join(descendants)}", self._accessor
-        )
+    Like ``PYTHONPATH``, the paths are separated by `os.pathsep`,
+    and paths that do not exist are ignored.
+    The databases are loaded as layers, so earlier databases take precedence.
+    """
 
-    def __truediv__(self, other: str) -> SqliteTraversable:
-        return self.joinpath(other)
+    paths = os.environ.get("SQLITEIMPORT_DATABASES", "").split(os.pathsep)
+    databases = [path for path in paths if path and os.path.isfile(path)]
+    if databases:
+        load(databases)
 
-    def is_dir(self) -> bool:
-        return False
 
-    def is_file(self) -> bool:
-        return True
+# Databases on ``sys.path`` must have this suffix.
+DATABASE_SUFFIX = ".sqlite3"
 
-    @typing.overload
-    def open(
-        self,
-        mode: typing.Literal["r"] = ...,
-        encoding: str | None = ...,
-        errors: str | None = ...,
-    ) -> io.StringIO: ...
+# Databases that are not files have locations like "<sqliteimport 1>".
+MEMORY_LOCATION_PREFIX = "<sqliteimport "
+memory_location_numbers = itertools.count(1)
 
-    @typing.overload
-    def open(
-        self,
-        mode: typing.Literal["rb"] = ...,
-        encoding: str | None = ...,
-        errors: str | None = ...,
-    ) -> io.BytesIO: ...
+# Finders for the databases on ``sys.path``, by absolute path.
+path_finders: dict[str, SqliteFinder] = {}
+
+
+def install_path_hook() -> None:
+    """Find modules in databases on ``sys.path``, in ``sys.path`` order.
 
-    def open(
+    The path hook is added before the path hooks for zip files and directories.
+    """
+
+    if path_hook in sys.path_hooks:
+        return
+    sys.path_hooks.insert(0, path_hook)
+    sys.meta_path.append(SqlitePathDistributionFinder())
+
+    # Databases that were searched before the path hook was added
+    # are cached as having no finder.
+    for entry, finder in list(sys.path_importer_cache.items()):
+        if finder is None and entry.endswith(DATABASE_SUFFIX):
+            del sys.path_importer_cache[entry]
+
+
+def path_hook(entry: str) -> SqlitePathEntryFinder:
+    """Get a finder for a ``sys.path`` entry, if it is a database.
+
+    Packages in databases have ``__path__`` entries inside the database's location,
+    like ``packages.sqlite3/package``, so those entries are supported, too.
+    """
+
+    if entry.endswith(DATABASE_SUFFIX):
+        if not os.path.isfile(entry):
+            raise ImportError(f"{entry} must exist.", path=entry)
+        return SqlitePathEntryFinder(os.path.abspath(entry), "")
+
+    if entry.startswith(MEMORY_LOCATION_PREFIX):
+        location, separator, directory = entry.partition(">" + os.sep)
+        location += ">"
+    else:
+        database, separator, directory = entry.partition(DATABASE_SUFFIX + os.sep)
+        location = os.path.abspath(database + DATABASE_SUFFIX)
+    if not separator:
+        raise ImportError("Only databases are supported.", path=entry)
+    finder = SqlitePathEntryFinder(location, directory.replace(os.sep, "."))
+    if finder.get_finder() is None:
+        raise ImportError(f"{location} must be loaded or exist.", path=entry)
+    return finder
+
+
+def get_path_finder(database: str) -> SqliteFinder:
+    """Get the finder for a database on ``sys.path``.
+
+    Each database is only opened once, no matter how many entries refer to it.
+    """
+
+    key = os.path.abspath(database)
+    finder = path_finders.get(key)
+    if finder is None:
+        new_finder = SqliteFinder(database)
+        # Another thread may have opened the database at the same time.
+        finder = path_finders.setdefault(key, new_finder)
+        if finder is not new_finder:
+            new_finder.connection.close()
+    return finder
+
+
+class SqlitePathDistributionFinder:
+    """Find distributions in the databases on ``sys.path``.
+
+    `importlib.metadata` only searches for distributions using the finders
+    in ``sys.meta_path``, so this finder is added to it.
+    It does not find modules; `PathFinder` finds them using the path hook.
+    """
+
+    __slots__ = ()
+
+    def find_spec(
         self,
-        mode: str = "r",
-        encoding: str | None = None,
-        errors: str | None = None,
-        *_: typing.Any,
-        **__: typing.Any,
-    ) -> io.StringIO | io.BytesIO:
-        encoding = encoding if encoding is not None else "utf-8"
-        errors = errors if errors is not None else "strict"
-        content = self._accessor.get_file(path=self._path)
-        if "b" in mode:
-            return io.BytesIO(content)
-
-        return io.StringIO(content.decode(encoding, errors=errors))
-
-    def read_text(self, encoding: str | None = None, errors: str | None = None) -> str:
-        encoding = encoding if encoding is not None else "utf-8"
-        errors = errors if errors is not None else "strict"
-        return self._accessor.get_file(path=self._path).decode(encoding, errors)
-
-    def read_bytes(self) -> bytes:
-        return self._accessor.get_file(path=self._path)
+        fullname: str,
+        path: typing.Sequence[str] | None,
+        target: types.ModuleType | None = None,
+    ) -> None:
+        return None
 
-    @property
-    def name(self) -> str:
-        return pathlib.PurePosixPath(self._path).name
+    def find_distributions(
+        self,
+        context: importlib.metadata.DistributionFinder.Context | None = None,
+    ) -> typing.Generator[SqliteDistribution]:
+        entries = sys.path if context is None else context.path
+        for entry in entries:
+            if entry.endswith(DATABASE_SUFFIX) and os.path.isfile(entry):
+                yield from get_path_finder(entry).find_distributions(context)
+
+
+def get_database_uri(path: str) -> str:
+    """Get a sqlite URI for the database at *path*.
+
+    This is like `pathlib.Path.as_uri()`, which is slow to import.
+    """
+
+    uri_path = os.path.abspath(path).replace(os.sep, "/")
+    if not uri_path.startswith("/"):
+        # Windows paths start with a drive letter, like "C:/".
+        uri_path = f"/{uri_path}"
+    # sqlite decodes percent-encoded characters in URI paths.
+    for character in "%?#":
+        uri_path = uri_path.replace(character, f"%{ord(character):02X}")
+    return f"file://{uri_path}"
@@ -91,12 +91,11 @@ class DictLoader(importlib.abc.InspectLoader):
 
 
 # Import sqliteimport.
+# The finder is not removed, because some sqliteimport modules are imported lazily.
 sys.meta_path.insert(0, DictFinder(sqliteimport_modules))
 import sqliteimport  # noqa: E402
 
-del sys.meta_path[0]
-
 # Load the database in-memory.
-connection = sqlite3.connect(":memory:")
+connection = sqlite3.connect(":memory:", check_same_thread=False)
 connection.deserialize(database)
 sqliteimport.load(connection)
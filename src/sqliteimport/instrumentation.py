@@ -0,0 +1,178 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import threading
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+
+    SlowImportCallback = typing.Callable[[str, float], None]
+
+# Phases are the distinct steps that sqliteimport takes to import a module.
+PHASES = ("sql", "decompress", "unmarshal", "compile", "exec")
+
+
+class Stats:
+    def __init__(
+        self,
+        slow_import_threshold: float | None,
+        on_slow_import: SlowImportCallback | None,
+    ) -> None:
+        self.slow_import_threshold_ns: int | None = None
+        if slow_import_threshold is not None:
+            self.slow_import_threshold_ns = int(slow_import_threshold * 1_000_000_000)
+        self.on_slow_import = on_slow_import
+        # Modules may be imported by several threads at once.
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts: dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.durations_ns: dict[str, int] = dict.fromkeys(PHASES, 0)
+        # Histograms count durations in power-of-two microsecond buckets.
+        # For example, bucket 3 counts durations between 4µs and 8µs.
+        self.histograms: dict[str, dict[int, int]] = {phase: {} for phase in PHASES}
+        self.tables: dict[str, dict[str, int]] = {}
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.slow_imports = 0
+        # The modules that were imported and the resources that were read,
+        # which can be used to decide which files are rarely used.
+        self.modules: set[str] = set()
+        self.resources: set[str] = set()
+        # Module lookup durations, pending the execution of the module.
+        self.pending_ns: dict[str, int] = {}
+
+    def record(self, phase: str, start_ns: int) -> int:
+        """Record the duration of a phase that started at *start_ns*.
+
+        The duration, in nanoseconds, is returned.
+        """
+
+        duration_ns = time.perf_counter_ns() - start_ns
+        bucket = (duration_ns // 1_000).bit_length()
+        with self.lock:
+            self.counts[phase] += 1
+            self.durations_ns[phase] += duration_ns
+            histogram = self.histograms[phase]
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        return duration_ns
+
+    def record_lookup(self, table: str, hit: bool) -> None:
+        with self.lock:
+            counts = self.tables.setdefault(table, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def record_decompression(self, compressed: int, decompressed: int) -> None:
+        with self.lock:
+            self.compressed_bytes += compressed
+            self.decompressed_bytes += decompressed
+
+    def record_resource(self, path: str) -> None:
+        with self.lock:
+            self.resources.add(path)
+
+    def record_find(self, fullname: str, start_ns: int) -> None:
+        """Record how long it took to find and prepare a module for execution."""
+
+        with self.lock:
+            self.modules.add(fullname)
+            self.pending_ns[fullname] = time.perf_counter_ns() - start_ns
+
+    def record_exec(self, fullname: str, start_ns: int) -> None:
+        """Record a module's execution, and report it if the import was slow.
+
+        The import duration includes the module lookup and execution.
+        Like ``python -X importtime`` cumulative times,
+        execution includes the time spent importing any nested imports.
+        """
+
+        duration_ns = self.record("exec", start_ns)
+        with self.lock:
+            duration_ns += self.pending_ns.pop(fullname, 0)
+        threshold_ns = self.slow_import_threshold_ns
+        if threshold_ns is None or duration_ns < threshold_ns:
+            return
+
+        with self.lock:
+            self.slow_imports += 1
+        if self.on_slow_import is not None:
+            self.on_slow_import(fullname, duration_ns / 1_000_000_000)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        with self.lock:
+            return {
+                "phases": {
+                    phase: {
+                        "count": self.counts[phase],
+                        "total_seconds": self.durations_ns[phase] / 1_000_000_000,
+                        "histogram_us": {
+                            # Bucket upper bounds, in microseconds.
+                            1 << bucket: count
+                            for bucket, count in sorted(self.histograms[phase].items())
+                        },
+                    }
+                    for phase in PHASES
+                },
+                "tables": {
+                    table: dict(counts) for table, counts in self.tables.items()
+                },
+                "compressed_bytes": self.compressed_bytes,
+                "decompressed_bytes": self.decompressed_bytes,
+                "slow_imports": self.slow_imports,
+                "modules": sorted(self.modules),
+                "resources": sorted(self.resources),
+            }
+
+
+# Instrumentation is opt-in, so this is None unless it is enabled.
+# When disabled, the only cost in the hot paths is a check that this is None.
+active: Stats | None = None
+
+
+def enable_stats(
+    *,
+    slow_import_threshold: float | None = None,
+    on_slow_import: SlowImportCallback | None = None,
+) -> None:
+    """Enable instrumentation of imports from sqlite databases.
+
+    If *slow_import_threshold* (in seconds) is given,
+    imports that take at least that long are counted as slow imports,
+    and *on_slow_import* is called with the module name and duration in seconds.
+
+    Enabling instrumentation again replaces any previously-collected stats.
+    """
+
+    global active
+    active = Stats(slow_import_threshold, on_slow_import)
+
+
+def disable_stats() -> None:
+    """Disable instrumentation and discard any collected stats."""
+
+    global active
+    active = None
+
+
+def reset_stats() -> None:
+    """Reset the collected stats without disabling instrumentation."""
+
+    if active is not None:
+        active.reset()
+
+
+def get_stats() -> dict[str, typing.Any] | None:
+    """Get a snapshot of the collected stats.
+
+    None is returned if instrumentation is not enabled.
+    """
+
+    if active is None:
+        return None
+    return active.snapshot()
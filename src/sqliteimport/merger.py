@@ -0,0 +1,54 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import pathlib
+import typing
+
+from .accessor import Accessor
+
+
+def merge(
+    databases: typing.Sequence[pathlib.Path], accessor: Accessor
+) -> dict[str, int]:
+    """Merge several databases into the database that *accessor* is connected to.
+
+    If a file is found in several databases, it is merged from the first database.
+    Rows are copied by sqlite, using bulk queries between attached databases.
+
+    Bytecode for a given Python interpreter is only merged
+    if the source code in every database has been compiled for that interpreter.
+    """
+
+    python_identifiers: dict[int, str] = {}
+    magic_numbers: set[int] | None = None
+    for database in databases:
+        source = accessor.attach(database, "source")
+        source_magic_numbers = source.get_magic_numbers()
+        source.detach()
+        if magic_numbers is None:
+            magic_numbers = set(source_magic_numbers)
+        else:
+            magic_numbers &= set(source_magic_numbers)
+        python_identifiers = source_magic_numbers | python_identifiers
+
+    counts = {"files": 0, "duplicates": 0, "conflicts": 0}
+    accessor.create_merge_index()
+    for number, database in enumerate(databases):
+        source = accessor.attach(database, "source")
+        files, duplicates, conflicts = accessor.merge_code(source, number)
+        counts["files"] += files
+        counts["duplicates"] += duplicates
+        counts["conflicts"] += conflicts
+        for magic_number in sorted(magic_numbers or ()):
+            accessor.merge_bytecode(source, number, magic_number)
+        # Databases cannot be detached in the middle of a transaction.
+        accessor.connection.commit()
+        source.detach()
+
+    for magic_number in sorted(magic_numbers or ()):
+        accessor.mark_magic_number(magic_number, python_identifiers[magic_number])
+
+    return counts
@@ -0,0 +1,24 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import importlib.metadata
+import pathlib
+import typing
+
+from .accessor import Accessor
+
+
+class SqliteDistribution(importlib.metadata.Distribution):
+    def __init__(self, name: str, accessor: Accessor) -> None:
+        self.__name = name
+        self.__accessor = accessor
+
+    def locate_file(self, path: typing.Any) -> pathlib.Path:
+        raise NotImplementedError()
+
+    def read_text(self, filename: str) -> str:
+        raw_content = self.__accessor.get_file(path=f"{self.__name}-%/{filename}")
+        return raw_content.decode("utf-8")
@@ -0,0 +1,134 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import pathlib
+import sqlite3
+import statistics
+import time
+import typing
+
+from .accessor import Accessor
+
+# sqlite supports page sizes from 512 bytes to 64 KiB,
+# but pages smaller than a typical filesystem block only add overhead.
+PAGE_SIZES = (4096, 8192, 16384, 32768, 65536)
+
+# Rows must fit in a page, alongside the page header and cell overhead,
+# or the rest of the row is stored in a chain of overflow pages.
+PAGE_OVERHEAD = 64
+
+# The fraction of rows that should fit in a single page.
+FITTING_ROWS = 0.9
+
+
+def choose_page_size(sizes: typing.Sequence[int]) -> int:
+    """Choose the smallest page size that most rows fit in.
+
+    Rows that do not fit in a single page require reading overflow pages,
+    while larger pages increase the amount of data read for each lookup.
+    """
+
+    if not sizes:
+        return PAGE_SIZES[0]
+    sizes = sorted(sizes)
+    size = sizes[min(len(sizes) - 1, int(len(sizes) * FITTING_ROWS))]
+    for page_size in PAGE_SIZES:
+        if size + PAGE_OVERHEAD <= page_size:
+            return page_size
+    return PAGE_SIZES[-1]
+
+
+def rebuild(accessor: Accessor, output: pathlib.Path, page_size: int) -> None:
+    """Rebuild the database that *accessor* is connected to into a new *output* file.
+
+    The new database uses the current schema version,
+    and its rows are clustered by module name.
+    """
+
+    with sqlite3.connect(output) as connection:
+        # The page size can only be set before any tables are created.
+        connection.execute(f"PRAGMA page_size = {page_size};")
+        rebuilt = Accessor(connection)
+        rebuilt.initialize_database()
+        connection.execute("DELETE FROM sqliteimport WHERE field != 'version';")
+        connection.executemany(
+            "INSERT INTO sqliteimport (field, value) VALUES (?, ?);",
+            [row for row in accessor.get_database_metadata() if row[0] != "version"],
+        )
+        for magic_number, python_identifier in accessor.get_magic_numbers().items():
+            rebuilt.create_bytecode_table(magic_number)
+            rebuilt.mark_magic_number(magic_number, python_identifier)
+        connection.commit()
+    connection.close()
+
+    destination = accessor.attach(output, "rebuilt")
+    if accessor.has_resources:
+        accessor.copy_files(destination)
+    else:
+        accessor.register_digest_function()
+        accessor.copy_legacy_files(destination)
+    # Databases cannot be detached in the middle of a transaction.
+    accessor.connection.commit()
+    destination.detach()
+
+
+def optimize(
+    accessor: Accessor, output: pathlib.Path, page_size: int | None = None
+) -> int:
+    """Rebuild the database that *accessor* is connected to into a new *output* file.
+
+    Rows are clustered by module name, so the modules in a package share pages.
+    The page size is chosen based on the sizes of the rows, unless it is given.
+    Statistics are collected for the query planner, and the database is vacuumed.
+
+    The page size of the new database is returned.
+    """
+
+    if page_size is None:
+        page_size = choose_page_size(accessor.get_blob_sizes())
+    rebuild(accessor, output, page_size)
+
+    with sqlite3.connect(output) as connection:
+        connection.execute("ANALYZE;")
+        connection.commit()
+        connection.execute("VACUUM;")
+    connection.close()
+    return page_size
+
+
+def migrate(accessor: Accessor, output: pathlib.Path) -> None:
+    """Migrate the database that *accessor* is connected to into a new *output* file.
+
+    The new database uses the current schema version.
+    Its page size is the same as the original database.
+    """
+
+    page_size: int = accessor.connection.execute("PRAGMA page_size;").fetchone()[0]
+    rebuild(accessor, output, page_size)
+
+
+def benchmark_lookups(database: pathlib.Path, repeat: int = 5) -> float:
+    """Measure the median time, in seconds, to find and load a module.
+
+    Each module is looked up *repeat* times, and its fastest lookup is used.
+    """
+
+    connection = sqlite3.connect(database)
+    accessor = Accessor(connection)
+    fullnames = sorted({fullname for fullname, _ in accessor.iter_paths() if fullname})
+    durations: list[float] = []
+    for fullname in fullnames:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            accessor.find_spec(fullname)
+            best = min(best, time.perf_counter() - start)
+        durations.append(best)
+    connection.close()
+
+    if not durations:
+        return 0.0
+    return statistics.median(durations)
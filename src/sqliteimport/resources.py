@@ -0,0 +1,122 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import contextlib
+import importlib.resources
+import io
+import pathlib
+import sys
+import typing
+
+from . import cache
+from .accessor import Accessor
+
+if sys.version_info >= (3, 11):
+    # Python 3.11 moved some abstract base classes.
+    from importlib.resources.abc import Traversable
+    from importlib.resources.abc import TraversableResources
+else:
+    from importlib.abc import Traversable
+    from importlib.abc import TraversableResources
+
+
+class SqliteTraversableResources(TraversableResources):
+    def __init__(self, fullname: str, accessor: Accessor) -> None:
+        self.fullname = fullname
+        self.accessor = accessor
+
+    def files(self) -> SqliteTraversable:
+        return SqliteTraversable(self.fullname, self.accessor)
+
+
+class SqliteTraversable(Traversable):
+    def __init__(self, path: str, accessor: Accessor) -> None:
+        self._path = path
+        self._accessor = accessor
+
+    def iterdir(self) -> typing.Iterator[SqliteTraversable]:
+        for path in self._accessor.list_directory(self._path):
+            yield SqliteTraversable(path, self._accessor)
+
+    def joinpath(self, *descendants: str) -> SqliteTraversable:
+        return SqliteTraversable(
+            f"{self._path}/{'/'.join(descendants)}", self._accessor
+        )
+
+    def __truediv__(self, other: str) -> SqliteTraversable:
+        return self.joinpath(other)
+
+    def is_dir(self) -> bool:
+        return False
+
+    def is_file(self) -> bool:
+        return True
+
+    @typing.overload
+    def open(
+        self,
+        mode: typing.Literal["r"] = ...,
+        encoding: str | None = ...,
+        errors: str | None = ...,
+    ) -> typing.TextIO: ...
+
+    @typing.overload
+    def open(
+        self,
+        mode: typing.Literal["rb"] = ...,
+        encoding: str | None = ...,
+        errors: str | None = ...,
+    ) -> typing.BinaryIO: ...
+
+    def open(
+        self,
+        mode: str = "r",
+        encoding: str | None = None,
+        errors: str | None = None,
+        *_: typing.Any,
+        **__: typing.Any,
+    ) -> typing.TextIO | typing.BinaryIO:
+        encoding = encoding if encoding is not None else "utf-8"
+        errors = errors if errors is not None else "strict"
+        file = self._accessor.open_file(self._path)
+        if "b" in mode:
+            return file
+
+        if isinstance(file, io.BytesIO):
+            return io.StringIO(file.getvalue().decode(encoding, errors=errors))
+        # Large resources are streamed, and are decoded as they are read.
+        return io.TextIOWrapper(file, encoding=encoding, errors=errors, newline="")
+
+    def read_text(self, encoding: str | None = None, errors: str | None = None) -> str:
+        encoding = encoding if encoding is not None else "utf-8"
+        errors = errors if errors is not None else "strict"
+        return self._accessor.get_file(path=self._path).decode(encoding, errors)
+
+    def read_bytes(self) -> bytes:
+        return self._accessor.get_file(path=self._path)
+
+    @property
+    def name(self) -> str:
+        return pathlib.PurePosixPath(self._path).name
+
+
+@contextlib.contextmanager
+def _as_file(traversable: SqliteTraversable) -> typing.Iterator[pathlib.Path]:
+    """Extract a resource to the cache, instead of to a new temporary file.
+
+    Extracted resources are reused by every process, and are never deleted.
+    """
+
+    # Large resources are streamed into the cache, one chunk at a time.
+    with traversable.open("rb") as file:
+        path = cache.materialize(file, traversable.name)
+    yield path
+
+
+# `importlib.resources.as_file()` is a single-dispatch function.
+typing.cast(typing.Any, importlib.resources.as_file).register(
+    SqliteTraversable, _as_file
+)
@@ -0,0 +1,81 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+from __future__ import annotations
+
+import fnmatch
+import pathlib
+import sqlite3
+import typing
+
+from .accessor import Accessor
+
+# Files that are bundled with packages but are rarely, if ever, used at runtime.
+DEFAULT_PATTERNS = (
+    "tests/*",
+    "*/tests/*",
+    "test/*",
+    "*/test/*",
+    "*.pyi",
+)
+
+
+# A trace maps "modules" and "resources" to the modules that were imported
+# and the resources that were read, as reported by ``sqliteimport.get_stats()``.
+Trace = typing.Mapping[str, typing.Collection[str]]
+
+
+def is_cold(
+    fullname: str, path: str, patterns: typing.Sequence[str], trace: Trace | None
+) -> bool:
+    """Determine whether a file belongs in the cold database.
+
+    Package metadata is always kept in the primary database,
+    so that distributions can be found without attaching the cold database.
+    """
+
+    if ".dist-info/" in path:
+        return False
+    if any(fnmatch.fnmatchcase(path, pattern) for pattern in patterns):
+        return True
+    if trace is None:
+        return False
+    if fullname:
+        return fullname not in trace["modules"]
+    return path not in trace["resources"]
+
+
+def split(
+    accessor: Accessor,
+    cold: pathlib.Path,
+    patterns: typing.Sequence[str],
+    trace: Trace | None = None,
+) -> int:
+    """Move rarely used files to a new *cold* database.
+
+    Files are moved if their paths match any of the glob-style *patterns*.
+    If a *trace* is given, modules that were not imported
+    and resources that were not read are also moved.
+
+    The database is vacuumed to reclaim space.
+    The number of moved files is returned.
+    """
+
+    with sqlite3.connect(cold) as connection:
+        cold_accessor = Accessor(connection)
+        cold_accessor.initialize_database()
+        for magic_number, python_identifier in accessor.get_magic_numbers().items():
+            cold_accessor.create_bytecode_table(magic_number)
+            cold_accessor.mark_magic_number(magic_number, python_identifier)
+        connection.commit()
+    connection.close()
+
+    paths = [
+        path
+        for fullname, path in accessor.iter_paths()
+        if is_cold(fullname, path, patterns, trace)
+    ]
+    moved = accessor.split(cold, paths)
+    accessor.connection.execute("VACUUM;")
+    return moved
@@ -2,9 +2,14 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+import importlib.machinery
 import importlib.util
 import sys
 
+# Extension module file names include platform and ABI tags,
+# like "example.cpython-313-x86_64-linux-gnu.so" and "example.cp313-win_amd64.pyd".
+EXTENSION_MODULE_SUFFIXES = (".so", ".pyd")
+
 
 def get_magic_number() -> int:
     return int.from_bytes(importlib.util.MAGIC_NUMBER[:2], "little")
@@ -29,3 +34,37 @@ def get_python_identifier() -> str:
         identifier += f" [{pypy_version}]"
 
     return identifier
+
+
+def is_extension_module(path: str) -> bool:
+    """Determine whether *path* appears to be an extension module for any platform."""
+
+    return path.endswith(EXTENSION_MODULE_SUFFIXES)
+
+
+def is_loadable_extension_module(path: str) -> bool:
+    """Determine whether *path* is an extension module for the current interpreter."""
+
+    # "x/y.cpython-313-x86_64-linux-gnu.so" -> ".cpython-313-x86_64-linux-gnu.so"
+    _, _, suffix = path.rpartition("/")[2].partition(".")
+    return f".{suffix}" in importlib.machinery.EXTENSION_SUFFIXES
+
+
+def get_module_name(path: str) -> str:
+    """Get the name of the module that *path* would be added to a database as.
+
+    An empty string is returned if *path* is not a module, like a resource.
+    """
+
+    # "x/y/__init__.py" -> "x.y", "x/y/z.py" -> "x.y.z"
+    directory, _, name = path.rpartition("/")
+    if name == "__init__.py":
+        return directory.replace("/", ".")
+    if name.endswith(".py"):
+        return path[:-3].replace("/", ".")
+    if is_extension_module(name):
+        # "x/y/z.cpython-313-x86_64-linux-gnu.so" -> "x.y.z"
+        module = f"{directory}/{name.partition('.')[0]}".lstrip("/")
+        if all(part.isidentifier() for part in module.split("/")):
+            return module.replace("/", ".")
+    return ""
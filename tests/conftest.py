@@ -12,11 +12,22 @@ import pytest
 import sqliteimport
 import sqliteimport.accessor
 import sqliteimport.bundler
+import sqliteimport.importer
 
 installed_projects = pathlib.Path(__file__).parent / "installed-projects"
 sys.path.append(str(installed_projects / "filesystem"))
 
 
+@pytest.fixture(scope="session", autouse=True)
+def cache_directory(tmp_path_factory):
+    """Extract files from databases to a temporary directory."""
+
+    directory = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SQLITEIMPORT_CACHE_DIR", str(directory))
+        yield directory
+
+
 @pytest.fixture(scope="session")
 def database():
     with sqlite3.connect(":memory:") as connection:
@@ -28,6 +39,58 @@ def database():
         yield connection
 
 
+@pytest.fixture
+def create_database():
+    """Create a database file containing the given files and their contents."""
+
+    def create_database(
+        path: pathlib.Path, files: dict[str, str | bytes]
+    ) -> pathlib.Path:
+        source = path.with_suffix("")
+        for name, contents in files.items():
+            (source / name).parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(contents, bytes):
+                (source / name).write_bytes(contents)
+            else:
+                (source / name).write_text(contents)
+
+        with sqlite3.connect(path) as connection:
+            accessor = sqliteimport.accessor.Accessor(connection)
+            accessor.initialize_database()
+            for name in files:
+                accessor.add_file(source, pathlib.Path(name))
+        connection.close()
+        return path
+
+    return create_database
+
+
+@pytest.fixture
+def load(module_prefix):
+    """Load databases with new finders, and remove them and their modules afterward.
+
+    Test modules define the ``module_prefix`` fixture,
+    and modules whose names start with the prefix are removed.
+    """
+
+    finders = []
+
+    def load(database):
+        finder = sqliteimport.importer.SqliteFinder(database)
+        sys.meta_path.insert(0, finder)
+        finders.append(finder)
+        return finder
+
+    yield load
+
+    for finder in finders:
+        sys.meta_path.remove(finder)
+        finder.connection.close()
+    for name in list(sys.modules):
+        if name.startswith(module_prefix):
+            del sys.modules[name]
+
+
 @pytest.fixture(scope="session")
 def ignore_tempermental_deprecations():
     # Between 3.11 and 3.12.9, Python would throw DeprecationWarning when calling
@@ -0,0 +1,62 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import random
+import sqlite3
+
+import sqliteimport.accessor
+import sqliteimport.analyzer
+
+
+def test_analyze(database):
+    accessor = sqliteimport.accessor.Accessor(database)
+    stats = sqliteimport.analyzer.analyze(accessor, top=2)
+
+    assert stats["database_bytes"] > 0
+    assert stats["categories"]["source"]["rows"] > 0
+    assert stats["categories"]["resource"]["uncompressed_bytes"] > 0
+    assert len(stats["largest_rows"]) == 2
+    assert (
+        stats["largest_rows"][0]["stored_bytes"]
+        >= stats["largest_rows"][1]["stored_bytes"]
+    )
+
+    distributions = {d["distribution"]: d for d in stats["distributions"]}
+    package = distributions["package_sqlite"]
+    assert package["categories"]["source"]["rows"] == 4
+    assert package["categories"]["resource"]["rows"] > 0
+
+
+def test_identical_contents_are_stored_once(tmp_path, create_database):
+    files = {"a/__init__.py": "", "b/__init__.py": "", "c/py.typed": ""}
+    path = create_database(tmp_path / "duplicates.sqlite3", files)
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        stats = sqliteimport.analyzer.analyze(accessor, top=0)
+        assert accessor.get_file(path="c/py.typed") == b""
+    connection.close()
+
+    assert stats["categories"]["source"]["rows"] == 2
+    assert stats["blobs"]["blobs"]["rows"] == 1
+    assert stats["blobs"]["resources"]["rows"] == 1
+
+
+def test_codecs(tmp_path, create_database):
+    files = {
+        "tiny.py": "",
+        "module.py": "value = 1\n" * 1000,
+        "data/random.bin": random.randbytes(4096),
+    }
+    path = create_database(tmp_path / "codecs.sqlite3", files)
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        stats = sqliteimport.analyzer.analyze(accessor, top=0)
+        for name, contents in files.items():
+            if isinstance(contents, str):
+                contents = contents.encode()
+            assert accessor.get_file(path=name) == contents
+    connection.close()
+
+    assert stats["codecs"]["raw"]["rows"] == 2
+    assert stats["codecs"]["fast"]["rows"] == 1
@@ -0,0 +1,86 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.machinery
+import importlib.resources
+import pathlib
+import sqlite3
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.cache
+import sqliteimport.importer
+
+
+def test_materialize_reuses_files(cache_directory):
+    path = sqliteimport.cache.materialize(b"contents", "file.txt")
+    assert path.read_bytes() == b"contents"
+    assert path.name == "file.txt"
+    assert path.parent.parent == cache_directory
+
+    assert sqliteimport.cache.materialize(b"contents", "file.txt") == path
+    assert sqliteimport.cache.materialize(b"other", "file.txt") != path
+    assert sqliteimport.cache.materialize(b"contents", "other.txt") != path
+
+
+def test_as_file_uses_cache(database, cache_directory):
+    resource = importlib.resources.files("package_sqlite") / "resource.txt"
+    with importlib.resources.as_file(resource) as path:
+        assert cache_directory in path.parents
+        assert path.read_text().strip() == "resource"
+
+
+def test_extension_module(cache_directory):
+    json_module = pytest.importorskip("_json")
+    if not getattr(json_module, "__file__", None):
+        pytest.skip("_json is a built-in module")
+    extension = pathlib.Path(json_module.__file__)
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    accessor.add_file(extension.parent, pathlib.Path(extension.name))
+
+    finder = sqliteimport.importer.SqliteFinder(connection)
+    spec = finder.find_spec("_json", None)
+    connection.close()
+
+    assert isinstance(spec.loader, importlib.machinery.ExtensionFileLoader)
+    origin = pathlib.Path(spec.origin)
+    assert cache_directory in origin.parents
+    assert origin.name == extension.name
+    assert origin.read_bytes() == extension.read_bytes()
+
+
+def test_extension_module_for_other_platform(tmp_path):
+    (tmp_path / "other.cpython-99-fake.so").write_bytes(b"")
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    accessor.add_file(tmp_path, pathlib.Path("other.cpython-99-fake.so"))
+
+    finder = sqliteimport.importer.SqliteFinder(connection)
+    assert finder.find_spec("other", None) is None
+    connection.close()
+
+
+def test_source_for_other_platform(tmp_path):
+    """Source code is imported if a bundled extension module cannot be loaded."""
+
+    (tmp_path / "other.cpython-99-fake.so").write_bytes(b"")
+    (tmp_path / "other.py").write_text("value = 1")
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    accessor.add_file(tmp_path, pathlib.Path("other.cpython-99-fake.so"))
+    accessor.add_file(tmp_path, pathlib.Path("other.py"))
+
+    finder = sqliteimport.importer.SqliteFinder(connection)
+    spec = finder.find_spec("other", None)
+    assert spec.origin.endswith("other.py")
+    assert spec.loader.get_source("other") == "value = 1"
+    connection.close()
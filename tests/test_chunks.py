@@ -0,0 +1,86 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.resources
+import io
+import sqlite3
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.cache
+import sqliteimport.merger
+import sqliteimport.resources
+
+CONTENTS = "".join(f"line {i}\n" for i in range(100))
+
+
+@pytest.fixture
+def chunked(tmp_path, create_database, monkeypatch):
+    monkeypatch.setattr(sqliteimport.accessor, "CHUNK_SIZE", 64)
+    path = create_database(
+        tmp_path / "chunks.sqlite3",
+        {"data/large.txt": CONTENTS, "data/copy.txt": CONTENTS},
+    )
+    connection = sqlite3.connect(path)
+    yield connection
+    connection.close()
+
+
+def test_large_resources_are_stored_in_chunks(chunked):
+    chunks, resources = chunked.execute(
+        "SELECT count(*), count(DISTINCT resource_id) FROM resource_chunks;"
+    ).fetchone()
+    assert resources == 1
+    assert chunks == -(-len(CONTENTS) // 64)
+
+
+def test_streaming_reads(chunked):
+    accessor = sqliteimport.accessor.Accessor(chunked)
+    with accessor.open_file("data/large.txt") as file:
+        assert file.read(7) == b"line 0\n"
+        file.seek(-8, io.SEEK_END)
+        assert file.read() == b"line 99\n"
+        file.seek(60)
+        assert file.read(10) == CONTENTS[60:70].encode()
+
+    assert accessor.get_file(path="data/copy.txt") == CONTENTS.encode()
+
+
+def test_traversable(chunked):
+    accessor = sqliteimport.accessor.Accessor(chunked)
+    traversable = sqliteimport.resources.SqliteTraversable("data/large.txt", accessor)
+    with traversable.open("r") as file:
+        assert file.readline() == "line 0\n"
+        assert file.read() == CONTENTS.partition("\n")[2]
+    assert traversable.read_text() == CONTENTS
+
+
+def test_as_file_streams_chunks(chunked, cache_directory, monkeypatch):
+    accessor = sqliteimport.accessor.Accessor(chunked)
+    traversable = sqliteimport.resources.SqliteTraversable("data/large.txt", accessor)
+
+    # The resource is copied into the cache without reading all of it at once.
+    monkeypatch.setattr(sqliteimport.cache, "COPY_SIZE", 64)
+    monkeypatch.setattr(accessor, "get_file", None)
+    with importlib.resources.as_file(traversable) as path:
+        assert path.read_text() == CONTENTS
+    with importlib.resources.as_file(traversable) as again:
+        assert again == path
+    assert path == sqliteimport.cache.materialize(CONTENTS.encode(), "large.txt")
+    assert list(cache_directory.glob(".staging-*")) == []
+
+
+def test_merge_copies_chunks(chunked):
+    path = sqliteimport.accessor.Accessor.get_database_path(chunked)
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+
+    counts = sqliteimport.merger.merge([path, path], accessor)
+
+    assert counts == {"files": 2, "duplicates": 2, "conflicts": 0}
+    assert accessor.get_file(path="data/large.txt") == CONTENTS.encode()
+    assert connection.execute("SELECT count(*) FROM resources;").fetchone() == (1,)
+    connection.close()
@@ -2,12 +2,75 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+import importlib.util
+import json
+import sqlite3
+
 import pytest
 
+import sqliteimport.accessor
+import sqliteimport.compiler
+
+HAS_CLI_DEPENDENCIES = all(
+    importlib.util.find_spec(name) for name in ("click", "prettytable")
+)
 
+
+@pytest.mark.skipif(HAS_CLI_DEPENDENCIES, reason="CLI dependencies are installed")
 def test_output_when_missing_cli_dependencies(capsys):
     with pytest.raises(SystemExit):
         import sqliteimport.cli  # noqa: F401  # imported by unused
 
     _, stderr = capsys.readouterr()
     assert "sqliteimport is not installed with CLI support" in stderr
+
+
+@pytest.fixture
+def describe(tmp_path, create_database):
+    """Run the ``describe`` command against a database with every kind of row."""
+
+    pytest.importorskip("click")
+    pytest.importorskip("prettytable")
+    import click.testing
+
+    import sqliteimport.cli
+
+    database = create_database(
+        tmp_path / "described.sqlite3",
+        {
+            "described/__init__.py": "value = 1",
+            "described/data.txt": "data",
+            "described-1.0.dist-info/METADATA": "Name: described\nVersion: 1.0\n",
+        },
+    )
+    with sqlite3.connect(database) as connection:
+        sqliteimport.compiler.compile_bytecode(
+            sqliteimport.accessor.Accessor(connection)
+        )
+    connection.close()
+
+    def describe(*arguments):
+        result = click.testing.CliRunner().invoke(
+            sqliteimport.cli.group, ["describe", str(database), *arguments]
+        )
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    return describe
+
+
+def test_describe_stats(describe):
+    output = describe("--stats")
+
+    assert "described" in output
+    assert "The blobs table contains" in output
+    assert "The resources table contains" in output
+    assert "Sizes by table:" in output
+    assert "Sizes by codec:" in output
+
+
+def test_describe_stats_json(describe):
+    document = json.loads(describe("--stats", "--json"))
+
+    assert document["packages"] == [{"name": "described", "version": "1.0"}]
+    assert set(document["stats"]["blobs"]) == {"blobs", "resources"}
@@ -2,6 +2,7 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+import importlib.abc
 import importlib.machinery
 import importlib.metadata
 import importlib.resources
@@ -14,6 +15,7 @@ import pytest
 import sqliteimport
 import sqliteimport.accessor
 import sqliteimport.bundler
+import sqliteimport.metadata
 from sqliteimport.errors import FileNotFoundInDatabaseError
 
 
@@ -210,7 +212,7 @@ def test_distribution_finding(database):
     """Verify that sqliteimport doesn't discover packages it isn't responsible for."""
 
     name = f"p{uuid.uuid4().hex}"
-    discovered = list(sqliteimport.importer.SqliteDistribution.discover(name=name))
+    discovered = list(sqliteimport.metadata.SqliteDistribution.discover(name=name))
     assert discovered == []
 
 
@@ -236,3 +238,17 @@ def test_find_distributions_finds_everything(database):
         "package-sqlite",
     }
     assert distribution_names & expected_names == expected_names
+
+
+def test_code_is_released_after_execution(database):
+    module = importlib.import_module("module_sqlite")
+    loader = module.__spec__.loader
+    assert isinstance(loader, importlib.abc.InspectLoader)
+    assert not hasattr(loader, "__dict__")
+    assert loader.code is None
+
+    # The code object is found again if it is needed.
+    code = loader.get_code("module_sqlite")
+    namespace = {}
+    exec(code, namespace)
+    assert namespace["x"] == "module"
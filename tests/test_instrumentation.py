@@ -0,0 +1,59 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.util
+
+import pytest
+
+import sqliteimport
+import sqliteimport.importer
+
+
+@pytest.fixture
+def stats():
+    sqliteimport.enable_stats()
+    yield
+    sqliteimport.disable_stats()
+
+
+def test_stats_are_disabled_by_default():
+    assert sqliteimport.get_stats() is None
+
+
+def test_stats(database, stats):
+    finder = sqliteimport.importer.SqliteFinder(database)
+    assert finder.find_spec("bogus", None) is None
+    spec = finder.find_spec("package_sqlite.shift_jis", None)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    stats = sqliteimport.get_stats()
+    assert stats["tables"]["code"] == {"hits": 1, "misses": 1}
+    assert stats["phases"]["sql"]["count"] == 2
+    assert stats["phases"]["decompress"]["count"] == 1
+    assert stats["phases"]["compile"]["count"] == 1
+    assert stats["phases"]["exec"]["count"] == 1
+    assert sum(stats["phases"]["exec"]["histogram_us"].values()) == 1
+    assert stats["decompressed_bytes"] > 0
+
+    sqliteimport.reset_stats()
+    assert sqliteimport.get_stats()["phases"]["sql"]["count"] == 0
+
+
+def test_slow_import_callback(database):
+    slow_imports = []
+    sqliteimport.enable_stats(
+        slow_import_threshold=0,
+        on_slow_import=lambda name, seconds: slow_imports.append(name),
+    )
+    try:
+        finder = sqliteimport.importer.SqliteFinder(database)
+        spec = finder.find_spec("module_sqlite", None)
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+        stats = sqliteimport.get_stats()
+    finally:
+        sqliteimport.disable_stats()
+
+    assert slow_imports == ["module_sqlite"]
+    assert stats["slow_imports"] == 1
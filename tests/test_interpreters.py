@@ -0,0 +1,55 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+import sqliteimport.importer
+
+interpreters = pytest.importorskip("concurrent.interpreters")
+
+
+@pytest.fixture
+def layers(tmp_path, create_database):
+    return [
+        create_database(
+            tmp_path / "hotfix.sqlite3",
+            {"isolated/fixed.py": "layer = 'hotfix'"},
+        ),
+        create_database(
+            tmp_path / "base.sqlite3",
+            {
+                "isolated/__init__.py": "",
+                "isolated/fixed.py": "layer = 'base'",
+                "isolated/other.py": "layer = 'base'",
+            },
+        ),
+    ]
+
+
+def test_load_in_subinterpreter(layers):
+    finder = sqliteimport.importer.SqliteFinder(layers)
+    finder.connection.execute(
+        "DELETE FROM module_index.module_index WHERE fullname = 'isolated.other';"
+    )
+    finder.connection.commit()
+
+    # Subinterpreters have their own GIL, and their own `sys.meta_path`.
+    interpreter = interpreters.create()
+    try:
+        interpreter.exec(
+            f"""if True:
+            import importlib.util
+            import sqliteimport
+
+            sqliteimport.load({[str(layer) for layer in layers]!r})
+            import isolated.fixed
+            assert isolated.fixed.layer == "hotfix"
+
+            # The module index that the main interpreter built is reused.
+            assert importlib.util.find_spec("isolated.other") is None
+            """
+        )
+    finally:
+        interpreter.close()
+        finder.connection.close()
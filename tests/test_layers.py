@@ -0,0 +1,119 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.util
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import sqliteimport
+import sqliteimport.accessor
+import sqliteimport.errors
+import sqliteimport.importer
+
+
+@pytest.fixture
+def finder(tmp_path, create_database):
+    layers = [
+        create_database(
+            tmp_path / "hotfix.sqlite3",
+            {"layered/fixed.py": "layer = 'hotfix'"},
+        ),
+        create_database(
+            tmp_path / "base.sqlite3",
+            {
+                "layered/__init__.py": "",
+                "layered/fixed.py": "layer = 'base'",
+                "layered/other.py": "layer = 'base'",
+                "layered-1.0.dist-info/METADATA": "Name: layered\nVersion: 1.0\n",
+            },
+        ),
+    ]
+    finder = sqliteimport.importer.SqliteFinder(layers)
+    yield finder
+    finder.connection.close()
+
+
+def execute(finder, fullname):
+    spec = finder.find_spec(fullname, None)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return spec, module
+
+
+def test_earlier_layers_take_precedence(finder):
+    hotfix, base = [os.path.abspath(database) for database, _ in finder.layers]
+
+    spec, module = execute(finder, "layered.fixed")
+    assert module.layer == "hotfix"
+    assert spec.origin == os.path.join(hotfix, "layered", "fixed.py")
+
+    spec, module = execute(finder, "layered.other")
+    assert module.layer == "base"
+    assert spec.origin == os.path.join(base, "layered", "other.py")
+
+    assert finder.find_spec("layered.bogus", None) is None
+
+
+def test_source_comes_from_the_same_layer(finder):
+    spec = finder.find_spec("layered.fixed", None)
+    assert spec.loader.get_source("layered.fixed") == "layer = 'hotfix'"
+
+
+def test_distributions_are_found_in_every_layer(finder):
+    distributions = list(finder.find_distributions())
+    assert [distribution.version for distribution in distributions] == ["1.0"]
+
+
+def test_lookups_use_the_module_index(finder):
+    sqliteimport.enable_stats()
+    try:
+        finder.find_spec("bogus", None)
+        finder.find_spec("layered.other", None)
+        stats = sqliteimport.get_stats()
+    finally:
+        sqliteimport.disable_stats()
+
+    assert stats["tables"]["module_index"] == {"hits": 1, "misses": 1}
+    assert stats["tables"]["code"] == {"hits": 1, "misses": 0}
+
+
+def test_load_requires_a_database():
+    with pytest.raises(ValueError):
+        sqliteimport.load([])
+
+
+def test_module_index_is_shared(finder):
+    layers = [database for database, _ in finder.layers]
+    finder.connection.execute(
+        "DELETE FROM module_index.module_index WHERE fullname = 'layered.other';"
+    )
+    finder.connection.commit()
+
+    # A finder for the same layers reuses the index, instead of rebuilding it.
+    other = sqliteimport.importer.SqliteFinder(layers)
+    assert other.find_spec("layered.other", None) is None
+    other.connection.close()
+
+    # Modifying a layer causes a new index to be built.
+    stat = os.stat(layers[1])
+    os.utime(layers[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    other = sqliteimport.importer.SqliteFinder(layers)
+    assert other.find_spec("layered.other", None) is not None
+    other.connection.close()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="getlimit() requires 3.11")
+def test_attach_limit(finder):
+    database = finder.layers[1][0]
+    connection = sqlite3.connect(":memory:")
+    connection.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 1)
+    accessor = sqliteimport.accessor.Accessor(connection)
+
+    accessor.attach(database, "first")
+    with pytest.raises(sqliteimport.errors.AttachLimitError, match="ATTACHED"):
+        accessor.attach(database, "second")
+    connection.close()
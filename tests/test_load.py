@@ -2,9 +2,16 @@
 # Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
 # SPDX-License-Identifier: MIT
 
+import json
+import pathlib
 import sqlite3
+import subprocess
+import sys
 
 import sqliteimport
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.importer
 
 
 def test_load(monkeypatch):
@@ -14,3 +21,99 @@ def test_load(monkeypatch):
     sqliteimport.load(connection)
     connection.close()
     assert len(meta_path) == 1
+
+
+# Modules that are slow to import, and are not needed to load a database
+# and import bytecode from it.
+SLOW_MODULES = {
+    "csv",
+    "email",
+    "hashlib",
+    "importlib.abc",
+    "importlib.metadata",
+    "importlib.resources",
+    "inspect",
+    "lzma",
+    "pathlib",
+    "shutil",
+    "tempfile",
+    "tokenize",
+    "typing",
+    "zipfile",
+}
+
+PROGRAM = """
+import json, marshal, sqlite3, sys, zlib
+
+sys.path.insert(0, sys.argv[1])
+before = set(sys.modules)
+import sqliteimport
+sqliteimport.load(sys.argv[2])
+import bootstrap.module
+print(json.dumps(sorted(set(sys.modules) - before)))
+"""
+
+
+def test_import_budget(tmp_path, create_database):
+    database = create_database(
+        tmp_path / "bootstrap.sqlite3",
+        {"bootstrap/__init__.py": "", "bootstrap/module.py": "value = 1"},
+    )
+    with sqlite3.connect(database) as connection:
+        sqliteimport.compiler.compile_bytecode(
+            sqliteimport.accessor.Accessor(connection)
+        )
+    connection.close()
+
+    # The site module is disabled, so that `.pth` files cannot import anything.
+    location = pathlib.Path(sqliteimport.__file__).parent.parent
+    output = subprocess.run(
+        [sys.executable, "-I", "-S", "-c", PROGRAM, str(location), str(database)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    imported = set(json.loads(output))
+    assert "bootstrap.module" in imported
+    assert imported & SLOW_MODULES == set()
+
+
+ABC_PROGRAM = """
+import sys
+
+sys.path.insert(0, sys.argv[1])
+meta_path = list(sys.meta_path)
+import sqliteimport
+import sqliteimport.importer
+assert "importlib.abc" not in sys.modules
+assert sys.meta_path[: len(meta_path)] == meta_path
+sqliteimport.load(sys.argv[2])
+import importlib.abc
+import registered
+assert isinstance(registered.__loader__, importlib.abc.InspectLoader)
+"""
+
+
+def test_loader_is_registered_after_importlib_abc_is_imported(
+    tmp_path, create_database
+):
+    """Importing sqliteimport adds no finder in front of every import."""
+
+    database = create_database(tmp_path / "abc.sqlite3", {"registered.py": ""})
+    location = pathlib.Path(sqliteimport.__file__).parent.parent
+    subprocess.run(
+        [sys.executable, "-I", "-S", "-c", ABC_PROGRAM, str(location), str(database)],
+        check=True,
+    )
+
+
+def test_load_path_with_uri_characters(tmp_path, create_database):
+    # sqlite would otherwise interpret these characters in URIs.
+    database = create_database(
+        tmp_path / "a#b%20c" / "uri.sqlite3", {"uri_characters.py": "value = 1"}
+    )
+    finder = sqliteimport.importer.SqliteFinder(database)
+    try:
+        assert finder.find_spec("uri_characters", None) is not None
+    finally:
+        finder.connection.close()
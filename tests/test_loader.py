@@ -0,0 +1,133 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib
+import os
+import pkgutil
+import runpy
+import sqlite3
+import traceback
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+
+FILES = {
+    "runnable/__init__.py": "",
+    "runnable/__main__.py": "from . import cli\nresult = cli.run()",
+    "runnable/cli.py": "def run():\n    return 'ran'\n",
+    "runnable/data/config.txt": "configured",
+    "runnable/deep.py": (
+        "def recurse(depth):\n"
+        "    if depth:\n"
+        "        return recurse(depth - 1)\n"
+        "    return 1 / 0\n"
+    ),
+}
+
+
+@pytest.fixture
+def module_prefix():
+    return "runnable"
+
+
+@pytest.fixture
+def finder(tmp_path, create_database, load):
+    return load(create_database(tmp_path / "runnable.sqlite3", FILES))
+
+
+def test_filename(finder):
+    module = importlib.import_module("runnable.cli")
+    loader = module.__spec__.loader
+
+    expected = os.path.join(os.path.abspath(finder.database), "runnable", "cli.py")
+    assert loader.get_filename("runnable.cli") == expected
+    assert module.__file__ == expected
+    assert loader.is_package("runnable.cli") is False
+    assert importlib.import_module("runnable").__spec__.loader.is_package("runnable")
+
+
+def test_cached(tmp_path, create_database, load):
+    database = create_database(tmp_path / "runnable.sqlite3", FILES)
+    with sqlite3.connect(database) as connection:
+        sqliteimport.compiler.compile_bytecode(
+            sqliteimport.accessor.Accessor(connection)
+        )
+    connection.close()
+    load(database)
+
+    module = importlib.import_module("runnable.cli")
+    assert module.__cached__ == os.path.abspath(database)
+
+
+def test_cached_without_bytecode(finder):
+    """Source code in databases is not cached in a ``__pycache__`` directory."""
+
+    module = importlib.import_module("runnable.cli")
+    assert module.__spec__.cached is None
+    assert getattr(module, "__cached__", None) is None
+
+
+def test_deserialized_database(tmp_path, create_database, load, monkeypatch):
+    """Databases that are not files have locations that are not paths."""
+
+    # sqlite names deserialized databases "x", which must not be used as a path.
+    monkeypatch.chdir(tmp_path)
+    with sqlite3.connect(
+        create_database(tmp_path / "runnable.sqlite3", FILES)
+    ) as source:
+        contents = source.serialize()
+    source.close()
+    connection = sqlite3.connect(":memory:")
+    connection.deserialize(contents)
+    load(connection)
+
+    module = importlib.import_module("runnable.cli")
+    location = module.__file__.removesuffix(os.path.join("", "runnable", "cli.py"))
+    assert location.startswith("<sqliteimport ")
+    assert importlib.import_module("runnable").__path__ == [
+        os.path.join(location, "runnable")
+    ]
+    assert pkgutil.get_data("runnable", "data/config.txt") == b"configured"
+
+
+def test_other_modules_are_rejected(finder):
+    loader = importlib.import_module("runnable.cli").__spec__.loader
+
+    with pytest.raises(ImportError):
+        loader.get_filename("runnable")
+    with pytest.raises(ImportError):
+        loader.is_package("runnable")
+
+
+def test_run_module(finder):
+    namespace = runpy.run_module("runnable", run_name="__main__")
+
+    assert namespace["result"] == "ran"
+    assert namespace["__file__"].endswith(os.path.join("runnable", "__main__.py"))
+
+
+def test_get_data(finder):
+    assert pkgutil.get_data("runnable", "data/config.txt") == b"configured"
+
+    loader = importlib.import_module("runnable").__spec__.loader
+    assert loader.get_data("runnable/data/config.txt") == b"configured"
+    with pytest.raises(FileNotFoundError):
+        loader.get_data("runnable/data/bogus.txt")
+
+
+def test_source_is_cached(finder):
+    module = importlib.import_module("runnable.deep")
+
+    statements = []
+    finder.connection.set_trace_callback(statements.append)
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError) as error:
+            module.recurse(10)
+        assert "1 / 0" in "".join(traceback.format_exception(error.value))
+        assert module.__loader__.get_source("runnable.deep").startswith("def")
+    finder.connection.set_trace_callback(None)
+
+    assert len([s for s in statements if "main.code" in s]) == 1
@@ -0,0 +1,68 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import sqlite3
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.merger
+from sqliteimport.util import get_magic_number
+
+
+def compile_database(path):
+    with sqlite3.connect(path) as connection:
+        sqliteimport.compiler.compile_bytecode(
+            sqliteimport.accessor.Accessor(connection)
+        )
+    connection.close()
+
+
+def test_merge(tmp_path, create_database):
+    first = create_database(
+        tmp_path / "first.sqlite3",
+        {"shared.py": "value = 'shared'", "conflict.py": "value = 'first'"},
+    )
+    second = create_database(
+        tmp_path / "second.sqlite3",
+        {
+            "shared.py": "value = 'shared'",
+            "conflict.py": "value = 'second'",
+            "other.py": "value = 'second'",
+        },
+    )
+    compile_database(first)
+    compile_database(second)
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    counts = sqliteimport.merger.merge([first, second], accessor)
+
+    assert counts == {"files": 3, "duplicates": 1, "conflicts": 1}
+    assert accessor.get_file(path="conflict.py") == b"value = 'first'"
+    assert accessor.get_file(path="other.py") == b"value = 'second'"
+    assert list(accessor.get_magic_numbers()) == [get_magic_number()]
+
+    # Bytecode must match the source code that was merged.
+    accessor = sqliteimport.accessor.Accessor(connection)
+    _, bytecode, _ = accessor.find_spec("conflict")
+    namespace = {}
+    exec(bytecode, namespace)
+    assert namespace["value"] == "first"
+    connection.close()
+
+
+def test_merge_skips_incomplete_bytecode(tmp_path, create_database):
+    first = create_database(tmp_path / "first.sqlite3", {"first.py": ""})
+    second = create_database(tmp_path / "second.sqlite3", {"second.py": ""})
+    compile_database(first)
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    sqliteimport.merger.merge([first, second], accessor)
+
+    assert accessor.get_magic_numbers() == {}
+    assert accessor.get_bytecode_tables() == []
+    connection.close()
@@ -0,0 +1,114 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import sqlite3
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.optimizer
+from sqliteimport.compat import marshal
+from sqliteimport.util import get_magic_number
+
+FILES = {
+    "legacy/__init__.py": ("legacy", True, b""),
+    "legacy/module.py": ("legacy.module", False, b"value = 'legacy'"),
+    "legacy/data.txt": ("", False, b"data"),
+    "legacy/copy.txt": ("", False, b"data"),
+}
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    """Create a database using the schema that predates schema versions."""
+
+    path = tmp_path / "legacy.sqlite3"
+    magic_number = get_magic_number()
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            f"""
+            CREATE TABLE sqliteimport (field TEXT, value TEXT);
+            INSERT INTO sqliteimport VALUES ('version', 'beta');
+            CREATE TABLE code (
+                fullname text, path text, is_package boolean, contents text
+            );
+            CREATE INDEX fullname_index ON code (fullname);
+            CREATE TABLE magic_numbers (magic_number INTEGER, python_identifier TEXT);
+            INSERT INTO magic_numbers VALUES ({magic_number}, 'CPython');
+            CREATE TABLE bytecode_{magic_number} (
+                fullname TEXT, path TEXT, is_package BOOLEAN, contents TEXT
+            );
+            """
+        )
+        for file_path, (fullname, is_package, contents) in FILES.items():
+            connection.execute(
+                "INSERT INTO code VALUES (?, ?, ?, ?);",
+                (
+                    fullname,
+                    file_path,
+                    is_package,
+                    sqliteimport.accessor.compress_legacy(contents),
+                ),
+            )
+            if file_path.endswith(".py"):
+                code = compile(contents, file_path, "exec", dont_inherit=True)
+                bytecode = marshal.dumps(code, allow_code=True)
+                connection.execute(
+                    f"INSERT INTO bytecode_{magic_number} VALUES (?, ?, ?, ?);",
+                    (
+                        fullname,
+                        file_path,
+                        is_package,
+                        sqliteimport.accessor.compress_legacy(bytecode),
+                    ),
+                )
+    connection.close()
+    return path
+
+
+def test_schema_version(legacy):
+    with sqlite3.connect(legacy) as connection:
+        assert sqliteimport.accessor.Accessor(connection).schema_version == 1
+    connection.close()
+
+    connection = sqlite3.connect(":memory:")
+    accessor = sqliteimport.accessor.Accessor(connection)
+    accessor.initialize_database()
+    assert accessor.schema_version == sqliteimport.accessor.SCHEMA_VERSION
+    assert sqliteimport.accessor.Accessor(connection).schema_version == 2
+    connection.close()
+
+
+def test_migrate(legacy, tmp_path):
+    output = tmp_path / "migrated.sqlite3"
+    with sqlite3.connect(legacy) as connection:
+        sqliteimport.optimizer.migrate(
+            sqliteimport.accessor.Accessor(connection), output
+        )
+    connection.close()
+
+    with sqlite3.connect(output) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        assert accessor.schema_version == 2
+        assert accessor.get_magic_numbers() == {get_magic_number(): "CPython"}
+        for path, (_, _, contents) in FILES.items():
+            assert accessor.get_file(path=path) == contents
+        assert connection.execute("SELECT count(*) FROM resources;").fetchone() == (1,)
+
+        _, code, is_package = accessor.find_spec("legacy.module")
+        namespace = {}
+        exec(code, namespace)
+        assert namespace["value"] == "legacy"
+        assert not is_package
+
+        # Each lookup is a single search of the clustered primary key.
+        plan = connection.execute(
+            f"""
+            EXPLAIN QUERY PLAN
+            SELECT contents FROM {accessor.find_spec_table} WHERE fullname = ?;
+            """,
+            ("legacy.module",),
+        ).fetchall()
+        assert "USING PRIMARY KEY (fullname=?)" in plan[0][-1]
+    connection.close()
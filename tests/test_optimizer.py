@@ -0,0 +1,71 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import os
+import sqlite3
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.optimizer
+
+LARGE = os.urandom(200)
+
+
+@pytest.mark.parametrize(
+    "sizes, expected",
+    (
+        ([], 4096),
+        ([100] * 10, 4096),
+        ([100] * 9 + [10_000], 16384),
+        ([100] * 8 + [10_000] * 2, 16384),
+        ([100] * 10 + [10_000], 4096),
+        ([1_000_000] * 10, 65536),
+    ),
+)
+def test_choose_page_size(sizes, expected):
+    assert sqliteimport.optimizer.choose_page_size(sizes) == expected
+
+
+def test_optimize(tmp_path, create_database, monkeypatch):
+    monkeypatch.setattr(sqliteimport.accessor, "CHUNK_SIZE", 64)
+    files = {
+        "b/__init__.py": "",
+        "b/module.py": "value = 'b'",
+        "a/__init__.py": "",
+        "a/module.py": "value = 'a'",
+        "a/data.txt": "data",
+        "a/large.bin": LARGE,
+    }
+    path = create_database(tmp_path / "original.sqlite3", files)
+    output = tmp_path / "optimized.sqlite3"
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.compiler.compile_bytecode(accessor)
+        connection.commit()
+        metadata = accessor.get_database_metadata()
+        page_size = sqliteimport.optimizer.optimize(accessor, output, 8192)
+    connection.close()
+
+    assert page_size == 8192
+    with sqlite3.connect(output) as connection:
+        assert connection.execute("PRAGMA page_size;").fetchone() == (8192,)
+        assert connection.execute("SELECT count(*) FROM sqlite_stat1;").fetchone()
+        accessor = sqliteimport.accessor.Accessor(connection)
+        assert accessor.get_database_metadata() == metadata
+        for name, contents in files.items():
+            expected = contents if isinstance(contents, bytes) else contents.encode()
+            assert accessor.get_file(path=name) == expected
+
+        # Contents are clustered by module name.
+        table = f"{accessor.find_spec_table}_files"
+        query = f"SELECT fullname FROM {table} ORDER BY blob_id;"
+        fullnames = [row[0] for row in connection.execute(query)]
+        assert fullnames == sorted(fullnames)
+        _, code, _ = accessor.find_spec("a.module")
+        namespace = {}
+        exec(code, namespace)
+        assert namespace["value"] == "a"
+    connection.close()
@@ -0,0 +1,136 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib
+import importlib.metadata
+import os
+import pkgutil
+import sys
+
+import pytest
+
+import sqliteimport
+import sqliteimport.importer
+
+FILES = {
+    "hooked/__init__.py": "origin = 'database'",
+    "hooked/sub/__init__.py": "",
+    "hooked/sub/module.py": "value = 1",
+    "hookedmeta-1.0.dist-info/METADATA": "Name: hookedmeta\nVersion: 1.0\n",
+}
+
+
+@pytest.fixture
+def database(tmp_path, create_database):
+    return create_database(tmp_path / "hooked.sqlite3", FILES)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    """Create a directory that contains a package of the same name."""
+
+    path = tmp_path / "directory"
+    (path / "hooked").mkdir(parents=True)
+    (path / "hooked" / "__init__.py").write_text("origin = 'directory'")
+    return path
+
+
+@pytest.fixture
+def search(monkeypatch):
+    """Set the paths to search, and remove their finders and modules afterward."""
+
+    def search(*paths):
+        monkeypatch.setattr(sys, "path", [str(path) for path in paths] + sys.path)
+
+    yield search
+
+    for name in list(sys.modules):
+        if name.partition(".")[0] == "hooked":
+            del sys.modules[name]
+    for entry in list(sys.path_importer_cache):
+        if "hooked" in entry or "directory" in entry:
+            del sys.path_importer_cache[entry]
+    for key in list(sqliteimport.importer.path_finders):
+        sqliteimport.importer.path_finders.pop(key).connection.close()
+
+
+def test_path_hook_is_installed():
+    assert sqliteimport.importer.path_hook in sys.path_hooks
+
+
+def test_import(database, search):
+    meta_path = list(sys.meta_path)
+    search(database)
+
+    module = importlib.import_module("hooked.sub.module")
+    assert module.value == 1
+    # The database is found by `PathFinder`, not by a new meta path finder.
+    assert sys.meta_path == meta_path
+    assert isinstance(
+        sys.path_importer_cache[str(database)],
+        sqliteimport.importer.SqlitePathEntryFinder,
+    )
+
+
+@pytest.mark.parametrize("database_first", (True, False))
+def test_path_order(database, directory, search, database_first):
+    if database_first:
+        search(database, directory)
+    else:
+        search(directory, database)
+
+    hooked = importlib.import_module("hooked")
+    assert hooked.origin == ("database" if database_first else "directory")
+
+
+def test_uncached_package_path(database, search):
+    """Package paths in a database are supported if they are not cached."""
+
+    search(database)
+    hooked = importlib.import_module("hooked")
+    for entry in hooked.__path__:
+        sys.path_importer_cache.pop(entry, None)
+
+    assert importlib.import_module("hooked.sub.module").value == 1
+
+
+def test_missing_database(tmp_path, search):
+    search(tmp_path / "missing.sqlite3")
+
+    with pytest.raises(ModuleNotFoundError):
+        importlib.import_module("hooked")
+
+
+def test_iter_modules(database, search):
+    search(database)
+
+    names = {module.name for module in pkgutil.iter_modules([str(database)])}
+    assert names == {"hooked"}
+
+
+def test_distributions(database, search):
+    search(database)
+
+    assert importlib.metadata.version("hookedmeta") == "1.0"
+
+
+def test_environment(database, tmp_path, monkeypatch):
+    meta_path = []
+    monkeypatch.setattr(sys, "meta_path", meta_path)
+    paths = [str(tmp_path / "missing.sqlite3"), "", str(database)]
+    monkeypatch.setenv("SQLITEIMPORT_DATABASES", os.pathsep.join(paths))
+
+    sqliteimport.importer.load_environment()
+    assert len(meta_path) == 1
+    assert meta_path[0].find_spec("hooked", None) is not None
+    meta_path[0].connection.close()
+
+
+def test_environment_is_empty(monkeypatch):
+    meta_path = []
+    monkeypatch.setattr(sys, "meta_path", meta_path)
+    monkeypatch.delenv("SQLITEIMPORT_DATABASES", raising=False)
+
+    sqliteimport.importer.load_environment()
+    assert meta_path == []
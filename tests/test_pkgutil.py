@@ -0,0 +1,186 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib
+import pathlib
+import pkgutil
+import sqlite3
+import sys
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.importer
+
+FILES = {
+    "plugins/__init__.py": "",
+    "plugins/alpha.py": "",
+    "plugins/beta/__init__.py": "",
+    "plugins/beta/gamma.py": "",
+    "plugins/beta/data.txt": "",
+    "plugins/namespace/delta.py": "",
+    "pluginsx.py": "",
+}
+
+
+@pytest.fixture
+def module_prefix():
+    return "plugins"
+
+
+@pytest.fixture
+def database(tmp_path, create_database):
+    path = create_database(tmp_path / "plugins.sqlite3", FILES)
+    with sqlite3.connect(path) as connection:
+        sqliteimport.accessor.Accessor(connection).add_directory(
+            pathlib.Path("plugins/namespace")
+        )
+    connection.close()
+    return path
+
+
+def test_iter_modules(database, load):
+    load(database)
+    plugins = importlib.import_module("plugins")
+
+    modules = [(m.name, m.ispkg) for m in pkgutil.iter_modules(plugins.__path__)]
+    assert modules == [("alpha", False), ("beta", True), ("namespace", True)]
+
+
+def test_walk_packages(database, load):
+    load(database)
+    plugins = importlib.import_module("plugins")
+
+    names = [m.name for m in pkgutil.walk_packages(plugins.__path__, "plugins.")]
+    assert names == [
+        "plugins.alpha",
+        "plugins.beta",
+        "plugins.beta.gamma",
+        "plugins.namespace",
+        "plugins.namespace.delta",
+    ]
+
+
+def test_module_finder_finds_submodules(database, load):
+    load(database)
+    plugins = importlib.import_module("plugins")
+
+    info = next(pkgutil.iter_modules(plugins.__path__))
+    spec = info.module_finder.find_spec("plugins.alpha")
+    assert spec.name == "plugins.alpha"
+
+
+def test_top_level_modules(database, load):
+    finder = load(database)
+
+    assert list(finder.iter_modules()) == [("plugins", True), ("pluginsx", False)]
+    names = {m.name for m in pkgutil.iter_modules() if m.module_finder is finder}
+    assert names == {"plugins", "pluginsx"}
+
+
+def test_stripped_source(database, load, tmp_path):
+    """Modules are listed if only their bytecode is in the database."""
+
+    with sqlite3.connect(database) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.compiler.compile_bytecode(accessor)
+        connection.commit()
+        sqliteimport.compiler.strip_source(
+            sqliteimport.accessor.Accessor(connection), tmp_path / "source.sqlite3"
+        )
+    connection.close()
+
+    finder = load(database)
+    assert finder.list_modules("plugins.beta") == {"gamma": False}
+
+
+def test_layers(database, load, tmp_path, create_database):
+    overlay = create_database(
+        tmp_path / "overlay.sqlite3",
+        {"plugins/__init__.py": "", "plugins/alpha/__init__.py": ""},
+    )
+    load([overlay, database])
+    plugins = importlib.import_module("plugins")
+
+    modules = [(m.name, m.ispkg) for m in pkgutil.iter_modules(plugins.__path__)]
+    assert modules == [("alpha", True), ("beta", True), ("namespace", True)]
+
+
+def test_one_query(tmp_path, create_database, load):
+    files = {"many/__init__.py": ""}
+    files.update({f"many/module{number}.py": "" for number in range(1000)})
+    finder = load(create_database(tmp_path / "many.sqlite3", files))
+    many = importlib.import_module("many")
+
+    statements = []
+    finder.connection.set_trace_callback(statements.append)
+    assert len(list(pkgutil.iter_modules(many.__path__))) == 1000
+    assert len([s for s in statements if "main.code_files" in s]) == 1
+
+
+def test_deserialized_database(database, load, tmp_path, monkeypatch):
+    """Package paths of databases without a file cannot be directories."""
+
+    # sqlite names deserialized databases "x", which must not be used as a path.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "x" / "plugins").mkdir(parents=True)
+    (tmp_path / "x" / "plugins" / "impostor.py").write_text("")
+    with sqlite3.connect(database) as source:
+        contents = source.serialize()
+    source.close()
+    connection = sqlite3.connect(":memory:")
+    connection.deserialize(contents)
+    load(connection)
+    plugins = importlib.import_module("plugins")
+
+    (entry,) = plugins.__path__
+    assert entry.startswith("<sqliteimport ")
+    modules = [m.name for m in pkgutil.iter_modules(plugins.__path__)]
+    assert modules == ["alpha", "beta", "namespace"]
+
+    # If the entry's finder is evicted, files in the working directory are not found.
+    del sys.path_importer_cache[entry]
+    with pytest.raises(ModuleNotFoundError):
+        importlib.import_module("plugins.impostor")
+
+
+def test_path_entries_are_registered_when_used(database, load):
+    load(database)
+    plugins = importlib.import_module("plugins")
+
+    importlib.import_module("plugins.beta.gamma")
+    (entry,) = plugins.__path__
+    assert entry not in sys.path_importer_cache
+    list(pkgutil.iter_modules(plugins.__path__))
+    assert entry in sys.path_importer_cache
+    sys.path_importer_cache.pop(entry)
+
+
+def test_path_entries_outlive_their_finder(database):
+    """Path entries of removed finders find nothing, and are not reused."""
+
+    connection = sqlite3.connect(":memory:")
+    with sqlite3.connect(database) as source:
+        connection.deserialize(source.serialize())
+    source.close()
+    finder = sqliteimport.importer.SqliteFinder(connection)
+    sys.meta_path.insert(0, finder)
+    try:
+        (entry,) = importlib.import_module("plugins").__path__
+        entry_finder = pkgutil.get_importer(entry)
+    finally:
+        sys.meta_path.remove(finder)
+        finder.connection.close()
+        for name in [name for name in sys.modules if name.startswith("plugins")]:
+            del sys.modules[name]
+
+    try:
+        assert list(entry_finder.iter_modules()) == []
+        assert entry_finder.find_spec("plugins.alpha") is None
+        other = sqliteimport.importer.SqliteFinder(sqlite3.connect(":memory:"))
+        assert entry not in other.locations.values()
+        other.connection.close()
+    finally:
+        sys.path_importer_cache.pop(entry)
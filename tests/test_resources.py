@@ -0,0 +1,82 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import sqlite3
+
+import pytest
+
+import sqliteimport.accessor
+
+FILES = {
+    "stored/__init__.py": "shared = True",
+    "stored/module.py": "value = 1",
+    "stored/data.txt": "shared = True",
+    "stored-1.0.dist-info/METADATA": "Name: stored\nVersion: 1.0\n",
+}
+
+
+@pytest.fixture
+def connection(tmp_path, create_database):
+    connection = sqlite3.connect(create_database(tmp_path / "stored.sqlite3", FILES))
+    yield connection
+    connection.close()
+
+
+def test_resources_are_stored_apart_from_modules(connection):
+    rows = connection.execute(
+        """
+        SELECT
+            path,
+            blob_id IS NOT NULL,
+            resource_id IS NOT NULL
+        FROM code_files
+        ORDER BY path
+        ;
+        """
+    ).fetchall()
+    assert rows == [
+        ("stored-1.0.dist-info/METADATA", False, True),
+        ("stored/__init__.py", True, False),
+        ("stored/data.txt", False, True),
+        ("stored/module.py", True, False),
+    ]
+
+    # Identical contents are stored once per table, not shared across tables.
+    blobs = connection.execute("SELECT count(*) FROM blobs;").fetchone()[0]
+    resources = connection.execute("SELECT count(*) FROM resources;").fetchone()[0]
+    assert (blobs, resources) == (2, 2)
+
+
+def test_read_resources(connection):
+    accessor = sqliteimport.accessor.Accessor(connection)
+
+    assert accessor.get_file(path="stored/data.txt") == b"shared = True"
+    with accessor.open_file("stored-1.0.dist-info/METADATA") as file:
+        assert file.read() == FILES["stored-1.0.dist-info/METADATA"].encode()
+
+
+def test_find_spec(connection):
+    accessor = sqliteimport.accessor.Accessor(connection)
+
+    assert accessor.find_spec("stored") == (
+        "stored/__init__.py",
+        b"shared = True",
+        True,
+    )
+    assert accessor.find_spec("stored.module") == (
+        "stored/module.py",
+        b"value = 1",
+        False,
+    )
+    assert accessor.find_spec("stored.data") is None
+
+
+def test_find_spec_without_resources(tmp_path, create_database):
+    path = create_database(tmp_path / "modules.sqlite3", {"alone.py": "value = 1"})
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        assert accessor.has_resources
+        assert connection.execute("SELECT count(*) FROM resources;").fetchone() == (0,)
+        assert accessor.find_spec("alone") == ("alone.py", b"value = 1", False)
+    connection.close()
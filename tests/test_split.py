@@ -0,0 +1,149 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.util
+import os
+import sqlite3
+import types
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.importer
+import sqliteimport.splitter
+
+LARGE = os.urandom(200)
+
+
+@pytest.fixture
+def split(tmp_path, create_database, monkeypatch):
+    monkeypatch.setattr(sqliteimport.accessor, "CHUNK_SIZE", 64)
+    path = create_database(
+        tmp_path / "split.sqlite3",
+        {
+            "split/__init__.py": "",
+            "split/used.py": "value = 'used'",
+            "split/unused.py": "value = 'unused'",
+            "split/tests/test_split.py": "",
+            "split/data.txt": "data",
+            "split/large.bin": LARGE,
+            "split-1.0.dist-info/METADATA": "Name: split\nVersion: 1.0\n",
+        },
+    )
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.compiler.compile_bytecode(accessor)
+        connection.commit()
+        trace = {"modules": {"split", "split.used"}, "resources": {"split/data.txt"}}
+        moved = sqliteimport.splitter.split(
+            accessor,
+            tmp_path / "split.cold.sqlite3",
+            sqliteimport.splitter.DEFAULT_PATTERNS,
+            trace,
+        )
+    connection.close()
+
+    assert moved == 3
+    return path
+
+
+def is_attached(finder):
+    databases = finder.connection.execute("PRAGMA database_list;").fetchall()
+    return "main_cold" in [database[1] for database in databases]
+
+
+def import_module(finder, fullname):
+    spec = finder.find_spec(fullname, None)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_files_are_moved(split):
+    with sqlite3.connect(split) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        paths = sorted(path for _, path in accessor.iter_paths())
+        assert accessor.get_cold_database() == "split.cold.sqlite3"
+    connection.close()
+
+    assert paths == [
+        "split-1.0.dist-info/METADATA",
+        "split/__init__.py",
+        "split/data.txt",
+        "split/used.py",
+    ]
+
+
+def test_cold_database_is_attached_on_first_miss(split):
+    finder = sqliteimport.importer.SqliteFinder(split)
+    assert import_module(finder, "split.used").value == "used"
+    assert [distribution.version for distribution in finder.find_distributions()] == [
+        "1.0"
+    ]
+    assert not is_attached(finder)
+
+    module = import_module(finder, "split.unused")
+    assert module.value == "unused"
+    assert isinstance(module.__spec__.loader.get_code("split.unused"), types.CodeType)
+    assert is_attached(finder)
+
+    files = module.__spec__.loader.get_resource_reader("split").files()
+    assert (files / "large.bin").read_bytes() == LARGE
+    with (files / "large.bin").open("rb") as file:
+        assert file.read() == LARGE
+    assert finder.find_spec("split.bogus", None) is None
+    finder.connection.close()
+
+
+def test_missing_cold_database(split):
+    split.with_suffix(".cold.sqlite3").unlink()
+    finder = sqliteimport.importer.SqliteFinder(split)
+
+    assert finder.find_spec("split.used", None) is not None
+    assert finder.find_spec("split.unused", None) is None
+    finder.connection.close()
+
+
+def test_deserialized_database(split, monkeypatch):
+    """Deserialized databases have no directory to find a cold database in."""
+
+    monkeypatch.chdir(split.parent)
+    with sqlite3.connect(split) as source:
+        contents = source.serialize()
+    source.close()
+    connection = sqlite3.connect(":memory:")
+    connection.deserialize(contents)
+    finder = sqliteimport.importer.SqliteFinder(connection)
+
+    assert finder.find_spec("split.used", None) is not None
+    assert finder.find_spec("split.unused", None) is None
+    assert not is_attached(finder)
+    connection.close()
+
+
+def test_layers(split, tmp_path, create_database):
+    other = create_database(tmp_path / "other.sqlite3", {"other.py": ""})
+    finder = sqliteimport.importer.SqliteFinder([other, split])
+
+    assert import_module(finder, "split.unused").value == "unused"
+    assert finder.find_spec("other", None) is not None
+    finder.connection.close()
+
+
+def test_stats_trace(split):
+    finder = sqliteimport.importer.SqliteFinder(split)
+    sqliteimport.enable_stats()
+    try:
+        module = import_module(finder, "split.used")
+        module.__spec__.loader.get_resource_reader("split").files().joinpath(
+            "data.txt"
+        ).read_text()
+        stats = sqliteimport.get_stats()
+    finally:
+        sqliteimport.disable_stats()
+    finder.connection.close()
+
+    assert stats["modules"] == ["split.used"]
+    assert stats["resources"] == ["split/data.txt"]
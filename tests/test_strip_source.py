@@ -0,0 +1,80 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import importlib.util
+import sqlite3
+import traceback
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.errors
+import sqliteimport.importer
+
+SOURCE = "def divide():\n    return 1 / 0\n"
+
+
+@pytest.fixture
+def stripped(tmp_path, create_database):
+    path = create_database(
+        tmp_path / "stripped.sqlite3",
+        {"stripped/__init__.py": "", "stripped/divide.py": SOURCE},
+    )
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.compiler.compile_bytecode(accessor)
+        connection.commit()
+        moved = sqliteimport.compiler.strip_source(
+            accessor, tmp_path / "stripped.source.sqlite3"
+        )
+    connection.close()
+
+    assert moved == 2
+    return path
+
+
+def import_module(finder, fullname):
+    spec = finder.find_spec(fullname, None)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_source_code_is_removed(stripped):
+    with sqlite3.connect(stripped) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        assert accessor.get_source_sidecar() == "stripped.source.sqlite3"
+        assert list(accessor.iter_source_code()) == []
+    connection.close()
+
+
+def test_tracebacks_use_sidecar(stripped):
+    finder = sqliteimport.importer.SqliteFinder([stripped])
+    module = import_module(finder, "stripped.divide")
+
+    assert module.__loader__.get_source("stripped.divide") == SOURCE
+    with pytest.raises(ZeroDivisionError) as error:
+        module.divide()
+    assert "1 / 0" in "".join(traceback.format_exception(error.value))
+    finder.connection.close()
+
+
+def test_missing_sidecar(stripped):
+    stripped.with_suffix(".source.sqlite3").unlink()
+    finder = sqliteimport.importer.SqliteFinder([stripped])
+    module = import_module(finder, "stripped.divide")
+
+    with pytest.raises(sqliteimport.errors.FileNotFoundInDatabaseError):
+        module.__loader__.get_source("stripped.divide")
+    finder.connection.close()
+
+
+def test_layers_index_bytecode(stripped, tmp_path, create_database):
+    other = create_database(tmp_path / "other.sqlite3", {"other.py": ""})
+    finder = sqliteimport.importer.SqliteFinder([stripped, other])
+
+    assert finder.find_spec("stripped.divide", None) is not None
+    assert finder.find_spec("other", None) is not None
+    finder.connection.close()
@@ -0,0 +1,119 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import concurrent.futures
+import importlib
+import importlib.resources
+import sqlite3
+import threading
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.importer
+import sqliteimport.splitter
+
+THREADS = 8
+MODULES = 20
+
+
+@pytest.fixture
+def database(tmp_path, create_database):
+    files = {}
+    for package in range(THREADS):
+        files[f"threaded{package}/__init__.py"] = ""
+        files[f"threaded{package}/data.txt"] = f"data {package}"
+        for module in range(MODULES):
+            files[f"threaded{package}/module{module}.py"] = f"value = {module}"
+    path = create_database(tmp_path / "threaded.sqlite3", files)
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.compiler.compile_bytecode(accessor)
+        connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def module_prefix():
+    return "threaded"
+
+
+def run_threads(target):
+    """Run *target* in several threads at once, and re-raise any errors."""
+
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def run(number):
+        barrier.wait()
+        try:
+            target(number)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def import_package(number):
+    package = importlib.import_module(f"threaded{number}")
+    for module in range(MODULES):
+        imported = importlib.import_module(f"threaded{number}.module{module}")
+        assert imported.value == module
+    files = importlib.resources.files(package)
+    assert (files / "data.txt").read_text() == f"data {number}"
+
+
+def test_disjoint_imports(database, load):
+    load(database)
+    run_threads(import_package)
+
+
+def test_shared_imports(database, load):
+    load(database)
+    run_threads(lambda _: import_package(0))
+
+
+def test_imports_from_other_thread(database, load):
+    """Modules can be imported by a thread other than the one that loaded them."""
+
+    finder = load(database)
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        executor.submit(import_package, 0).result()
+    assert finder.find_spec("threaded1", None) is not None
+
+
+def test_cold_database_is_attached_once(database, load):
+    with sqlite3.connect(database) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        sqliteimport.splitter.split(
+            accessor, database.with_suffix(".cold.sqlite3"), ["*/module1*.py"]
+        )
+    connection.close()
+
+    finder = load(database)
+    # Every thread misses in the primary database at the same time.
+    run_threads(import_package)
+    databases = finder.connection.execute("PRAGMA database_list;").fetchall()
+    assert [database[1] for database in databases].count("main_cold") == 1
+
+
+def test_stats(database, load):
+    load(database)
+    sqliteimport.enable_stats()
+    try:
+        run_threads(import_package)
+        stats = sqliteimport.get_stats()
+    finally:
+        sqliteimport.disable_stats()
+
+    assert stats["phases"]["exec"]["count"] == THREADS * (MODULES + 1)
+    assert len(stats["modules"]) == THREADS * (MODULES + 1)
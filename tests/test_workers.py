@@ -0,0 +1,71 @@
+# This file is a part of sqliteimport <https://github.com/kurtmckee/sqliteimport>
+# Copyright 2024-2025 Kurt McKee <contactme@kurtmckee.org>
+# SPDX-License-Identifier: MIT
+
+import sqlite3
+import sys
+
+import pytest
+
+import sqliteimport.accessor
+import sqliteimport.compiler
+import sqliteimport.errors
+import sqliteimport.util
+
+
+def test_compile_bytecode_in_workers(tmp_path, create_database):
+    files = {
+        "pkg/__init__.py": "",
+        "pkg/module.py": "value = 'worker'",
+        "pkg/data.txt": "data",
+    }
+    path = create_database(tmp_path / "workers.sqlite3", files)
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        # The same interpreter is only used once.
+        compiled = sqliteimport.compiler.compile_bytecode_in_workers(
+            accessor, [sys.executable, sys.executable]
+        )
+        connection.commit()
+
+        magic_number = sqliteimport.util.get_magic_number()
+        identifier = sqliteimport.util.get_python_identifier()
+        assert compiled == {magic_number: identifier}
+        assert accessor.get_magic_numbers() == {magic_number: identifier}
+
+        accessor = sqliteimport.accessor.Accessor(connection)
+        _, code, _ = accessor.find_spec("pkg.module")
+        namespace = {}
+        exec(code, namespace)
+        assert namespace["value"] == "worker"
+
+        # Interpreters whose bytecode is already in the database are skipped.
+        assert (
+            sqliteimport.compiler.compile_bytecode_in_workers(
+                accessor, [sys.executable]
+            )
+            == {}
+        )
+    connection.close()
+
+
+def test_syntax_error(tmp_path, create_database):
+    path = create_database(tmp_path / "workers.sqlite3", {"bogus.py": "1 = 2"})
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        with pytest.raises(sqliteimport.errors.CompileError, match="bogus.py"):
+            sqliteimport.compiler.compile_bytecode_in_workers(
+                accessor, [sys.executable]
+            )
+    connection.close()
+
+
+def test_missing_interpreter(tmp_path, create_database):
+    path = create_database(tmp_path / "workers.sqlite3", {"module.py": ""})
+    with sqlite3.connect(path) as connection:
+        accessor = sqliteimport.accessor.Accessor(connection)
+        with pytest.raises(sqliteimport.errors.CompileError, match="could not be run"):
+            sqliteimport.compiler.compile_bytecode_in_workers(
+                accessor, [str(tmp_path / "bogus-python")]
+            )
+    connection.close()